@@ -5,19 +5,53 @@ from flask_cors import CORS
 from config import config
 from app.extensions import swagger
 from app.api import api_bp
+from app.db import init_db
+from app.db.instrumentation import init_instrumentation, install_instrumentation
+from app.commands import register_commands
+from app.metrics import init_metrics
+from app.db.migrate import check_schema
 
 
 def create_app(config_name) -> Flask:
     """Application factory"""
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    init_db(app)
+    init_instrumentation(app)
     config[config_name].init_app(config_name)
 
     # Register blueprint for api.
     app.register_blueprint(api_bp)
+    # Register /metrics endpoint.
+    init_metrics(app)
+    register_commands(app)
+
+    # Sizes read from counters without triggers are wrong, so they are always checked.
+    if app.config["CHECK_SCHEMA_ON_STARTUP"] or app.config["GROUP_STUDENT_COUNTER"]:
+        check_schema(app.logger)
 
     swagger.init_app(app)
     CORS(app)  # For handling Cross Origin Resource Sharing in Swagger UI
 
     return app
 
+
+def create_async_app(config_name):
+    """Application factory of the async API.
+
+    Serves the same /api/v1 routes with the same models on the asyncio
+    engine, requires quart and the driver from ASYNC_DATABASE_DRIVER.
+    """
+    from quart import Quart
+    from app.async_api import async_api_bp
+    from app.db.async_db import init_async_db
+
+    app = Quart(__name__)
+    app.config.from_object(config[config_name])
+    init_async_db(app)
+    # Slow statements are logged, per request statistics are kept only by sync API.
+    install_instrumentation()
+    config[config_name].init_app(config_name)
+
+    app.register_blueprint(async_api_bp)
+    return app
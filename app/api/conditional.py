@@ -0,0 +1,81 @@
+"""Module for HTTP conditional requests.
+
+ETag of a response is built from version of the data maintained by database
+triggers. Version is read with single small query, so request with
+matching If-None-Match is answered with 304 Not Modified before the data
+query runs. The version is passed to the resource method, which keys
+cached data by it, so body and ETag are always of the same version.
+"""
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import request, Response
+from werkzeug.sansio.request import Request
+
+from app.api.constants import ETAG_VARY
+
+
+def make_etag(version: int, query_string: bytes, accept: str) -> str:
+    """Create strong ETag for the version of the data.
+
+    Query string and Accept header select the representation, so they
+    are part of ETag as well.
+
+    Args:
+        version: Version of the data.
+        query_string: Query string of the request.
+        accept: Accept header of the request.
+
+    Returns:
+        ETag value without quotes.
+    """
+    variant = hashlib.blake2s(b"\n".join([query_string, accept.encode()]), digest_size=8).hexdigest()
+    return f"{version}-{variant}"
+
+
+def match_etag(version: int, request: Request) -> tuple[dict, bool]:
+    """Create ETag headers for the version and check If-None-Match.
+
+    Used by conditional() and by async views, request is Flask or Quart request.
+
+    Args:
+        version: Version of the data.
+        request: Request.
+
+    Returns:
+        ETag headers of the response and whether the client has this version.
+    """
+    etag = make_etag(version, request.query_string, request.headers.get("Accept", ""))
+    headers = {"ETag": f'"{etag}"', "Vary": ETAG_VARY}
+    return headers, request.if_none_match.contains_weak(etag)
+
+
+def conditional(get_version: Callable[..., Optional[int]]):
+    """Decorator which adds ETag to the response and answers If-None-Match.
+
+    Resource method is called with keyword argument 'version' as well.
+
+    Args:
+        get_version: Function called with view arguments, which returns
+            version of the data or None when data does not exist.
+
+    Returns:
+        Decorator of the resource method.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            version = get_version(**kwargs)
+            if version is None:
+                return method(*args, version=version, **kwargs)
+            headers, not_modified = match_etag(version, request)
+            if not_modified:
+                return Response(status=304, headers=headers)
+            response = method(*args, version=version, **kwargs)
+            if not isinstance(response, Response):
+                return response, 200, headers
+            response.headers.update(headers)
+            return response
+        return wrapper
+    return decorator
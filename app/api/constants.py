@@ -3,6 +3,10 @@ NO_STUDENTS_FOUND = "No students were found."
 NO_GROUPS_FOUND = "No groups were found"
 GROUP_VALUE_ERROR = "parameter 'student_count' should be integer."
 GROUP_TYPE_ERROR = "argument 'student_count' should be provided."
+GROUP_ORDER_ERROR = "parameter 'order_by' can only be 'size'."
+PAGINATION_ERROR = "parameters 'limit' and 'offset' should be non-negative integers."
+PAGE_LIMIT_ERROR = "parameter 'limit' should be integer from 1 to {}."
+INVALID_CURSOR = "parameter 'cursor' is invalid."
 STUDENTS_FULL_NAME_MISSING = "First name and last name should be provided."
 STUDENTS_INTEGRITY_ERROR = "Group id '{}' does not exist."
 NEW_STUDENT_LOCATION_URL = "api/v1/students/{}/"
@@ -10,35 +14,98 @@ STUDENT_ID_NOT_FOUND = "A student with ID '{}' was not found."
 COURSES_NOT_PROVIDED = "No courses were provided."
 NO_STUDENT_OR_COURSE = "Either student or course was not found."
 NO_STUDENT_COURSE_RELATION = "Student is not assigned to the course."
+COURSES_NOT_FOUND = "Courses were not found: {}."
+STUDENTS_NOT_FOUND = "Students were not found: {}."
+STUDENT_IDS_NOT_PROVIDED = "No student ids were provided."
+BODY_NOT_OBJECT = "Request body should be a JSON object."
+STUDENT_IDS_TYPE_ERROR = "'student_ids' should be a list of integers."
+COURSES_TYPE_ERROR = "'courses' should be a list of course names."
+DATABASE_UNAVAILABLE = "Database is unavailable, try again later."
+IMPORT_CONTENT_TYPE_ERROR = "Body should be text/csv or application/x-ndjson."
+IMPORT_CSV_HEADER_ERROR = "CSV header should contain first_name and last_name columns."
 
 # Query parameters:
 STUDENT_COUNT = "student_count"
+COURSE = "course"
+ORDER_BY = "order_by"
+LIMIT = "limit"
+OFFSET = "offset"
+NAME = "name"
+CURSOR = "cursor"
+STREAM = "stream"
+FORMAT = "format"
+COMPRESSION = "compression"
+TABLE = "table"
+
+# Query parameter values:
+ORDER_BY_SIZE = "size"
+TRUE_VALUES = ("1", "true", "yes")
+
+# Request header which selects representation of the response.
+ETAG_VARY = "Accept"
+# Name of groups version in data_versions table.
+GROUPS_VERSION = "groups"
+
+# Pagination:
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Number of rows fetched from server side cursor at once when streaming.
+STREAM_BATCH_SIZE = 1000
+
+# Response body keys:
+STUDENTS = "students"
+NEXT_CURSOR = "next"
+CREATED = "created"
+DELETED = "deleted"
+IDS = "ids"
+CONFLICTS = "conflicts"
 
 # Data from request body:
 FIRST_NAME = "first_name"
 LAST_NAME = "last_name"
 GROUP_ID = "group_id"
 COURSES = "courses"
+STUDENT_IDS = "student_ids"
+# Columns of imported students, the first two are required.
+IMPORT_COLUMNS = (FIRST_NAME, LAST_NAME, GROUP_ID)
+
+# Response content types:
+JSON_MIMETYPE = "application/json"
+NDJSON_MIMETYPE = "application/x-ndjson"
+MSGPACK_MIMETYPE = "application/msgpack"
+CSV_MIMETYPE = "text/csv"
+ZIP_MIMETYPE = "application/zip"
 
 # Response headers:
 LOCATION_HEADER = "Location"
+CONTENT_DISPOSITION_HEADER = "Content-Disposition"
+# File name of exported archive.
+EXPORT_ATTACHMENT = "attachment; filename=export.zip"
 
 # API documentation path
+# For students
+GET_STUDENTS_DOC = "./static/docs/students/get_students.yaml"
 # For single student
 STUDENT_DELETE_DOC = "./static/docs/single_student/delete_student.yaml"
 STUDENT_CREATE_DOC = "./static/docs/single_student/create_student.yaml"
+IMPORT_STUDENTS_DOC = "./static/docs/students/import_students.yaml"
 # For students courses relation
 ADD_COURSE = "./static/docs/student_courses/add_student_to_course.yaml"
 DELETE_COURSE = "./static/docs/student_courses/delete_student_from_course.yaml"
+ENROLL_STUDENTS = "./static/docs/student_courses/enroll_students.yaml"
 # For courses students relation
 GET_STUDENTS_FROM_COURSE = "./static/docs/course_students/get_students_from_course.yaml"
+DELETE_STUDENTS_FROM_COURSE = "./static/docs/course_students/delete_students_from_course.yaml"
 # For groups
 FIND_ALL_GROUPS = "./static/docs/groups/find_all_groups.yaml"
+# For export
+EXPORT_DOC = "./static/docs/export/export.yaml"
 
-
-# Retry parameters
-TRIES = 3
-DELAY = 1
-
-
-
+# Bulk insert parameters
+BULK_CHUNK_SIZE = 1000
+# Bulk insert conflict reasons:
+BULK_ALREADY_EXISTS = "Record already exists."
+BULK_NAME_MISSING = "First name and last name should be provided."
+BULK_NAME_TOO_LONG = "Name should not be longer than {} characters."
+BULK_GROUP_NOT_FOUND = "Group id '{}' does not exist."
+BULK_INVALID_ROW = "Row should be an object with string first_name, last_name and optional group_id."
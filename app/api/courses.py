@@ -1,32 +1,99 @@
 """Module for Course related endpoints."""
+from itertools import chain
+from typing import Optional, Union
 
-from flask import abort, current_app
+from flask import request, Response, stream_with_context
 from flask_restful import Resource
 from flasgger import swag_from
 
 from app.api import api
-from app.api.constants import NO_STUDENTS_FOUND, GET_STUDENTS_FROM_COURSE
-from app.api.helper_functions import dict_helper
+from app.api.constants import (
+    GET_STUDENTS_FROM_COURSE, JSON_MIMETYPE, NDJSON_MIMETYPE, DELETED, DELETE_STUDENTS_FROM_COURSE)
+from app.api.conditional import conditional
+from app.api.handlers import (
+    stream_requested, page_requested, page_arguments, students_page, require_students, wants_ndjson,
+    course_errors)
+from app.api.helper_functions import dict_helper, stream_json_array, stream_ndjson
 from app.db import Course
 
 
 class CourseStudents(Resource):
     """Class provides CRUD operations with course-students association table."""
     @swag_from(GET_STUDENTS_FROM_COURSE)
-    def get(self, course: str) -> list[dict]:
+    @conditional(lambda course: Course.get_roster_version(course))
+    def get(self, course: str, version: Optional[int] = None) -> Union[list[dict], dict, Response]:
         """Finds all students related to the course with a given name.
 
+        With 'limit' or 'cursor' parameter students are returned in pages
+        ordered by id. With 'stream' parameter students are streamed as JSON
+        array or, when client accepts it, as newline delimited JSON.
+        Response has ETag of the course roster version, request with
+        matching If-None-Match is answered with 304 without loading students.
+
         Args:
             course: Name of the course.
+            version: Roster version of the course, set by conditional.
 
         Returns:
-            List with student objects.
+            List with student objects, page of students or streamed Response object.
         """
-        students = Course.find_students_in_course(course)
-        if not students:
-            current_app.logger.info(NO_STUDENTS_FOUND)
-            abort(404, description=NO_STUDENTS_FOUND)
+        if stream_requested(request.args):
+            return self.stream(course)
+        if page_requested(request.args):
+            return self.page(course)
+
+        students = Course.find_students_in_course(course, version)
+        require_students(students)
         return dict_helper(students)
 
+    @staticmethod
+    def page(course: str) -> dict:
+        """Finds page of students related to the course.
+
+        Args:
+            course: Name of the course.
+
+        Returns:
+            Dictionary with list of students and next page cursor.
+        """
+        limit, after_id = page_arguments(request.args)
+        # Get one more student to find out if there is next page.
+        students = Course.get_students_page_in_course(course, limit + 1, after_id)
+        return students_page(students, limit, lambda student: student["id"])
+
+    @staticmethod
+    def stream(course: str) -> Response:
+        """Streams all students related to the course.
+
+        Args:
+            course: Name of the course.
+
+        Returns:
+            Streamed Response object.
+        """
+        students = Course.iter_students_in_course(course)
+        # Fetch first student to answer 404 before streaming starts.
+        first = next(students, None)
+        require_students(first)
+        students = chain([first], students)
+
+        if wants_ndjson(request.accept_mimetypes):
+            return Response(stream_with_context(stream_ndjson(students)), mimetype=NDJSON_MIMETYPE)
+        return Response(stream_with_context(stream_json_array(students)), mimetype=JSON_MIMETYPE)
+
+    @swag_from(DELETE_STUDENTS_FROM_COURSE)
+    def delete(self, course: str) -> dict:
+        """Removes all students from the course with a given name.
+
+        Args:
+            course: Name of the course.
+
+        Returns:
+            Dictionary with number of removed students.
+        """
+        with course_errors():
+            deleted = Course.remove_all_students(course)
+        return {DELETED: deleted}
+
 
 api.add_resource(CourseStudents, "/courses/<course>/students")
@@ -0,0 +1,39 @@
+"""Module for export endpoint."""
+
+from flask import abort, current_app, request, Response
+from flask_restful import Resource
+from flasgger import swag_from
+
+from app.api import api
+from app.api.constants import (
+    FORMAT, COMPRESSION, TABLE, ZIP_MIMETYPE, CONTENT_DISPOSITION_HEADER, EXPORT_ATTACHMENT, EXPORT_DOC)
+from app.db.export import CSV, NO_COMPRESSION, check_export_options, export_archive
+
+
+class Export(Resource):
+    """Class provides export of groups, courses, students and enrollments."""
+
+    @swag_from(EXPORT_DOC)
+    def get(self) -> Response:
+        """Streams ZIP archive with one file per table.
+
+        All tables are read from one snapshot of the database and the
+        archive is sent while it is written, so neither the server nor the
+        database holds whole tables in memory.
+
+        Returns:
+            Streamed response with ZIP archive.
+        """
+        export_format = request.args.get(FORMAT, CSV)
+        compression = request.args.get(COMPRESSION, NO_COMPRESSION)
+        tables = request.args.getlist(TABLE) or None
+        try:
+            check_export_options(export_format, compression, tables or [])
+        except ValueError as error:
+            current_app.logger.info(str(error))
+            abort(400, description=str(error))
+        return Response(export_archive(export_format, compression, tables), mimetype=ZIP_MIMETYPE,
+                        headers={CONTENT_DISPOSITION_HEADER: EXPORT_ATTACHMENT})
+
+
+api.add_resource(Export, "/export/")
@@ -1,37 +1,40 @@
 """Module for Group related endpoints."""
+from typing import Optional
 
-from flask import request, abort, current_app
+from flask import request
 from flask_restful import Resource
 from flasgger import swag_from
 
 from app.api import api
-from app.api.constants import STUDENT_COUNT, GROUP_VALUE_ERROR, GROUP_TYPE_ERROR, NO_GROUPS_FOUND, FIND_ALL_GROUPS
+from app.api.constants import FIND_ALL_GROUPS
+from app.api.conditional import conditional
+from app.api.handlers import groups_query, require_groups
 from app.db import Group
 
 
 class Groups(Resource):
     """Class provides CRUD operations with group table."""
     @swag_from(FIND_ALL_GROUPS)
-    def get(self) -> list:
+    @conditional(lambda: Group.get_version())
+    def get(self, version: Optional[int] = None) -> list:
         """Find all groups with less or equals student count.
 
+        Response has ETag of the groups version, request with matching
+        If-None-Match is answered with 304 without running the query.
+
+        Args:
+            version: Groups version, set by conditional.
+
         Returns:
             List of groups.
         """
-        # Get student count.
-        student_count = request.args.get(STUDENT_COUNT)
-        try:
-            # Get list of groups.
-            groups = Group.get_all_groups_not_bigger_then(int(student_count))
-        except ValueError:
-            current_app.logger.info(GROUP_VALUE_ERROR)
-            abort(400, description=GROUP_VALUE_ERROR)
-        except TypeError:
-            current_app.logger.info(GROUP_TYPE_ERROR)
-            abort(400, description=GROUP_TYPE_ERROR)
-        if not groups:
-            current_app.logger.info(NO_GROUPS_FOUND)
-            abort(404, description=NO_GROUPS_FOUND)
+        query = groups_query(request.args)
+        groups = Group.get_all_groups_not_bigger_then(query.student_count,
+                                                      order_by=query.order_by,
+                                                      limit=query.limit,
+                                                      offset=query.offset,
+                                                      version=version)
+        require_groups(groups)
         return groups
 
 
@@ -0,0 +1,244 @@
+"""Module for request handling shared by the sync and async API.
+
+Resources of app.api and views of app.async_api differ only in transport:
+how the body is read, how model methods are run and how responses are
+streamed. Parsing and validation of the request, mapping of model errors
+to HTTP errors and building of response data are done here. Functions
+take query parameters, body or headers of Flask or Quart request.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple, NoReturn, Optional
+
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from werkzeug.datastructures import MIMEAccept, MultiDict
+from werkzeug.exceptions import abort
+
+from app.api.constants import (
+    FIRST_NAME, GROUP_ID, LAST_NAME, STUDENTS_FULL_NAME_MISSING, STUDENTS_INTEGRITY_ERROR,
+    STUDENT_ID_NOT_FOUND, COURSES_NOT_PROVIDED, COURSES, NO_STUDENT_OR_COURSE,
+    NO_STUDENT_COURSE_RELATION, NO_STUDENTS_FOUND, NAME, LIMIT, CURSOR, STREAM, TRUE_VALUES,
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PAGE_LIMIT_ERROR, INVALID_CURSOR, STUDENTS, NEXT_CURSOR,
+    JSON_MIMETYPE, NDJSON_MIMETYPE, CSV_MIMETYPE, COURSES_NOT_FOUND, STUDENTS_NOT_FOUND, STUDENT_IDS,
+    STUDENT_IDS_NOT_PROVIDED, COURSE, IMPORT_CONTENT_TYPE_ERROR, IMPORT_CSV_HEADER_ERROR, CREATED,
+    IDS, CONFLICTS, BODY_NOT_OBJECT, STUDENT_IDS_TYPE_ERROR, COURSES_TYPE_ERROR, STUDENT_COUNT,
+    GROUP_VALUE_ERROR, GROUP_TYPE_ERROR, NO_GROUPS_FOUND, ORDER_BY, ORDER_BY_SIZE, OFFSET,
+    GROUP_ORDER_ERROR, PAGINATION_ERROR)
+from app.api.helper_functions import (
+    parse_page_limit, parse_non_negative_int, encode_cursor, decode_cursor, is_list_of)
+from app.db.bulk import BulkInsertResult
+from app.db.exceptions import CoursesNotFound, StudentsNotFound
+
+# Child of the application logger, both apps are named "app".
+logger = logging.getLogger(__name__)
+
+
+class GroupsQuery(NamedTuple):
+    """Query parameters of GET /groups/."""
+    student_count: int
+    order_by: Optional[str]
+    limit: Optional[int]
+    offset: Optional[int]
+
+
+def fail(status: int, message: str) -> NoReturn:
+    """Log message and abort request with it.
+
+    Args:
+        status: HTTP status code.
+        message: Description of the error.
+    """
+    logger.info(message)
+    abort(status, description=message)
+
+
+def stream_requested(args: MultiDict) -> bool:
+    """Whether all items are streamed instead of returned in pages."""
+    return args.get(STREAM, "").lower() in TRUE_VALUES
+
+
+def page_requested(args: MultiDict) -> bool:
+    """Whether page of course students is requested."""
+    return LIMIT in args or CURSOR in args
+
+
+def wants_ndjson(accept: MIMEAccept) -> bool:
+    """Whether client prefers newline delimited JSON to JSON array."""
+    return accept.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def wants_csv(accept: MIMEAccept) -> bool:
+    """Whether client prefers CSV to JSON."""
+    return accept.best_match([JSON_MIMETYPE, CSV_MIMETYPE]) == CSV_MIMETYPE
+
+
+def student_filters(args: MultiDict) -> tuple[Optional[str], Optional[str]]:
+    """Get group id and name prefix which students are filtered by."""
+    return args.get(GROUP_ID), args.get(NAME)
+
+
+def page_arguments(args: MultiDict) -> tuple[int, Optional[int]]:
+    """Get page size and cursor from query parameters.
+
+    Args:
+        args: Query parameters.
+
+    Returns:
+        Page size and id of the last student on previous page.
+    """
+    try:
+        limit = parse_page_limit(args.get(LIMIT), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    except ValueError:
+        fail(400, PAGE_LIMIT_ERROR.format(MAX_PAGE_SIZE))
+    try:
+        after_id = decode_cursor(args.get(CURSOR))
+    except ValueError:
+        fail(400, INVALID_CURSOR)
+    return limit, after_id
+
+
+def students_page(students: list, limit: int, student_id: Callable[[object], int]) -> dict:
+    """Build page with next cursor.
+
+    Args:
+        students: Students of the page and one more student when there is next page.
+        limit: Page size.
+        student_id: Function which gets id of the student.
+
+    Returns:
+        Dictionary with list of students and next page cursor.
+    """
+    require_students(students)
+    next_cursor = encode_cursor(student_id(students[limit - 1])) if len(students) > limit else None
+    return {STUDENTS: students[:limit], NEXT_CURSOR: next_cursor}
+
+
+def require_students(students) -> None:
+    """Abort with 404 when no students were found."""
+    if not students:
+        fail(404, NO_STUDENTS_FOUND)
+
+
+def new_student(body: dict) -> tuple[str, str, Optional[str]]:
+    """Get first name, last name and group id of new student from request body."""
+    first_name = body.get(FIRST_NAME)
+    last_name = body.get(LAST_NAME)
+    group_id = body.get(GROUP_ID)
+    if not all([first_name, last_name]):
+        fail(400, STUDENTS_FULL_NAME_MISSING)
+    return first_name, last_name, group_id
+
+
+def check_import_mimetype(mimetype: str) -> None:
+    """Abort with 415 when body of import is neither CSV nor newline delimited JSON."""
+    if mimetype not in (CSV_MIMETYPE, NDJSON_MIMETYPE):
+        fail(415, IMPORT_CONTENT_TYPE_ERROR)
+
+
+def import_summary(result: BulkInsertResult) -> dict:
+    """Build response data of import from its result."""
+    return {CREATED: len(result.ids), IDS: result.ids, CONFLICTS: result.conflicts}
+
+
+def student_courses(body) -> list[str]:
+    """Get course names from body of PUT /students/<student_id>/courses/."""
+    if not isinstance(body, dict):
+        fail(400, BODY_NOT_OBJECT)
+    courses = body.get(COURSES)
+    if not courses:
+        fail(400, COURSES_NOT_PROVIDED)
+    if not is_list_of(courses, str):
+        fail(400, COURSES_TYPE_ERROR)
+    return courses
+
+
+def enrollment(body) -> tuple[list[int], list[str]]:
+    """Get student ids and course names from body of PUT /enrollments/."""
+    if not isinstance(body, dict):
+        fail(400, BODY_NOT_OBJECT)
+    student_ids = body.get(STUDENT_IDS)
+    courses = body.get(COURSES)
+    if not student_ids:
+        fail(400, STUDENT_IDS_NOT_PROVIDED)
+    if not courses:
+        fail(400, COURSES_NOT_PROVIDED)
+    if not is_list_of(student_ids, int):
+        fail(400, STUDENT_IDS_TYPE_ERROR)
+    if not is_list_of(courses, str):
+        fail(400, COURSES_TYPE_ERROR)
+    return student_ids, courses
+
+
+def course_names(args: MultiDict) -> list[str]:
+    """Get names of courses the student is removed from."""
+    names = args.getlist(COURSE)
+    if not names:
+        fail(400, COURSES_NOT_PROVIDED)
+    return names
+
+
+def groups_query(args: MultiDict) -> GroupsQuery:
+    """Get student count, ordering and pagination of GET /groups/."""
+    order_by = args.get(ORDER_BY)
+    if order_by not in (None, ORDER_BY_SIZE):
+        fail(400, GROUP_ORDER_ERROR)
+    try:
+        limit = parse_non_negative_int(args.get(LIMIT))
+        offset = parse_non_negative_int(args.get(OFFSET))
+    except ValueError:
+        fail(400, PAGINATION_ERROR)
+    try:
+        student_count = int(args.get(STUDENT_COUNT))
+    except ValueError:
+        fail(400, GROUP_VALUE_ERROR)
+    except TypeError:
+        fail(400, GROUP_TYPE_ERROR)
+    return GroupsQuery(student_count, order_by, limit, offset)
+
+
+def require_groups(groups: list[str]) -> None:
+    """Abort with 404 when no groups were found."""
+    if not groups:
+        fail(404, NO_GROUPS_FOUND)
+
+
+@contextmanager
+def create_student_errors(group_id: Optional[str]) -> Iterator[None]:
+    """Abort with 400 when group of new student does not exist."""
+    try:
+        yield
+    except IntegrityError:
+        fail(400, STUDENTS_INTEGRITY_ERROR.format(group_id))
+
+
+@contextmanager
+def import_errors() -> Iterator[None]:
+    """Abort with 400 when CSV header does not contain required columns."""
+    try:
+        yield
+    except ValueError:
+        fail(400, IMPORT_CSV_HEADER_ERROR)
+
+
+@contextmanager
+def delete_student_errors(student_id: int) -> Iterator[None]:
+    """Abort with 404 when deleted student does not exist."""
+    try:
+        yield
+    except UserWarning:
+        fail(404, STUDENT_ID_NOT_FOUND.format(student_id))
+
+
+@contextmanager
+def course_errors() -> Iterator[None]:
+    """Abort when students or courses of the request are not found or not related."""
+    try:
+        yield
+    except CoursesNotFound as error:
+        fail(404, COURSES_NOT_FOUND.format(", ".join(error.course_names)))
+    except StudentsNotFound as error:
+        fail(404, STUDENTS_NOT_FOUND.format(", ".join(map(str, error.student_ids))))
+    except NoResultFound:
+        fail(404, NO_STUDENT_OR_COURSE)
+    except ValueError:
+        fail(400, NO_STUDENT_COURSE_RELATION)
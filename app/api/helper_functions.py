@@ -1,4 +1,45 @@
 """Module fol helper functions."""
+import base64
+import binascii
+import csv
+import io
+import json
+from typing import Optional, Iterable, Iterator, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Number of serialized items joined into one chunk of streamed response.
+STREAM_CHUNK_ITEMS = 500
+
+
+def json_dumps(data) -> bytes:
+    """Serialize data to JSON.
+
+    orjson is used when it is installed, otherwise standard json module.
+
+    Args:
+        data: JSON serializable object.
+
+    Returns:
+        UTF-8 encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def json_loads(data: Union[bytes, str]):
+    """Deserialize JSON document, with orjson when it is installed.
+
+    Raises:
+        ValueError: If data is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def dict_helper(objects: list) -> list[dict]:
@@ -15,3 +56,242 @@ def dict_helper(objects: list) -> list[dict]:
     """
     result = [item.to_dict() for item in objects]
     return result
+
+
+def parse_non_negative_int(value: Optional[str]) -> Optional[int]:
+    """Parse optional query parameter to non-negative integer.
+
+    Args:
+        value: Query parameter value.
+
+    Returns:
+        Integer or None if parameter was not provided.
+
+    Raises:
+        ValueError: If value is not a non-negative integer.
+    """
+    if value is None:
+        return None
+    number = int(value)
+    if number < 0:
+        raise ValueError(value)
+    return number
+
+
+def is_list_of(value, item_type: type) -> bool:
+    """Check that JSON value is a list of items of the type.
+
+    Booleans are not accepted as integers, although bool is a subclass of int.
+
+    Args:
+        value: Value from request body.
+        item_type: Expected type of the items.
+
+    Returns:
+        True if value is a list and all its items have the type.
+    """
+    return isinstance(value, list) and all(
+        isinstance(item, item_type) and not isinstance(item, bool) for item in value)
+
+
+def parse_page_limit(value: Optional[str], default: int, maximum: int) -> int:
+    """Parse page size query parameter.
+
+    Args:
+        value: Query parameter value.
+        default: Page size when parameter was not provided.
+        maximum: Max page size.
+
+    Returns:
+        Page size.
+
+    Raises:
+        ValueError: If value is not an integer from 1 to maximum.
+    """
+    limit = parse_non_negative_int(value)
+    if limit is None:
+        return default
+    if not 0 < limit <= maximum:
+        raise ValueError(value)
+    return limit
+
+
+def encode_cursor(last_id: int) -> str:
+    """Create opaque pagination cursor.
+
+    Args:
+        last_id: ID of the last item on the page.
+
+    Returns:
+        URL safe cursor string.
+    """
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Get ID of the last item on previous page from pagination cursor.
+
+    Args:
+        cursor: Cursor created by encode_cursor().
+
+    Returns:
+        ID or None if cursor was not provided.
+
+    Raises:
+        ValueError: If cursor is malformed.
+    """
+    if cursor is None:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError):
+        raise ValueError(cursor)
+
+
+def stream_json_array(items: Iterable[dict]) -> Iterator[bytes]:
+    """Serialize items to JSON array piece by piece.
+
+    Items are consumed lazily and several of them are joined into one
+    chunk, so the whole array is never held in memory.
+
+    Args:
+        items: Iterable of JSON serializable objects.
+
+    Yields:
+        Chunks of JSON array.
+    """
+    yield b"["
+    buffer = []
+    separator = b""
+    for item in items:
+        buffer.append(separator + json_dumps(item))
+        separator = b","
+        if len(buffer) == STREAM_CHUNK_ITEMS:
+            yield b"".join(buffer)
+            buffer = []
+    yield b"".join(buffer) + b"]"
+
+
+def stream_ndjson(items: Iterable[dict]) -> Iterator[bytes]:
+    """Serialize items to newline delimited JSON piece by piece.
+
+    Args:
+        items: Iterable of JSON serializable objects.
+
+    Yields:
+        Chunks of NDJSON document.
+    """
+    buffer = []
+    for item in items:
+        buffer.append(json_dumps(item) + b"\n")
+        if len(buffer) == STREAM_CHUNK_ITEMS:
+            yield b"".join(buffer)
+            buffer = []
+    if buffer:
+        yield b"".join(buffer)
+
+
+def undecodable_line(line: bytes) -> str:
+    """Get line which is not valid UTF-8 as string with invalid bytes escaped."""
+    return line.decode("utf-8", errors="backslashreplace").rstrip("\r\n")
+
+
+def read_csv_rows(lines: Iterable[bytes], columns: tuple[str, ...]) -> Iterator[Union[dict, str]]:
+    """Parse UTF-8 CSV with header row to dictionaries lazily.
+
+    Header is read at once. Empty values are returned as None. Line which
+    is not valid UTF-8 is returned in place of its row as string, so it is
+    reported with its row number.
+
+    Args:
+        lines: Iterable of lines of the document.
+        columns: Columns which are returned, the first two are required.
+
+    Returns:
+        Iterator of dictionaries with given columns.
+
+    Raises:
+        ValueError: If header is not valid UTF-8 or does not contain required columns.
+    """
+    undecodable = []
+
+    def decode(lines: Iterable[bytes]) -> Iterator[str]:
+        for line in lines:
+            try:
+                yield line.decode("utf-8")
+            except UnicodeDecodeError:
+                undecodable.append(undecodable_line(line))
+
+    def read_rows() -> Iterator[Union[dict, str]]:
+        for row in reader:
+            # Lines skipped by the reader precede the row.
+            yield from undecodable
+            undecodable.clear()
+            yield {column: row.get(column) or None for column in columns}
+        yield from undecodable
+
+    reader = csv.DictReader(decode(lines))
+    if undecodable or not set(columns[:2]) <= set(reader.fieldnames or []):
+        raise ValueError(reader.fieldnames)
+    return read_rows()
+
+
+def read_ndjson_rows(lines: Iterable[bytes]) -> Iterator:
+    """Parse newline delimited JSON lazily.
+
+    Blank lines are skipped. Line which is not valid UTF-8 or JSON is
+    returned as string, so it is reported with its row number.
+
+    Args:
+        lines: Iterable of lines of the document.
+
+    Yields:
+        Deserialized value of every line.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError:
+            yield undecodable_line(line)
+            continue
+        try:
+            yield json_loads(text)
+        except ValueError:
+            yield text.rstrip("\r\n")
+
+
+def split_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split chunks of the body to lines, keeping line endings.
+
+    Args:
+        chunks: Iterable of body chunks.
+
+    Yields:
+        Lines of the body.
+    """
+    rest = b""
+    for chunk in chunks:
+        lines = (rest + chunk).splitlines(keepends=True)
+        rest = lines.pop() if lines and not lines[-1].endswith(b"\n") else b""
+        yield from lines
+    if rest:
+        yield rest
+
+
+def conflicts_csv(conflicts: list[dict]) -> str:
+    """Create CSV report of rows which were not inserted.
+
+    Args:
+        conflicts: Conflicts of BulkInsertResult.
+
+    Returns:
+        CSV document with row, reason and JSON encoded value columns.
+    """
+    report = io.StringIO()
+    writer = csv.writer(report)
+    writer.writerow(["row", "reason", "value"])
+    for conflict in conflicts:
+        writer.writerow([conflict["row"], conflict["reason"], json_dumps(conflict["value"]).decode()])
+    return report.getvalue()
@@ -0,0 +1,63 @@
+"""Module for response representations.
+
+Representation is chosen from Accept header of the request. JSON is encoded
+with orjson when it is installed and MessagePack is available when msgpack
+is installed.
+"""
+from flask import Response, make_response
+
+from app.api import api
+from app.api.constants import JSON_MIMETYPE, NDJSON_MIMETYPE, MSGPACK_MIMETYPE
+from app.api.helper_functions import json_dumps
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def encode_json(data) -> bytes:
+    """Encode data to JSON document."""
+    return json_dumps(data) + b"\n"
+
+
+def encode_ndjson(data) -> bytes:
+    """Encode data to newline delimited JSON.
+
+    Each item of a list is encoded on its own line, any other object
+    is encoded as single line.
+    """
+    items = data if isinstance(data, list) else [data]
+    return b"".join(json_dumps(item) + b"\n" for item in items)
+
+
+# Body encoders by mimetype, the first one is default.
+ENCODERS = {JSON_MIMETYPE: encode_json, NDJSON_MIMETYPE: encode_ndjson}
+if msgpack is not None:
+    ENCODERS[MSGPACK_MIMETYPE] = msgpack.packb
+
+
+def _make_response(body: bytes, code: int, headers: dict = None) -> Response:
+    """Create response with encoded body."""
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    return response
+
+
+@api.representation(JSON_MIMETYPE)
+def output_json(data, code: int, headers: dict = None) -> Response:
+    """Makes a response with a JSON encoded body."""
+    return _make_response(encode_json(data), code, headers)
+
+
+@api.representation(NDJSON_MIMETYPE)
+def output_ndjson(data, code: int, headers: dict = None) -> Response:
+    """Makes a response with newline delimited JSON body."""
+    return _make_response(encode_ndjson(data), code, headers)
+
+
+if msgpack is not None:
+    @api.representation(MSGPACK_MIMETYPE)
+    def output_msgpack(data, code: int, headers: dict = None) -> Response:
+        """Makes a response with a MessagePack encoded body."""
+        return _make_response(msgpack.packb(data), code, headers)
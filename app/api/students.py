@@ -1,23 +1,53 @@
 """Module for Student related endpoints."""
+from typing import Union
 
-from flask import request, Response, abort, current_app
+from flask import request, Response, stream_with_context
 from flask_restful import Resource
-from sqlalchemy.exc import IntegrityError, NoResultFound
 from flasgger import swag_from
 
 from app.api import api
 from app.api.constants import (
-    FIRST_NAME, GROUP_ID, LAST_NAME, STUDENTS_FULL_NAME_MISSING,
-    STUDENTS_INTEGRITY_ERROR, NEW_STUDENT_LOCATION_URL, LOCATION_HEADER,
-    STUDENT_ID_NOT_FOUND, COURSES_NOT_PROVIDED, COURSES, NO_STUDENT_OR_COURSE,
-    NO_STUDENT_COURSE_RELATION,
-    STUDENT_DELETE_DOC, STUDENT_CREATE_DOC, ADD_COURSE, DELETE_COURSE)
+    NEW_STUDENT_LOCATION_URL, LOCATION_HEADER, STUDENTS, JSON_MIMETYPE, CREATED, DELETED,
+    GET_STUDENTS_DOC, STUDENT_DELETE_DOC, STUDENT_CREATE_DOC, ADD_COURSE, DELETE_COURSE,
+    ENROLL_STUDENTS, IMPORT_STUDENTS_DOC, IMPORT_COLUMNS, CSV_MIMETYPE)
+from app.api.handlers import (
+    stream_requested, student_filters, page_arguments, students_page, new_student,
+    check_import_mimetype, import_summary, wants_csv, student_courses, enrollment, course_names,
+    create_student_errors, import_errors, delete_student_errors, course_errors)
+from app.api.helper_functions import (
+    dict_helper, stream_json_array, read_csv_rows, read_ndjson_rows, conflicts_csv)
 from app.db import Student
 
 
 class Students(Resource):
     """Class provides CRUD operations with students table."""
 
+    @swag_from(GET_STUDENTS_DOC)
+    def get(self) -> Union[dict, Response]:
+        """Finds students, optionally filtered by group and name prefix.
+
+        Students are returned in pages ordered by id. Cursor of the next page
+        is returned in response body. With 'stream' parameter all students are
+        streamed as JSON array instead.
+
+        Returns:
+            Dictionary with list of students and next page cursor or
+            streamed Response object.
+        """
+        group_id, name_prefix = student_filters(request.args)
+
+        if stream_requested(request.args):
+            students = Student.iter_students(group_id, name_prefix)
+            body = stream_json_array(student.to_dict() for student in students)
+            return Response(stream_with_context(body), mimetype=JSON_MIMETYPE)
+
+        limit, after_id = page_arguments(request.args)
+        # Get one more student to find out if there is next page.
+        students = Student.get_students_page(limit + 1, after_id, group_id, name_prefix)
+        page = students_page(students, limit, lambda student: student.id)
+        page[STUDENTS] = dict_helper(page[STUDENTS])
+        return page
+
     @swag_from(STUDENT_CREATE_DOC)
     def post(self) -> Response:
         """Adds new student.
@@ -27,31 +57,49 @@ class Students(Resource):
         Returns:
             Response object with location of new student in header.
         """
-        # Get students data from request body.
-        from_json = request.json
-        first_name = from_json.get(FIRST_NAME)
-        last_name = from_json.get(LAST_NAME)
-        group_id = from_json.get(GROUP_ID)
-
-        # Check if first and last name were provided.
-        if not all([first_name, last_name]):
-            current_app.logger.info(STUDENTS_FULL_NAME_MISSING)
-            abort(400, description=STUDENTS_FULL_NAME_MISSING)
-        try:
+        first_name, last_name, group_id = new_student(request.json)
+        with create_student_errors(group_id):
             student_id = Student.create_student(first_name, last_name, group_id)
-        except IntegrityError:
-            # If group name does not exist.
-            current_app.logger.info(STUDENTS_INTEGRITY_ERROR.format(group_id))
-            abort(400, description=STUDENTS_INTEGRITY_ERROR.format(group_id))
         return Response(status=201,
                         headers={LOCATION_HEADER: NEW_STUDENT_LOCATION_URL.format(student_id)})
 
 
+class StudentsImport(Resource):
+    """Class provides bulk import of students."""
+
+    @swag_from(IMPORT_STUDENTS_DOC)
+    def post(self) -> Union[dict, Response]:
+        """Creates students from CSV or newline delimited JSON body.
+
+        Body is parsed while it is received, so it is never held in memory
+        whole. Students are inserted in chunks, each chunk is committed in
+        its own transaction, apart from the unit of work of the request.
+        Invalid rows are reported as conflicts and the
+        rest is inserted.
+
+        Returns:
+            Dictionary with number of created students, their ids in input
+            order and conflicts, or CSV report of conflicts when client
+            accepts text/csv.
+        """
+        check_import_mimetype(request.mimetype)
+        if request.mimetype == CSV_MIMETYPE:
+            with import_errors():
+                rows = read_csv_rows(request.stream, IMPORT_COLUMNS)
+        else:
+            rows = read_ndjson_rows(request.stream)
+
+        result = Student.bulk_create_students(rows)
+        if wants_csv(request.accept_mimetypes):
+            return Response(conflicts_csv(result.conflicts), mimetype=CSV_MIMETYPE)
+        return import_summary(result)
+
+
 class SingleStudent(Resource):
     """Class provides CRUD operations with single student."""
 
     @swag_from(STUDENT_DELETE_DOC)
-    def delete(self, student_id) -> Response:
+    def delete(self, student_id: int) -> Response:
         """Deletes student with specific id.
 
         Args:
@@ -60,11 +108,8 @@ class SingleStudent(Resource):
         Returns:
             Response object.
         """
-        try:
+        with delete_student_errors(student_id):
             Student.delete_student(student_id)
-        except UserWarning:
-            current_app.logger.info(STUDENT_ID_NOT_FOUND.format(student_id))
-            abort(404, description=STUDENT_ID_NOT_FOUND.format(student_id))
         return Response(status=200)
 
 
@@ -72,7 +117,7 @@ class StudentCourses(Resource):
     """Class provides CRUD operations with student-courses association."""
 
     @swag_from(ADD_COURSE)
-    def put(self, student_id) -> Response:
+    def put(self, student_id: int) -> Response:
         """Add a student to the course (from a list).
 
         Args:
@@ -81,45 +126,53 @@ class StudentCourses(Resource):
         Returns:
             Response object.
         """
-        from_json = request.json
-        # Get list of courses
-        courses = from_json.get(COURSES)
-        if not courses:
-            current_app.logger.info(COURSES_NOT_PROVIDED)
-            abort(400, description=COURSES_NOT_PROVIDED)
-        try:
-            # Add a student to the course
+        courses = student_courses(request.json)
+        with course_errors():
             Student.add_student_to_course(student_id, courses)
-        except NoResultFound:
-            current_app.logger.info(NO_STUDENT_OR_COURSE)
-            abort(404, description=NO_STUDENT_OR_COURSE)
         return Response(status=200)
 
     @swag_from(DELETE_COURSE)
-    def delete(self, student_id: int) -> Response:
-        """Remove the student from one of his or her courses.
+    def delete(self, student_id: int) -> Union[Response, dict]:
+        """Remove the student from one or several of his or her courses.
 
         Args:
             student_id: Student ID.
 
         Returns:
-            Response object.
+            Response object or, when several courses are provided,
+            dictionary with number of removed courses.
         """
-        course_name = request.args.get("course")
-        if not course_name:
-            current_app.logger.info(COURSES_NOT_PROVIDED)
-            abort(400, description=COURSES_NOT_PROVIDED)
-        try:
-            Student.remove_student_from_course(student_id, course_name)
-        except NoResultFound:
-            current_app.logger.info(NO_STUDENT_OR_COURSE)
-            abort(404, description=NO_STUDENT_OR_COURSE)
-        except ValueError:
-            current_app.logger.info(NO_STUDENT_COURSE_RELATION)
-            abort(400, description=NO_STUDENT_COURSE_RELATION)
-        return Response(status=200)
+        names = course_names(request.args)
+        with course_errors():
+            if len(names) == 1:
+                Student.remove_student_from_course(student_id, names[0])
+            else:
+                deleted = Student.remove_student_from_courses(student_id, names)
+        if len(names) == 1:
+            return Response(status=200)
+        return {DELETED: deleted}
+
+
+class Enrollments(Resource):
+    """Class provides bulk operations with student-courses association."""
+
+    @swag_from(ENROLL_STUDENTS)
+    def put(self) -> dict:
+        """Add every student from the list to every course from the list.
+
+        All students are enrolled in one transaction.
+
+        Returns:
+            Dictionary with number of new enrollments.
+        """
+        student_ids, courses = enrollment(request.json)
+        with course_errors():
+            created = Student.add_students_to_courses(student_ids, courses)
+        return {CREATED: created}
 
 
 api.add_resource(Students, "/students/")
-api.add_resource(SingleStudent, "/students/<student_id>/")
-api.add_resource(StudentCourses, "/students/<student_id>/courses/")
+api.add_resource(StudentsImport, "/students/import")
+api.add_resource(SingleStudent, "/students/<int:student_id>/")
+api.add_resource(StudentCourses, "/students/<int:student_id>/courses/")
+api.add_resource(Enrollments, "/enrollments/")
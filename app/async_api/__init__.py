@@ -0,0 +1,38 @@
+"""Async variant of the API served by Quart.
+
+Routes, messages and representations are the same as in app.api, request
+handling is shared with it through app.api.handlers. Model methods are run
+on the asyncio engine with app.db.async_db.run_model().
+"""
+from quart import Blueprint, Response, request
+from werkzeug.exceptions import HTTPException
+
+from app.api.constants import JSON_MIMETYPE
+from app.api.representations import ENCODERS
+
+async_api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+def make_response(data, status: int = 200, headers: dict = None) -> Response:
+    """Create response with body encoded by representation chosen from Accept header.
+
+    Args:
+        data: Serializable object.
+        status: Status code.
+        headers: Additional headers.
+
+    Returns:
+        Response object.
+    """
+    mimetype = request.accept_mimetypes.best_match(ENCODERS, default=JSON_MIMETYPE)
+    return Response(ENCODERS[mimetype](data), status=status, headers=headers, mimetype=mimetype)
+
+
+@async_api_bp.app_errorhandler(HTTPException)
+async def handle_http_error(error: HTTPException) -> Response:
+    """Return HTTP errors with message in the body as flask_restful does."""
+    headers = {name: value for name, value in error.get_headers() if name != "Content-Type"}
+    return make_response({"message": error.description}, error.code, headers)
+
+
+from . import routes
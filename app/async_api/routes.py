@@ -0,0 +1,217 @@
+"""Async endpoints, counterparts of Resources in app.api."""
+from typing import AsyncIterable, AsyncIterator, Iterator
+
+from quart import Response, request
+from quart.views import MethodView
+from sqlalchemy.util import await_only
+
+from app.api.constants import (
+    NEW_STUDENT_LOCATION_URL, LOCATION_HEADER, STUDENTS, JSON_MIMETYPE, NDJSON_MIMETYPE, CREATED,
+    DELETED, STREAM_BATCH_SIZE, IMPORT_COLUMNS, CSV_MIMETYPE)
+from app.api.conditional import match_etag
+from app.api.handlers import (
+    stream_requested, page_requested, student_filters, page_arguments, students_page,
+    require_students, new_student, check_import_mimetype, import_summary, wants_csv, wants_ndjson,
+    student_courses, enrollment, course_names, groups_query, require_groups, create_student_errors,
+    import_errors, delete_student_errors, course_errors)
+from app.api.helper_functions import (
+    dict_helper, json_dumps, read_csv_rows, read_ndjson_rows, split_lines, conflicts_csv)
+from app.async_api import async_api_bp, make_response
+from app.db import Student, Course, Group
+from app.db.async_db import run_model, stream_rows
+from app.db.bulk import BulkInsertResult
+from app.db.models import StudentRow
+
+
+async def _stream_students(query) -> Response:
+    """Stream students selected by the query as JSON array or newline delimited JSON.
+
+    Rows are fetched in batches from server side cursor, every batch is
+    sent as one chunk.
+    """
+    batches = stream_rows(query, STREAM_BATCH_SIZE)
+    # Fetch first batch to answer 404 before streaming starts.
+    first = await anext(batches, None)
+    require_students(first)
+    ndjson = wants_ndjson(request.accept_mimetypes)
+
+    async def body() -> AsyncIterator[bytes]:
+        batch, separator = first, b"["
+        while batch is not None:
+            items = [json_dumps(StudentRow._make(row).to_dict()) for row in batch]
+            if ndjson:
+                yield b"\n".join(items) + b"\n"
+            else:
+                yield separator + b",".join(items)
+                separator = b","
+            batch = await anext(batches, None)
+        if not ndjson:
+            yield b"]"
+
+    return Response(body(), mimetype=NDJSON_MIMETYPE if ndjson else JSON_MIMETYPE)
+
+
+def _body_chunks(body: AsyncIterable[bytes]) -> Iterator[bytes]:
+    """Receive request body from sync code running in run_model()."""
+    chunks = aiter(body)
+    while True:
+        try:
+            chunk = await_only(anext(chunks))
+        except StopAsyncIteration:
+            return
+        yield chunk
+
+
+def _import_students(mimetype: str, body: AsyncIterable[bytes]) -> BulkInsertResult:
+    """Parse body while it is received and import students, runs in run_model().
+
+    Raises:
+        ValueError: If CSV header does not contain required columns.
+    """
+    lines = split_lines(_body_chunks(body))
+    if mimetype == CSV_MIMETYPE:
+        rows = read_csv_rows(lines, IMPORT_COLUMNS)
+    else:
+        rows = read_ndjson_rows(lines)
+    return Student.bulk_create_students(rows)
+
+
+class Students(MethodView):
+    """Async counterpart of app.api.students.Students."""
+
+    async def get(self) -> Response:
+        """Finds students, optionally filtered by group and name prefix."""
+        group_id, name_prefix = student_filters(request.args)
+        if stream_requested(request.args):
+            return await _stream_students(Student._filtered_students(group_id, name_prefix))
+
+        limit, after_id = page_arguments(request.args)
+        # Get one more student to find out if there is next page.
+        students = await run_model(Student.get_students_page, limit + 1, after_id, group_id, name_prefix)
+        page = students_page(students, limit, lambda student: student.id)
+        page[STUDENTS] = dict_helper(page[STUDENTS])
+        return make_response(page)
+
+    async def post(self) -> Response:
+        """Adds new student."""
+        first_name, last_name, group_id = new_student(await request.get_json())
+        with create_student_errors(group_id):
+            student_id = await run_model(Student.create_student, first_name, last_name, group_id)
+        return Response(status=201, headers={LOCATION_HEADER: NEW_STUDENT_LOCATION_URL.format(student_id)})
+
+
+class StudentsImport(MethodView):
+    """Async counterpart of app.api.students.StudentsImport."""
+
+    async def post(self) -> Response:
+        """Creates students from CSV or newline delimited JSON body."""
+        check_import_mimetype(request.mimetype)
+        with import_errors():
+            result = await run_model(_import_students, request.mimetype, request.body)
+        if wants_csv(request.accept_mimetypes):
+            return Response(conflicts_csv(result.conflicts), mimetype=CSV_MIMETYPE)
+        return make_response(import_summary(result))
+
+
+class SingleStudent(MethodView):
+    """Async counterpart of app.api.students.SingleStudent."""
+
+    async def delete(self, student_id: int) -> Response:
+        """Deletes student with specific id."""
+        with delete_student_errors(student_id):
+            await run_model(Student.delete_student, student_id)
+        return Response(status=200)
+
+
+class StudentCourses(MethodView):
+    """Async counterpart of app.api.students.StudentCourses."""
+
+    async def put(self, student_id: int) -> Response:
+        """Add a student to the courses."""
+        courses = student_courses(await request.get_json())
+        with course_errors():
+            await run_model(Student.add_student_to_course, student_id, courses)
+        return Response(status=200)
+
+    async def delete(self, student_id: int) -> Response:
+        """Remove the student from one or several courses."""
+        names = course_names(request.args)
+        with course_errors():
+            if len(names) == 1:
+                await run_model(Student.remove_student_from_course, student_id, names[0])
+            else:
+                deleted = await run_model(Student.remove_student_from_courses, student_id, names)
+        if len(names) == 1:
+            return Response(status=200)
+        return make_response({DELETED: deleted})
+
+
+class Enrollments(MethodView):
+    """Async counterpart of app.api.students.Enrollments."""
+
+    async def put(self) -> Response:
+        """Add every student from the list to every course from the list."""
+        student_ids, courses = enrollment(await request.get_json())
+        with course_errors():
+            created = await run_model(Student.add_students_to_courses, student_ids, courses)
+        return make_response({CREATED: created})
+
+
+class CourseStudents(MethodView):
+    """Async counterpart of app.api.courses.CourseStudents."""
+
+    async def get(self, course: str) -> Response:
+        """Finds students related to the course, answers If-None-Match."""
+        version = await run_model(Course.get_roster_version, course)
+        headers = {}
+        if version is not None:
+            headers, not_modified = match_etag(version, request)
+            if not_modified:
+                return Response(status=304, headers=headers)
+
+        if stream_requested(request.args):
+            response = await _stream_students(Course._students_in_course(course))
+        elif page_requested(request.args):
+            limit, after_id = page_arguments(request.args)
+            students = await run_model(Course.get_students_page_in_course, course, limit + 1, after_id)
+            response = make_response(students_page(students, limit, lambda student: student["id"]))
+        else:
+            students = await run_model(Course.find_students_in_course, course, version)
+            require_students(students)
+            response = make_response(dict_helper(students))
+        response.headers.update(headers)
+        return response
+
+    async def delete(self, course: str) -> Response:
+        """Removes all students from the course."""
+        with course_errors():
+            deleted = await run_model(Course.remove_all_students, course)
+        return make_response({DELETED: deleted})
+
+
+class Groups(MethodView):
+    """Async counterpart of app.api.groups.Groups."""
+
+    async def get(self) -> Response:
+        """Find all groups with less or equals student count, answers If-None-Match."""
+        version = await run_model(Group.get_version)
+        headers, not_modified = match_etag(version, request)
+        if not_modified:
+            return Response(status=304, headers=headers)
+
+        query = groups_query(request.args)
+        groups = await run_model(Group.get_all_groups_not_bigger_then, query.student_count,
+                                 order_by=query.order_by, limit=query.limit, offset=query.offset,
+                                 version=version)
+        require_groups(groups)
+        return make_response(groups, headers=headers)
+
+
+async_api_bp.add_url_rule("/students/", view_func=Students.as_view("students"))
+async_api_bp.add_url_rule("/students/import", view_func=StudentsImport.as_view("studentsimport"))
+async_api_bp.add_url_rule("/students/<int:student_id>/", view_func=SingleStudent.as_view("singlestudent"))
+async_api_bp.add_url_rule("/students/<int:student_id>/courses/",
+                          view_func=StudentCourses.as_view("studentcourses"))
+async_api_bp.add_url_rule("/enrollments/", view_func=Enrollments.as_view("enrollments"))
+async_api_bp.add_url_rule("/courses/<course>/students", view_func=CourseStudents.as_view("coursestudents"))
+async_api_bp.add_url_rule("/groups/", view_func=Groups.as_view("groups"))
@@ -0,0 +1,131 @@
+"""Module for CLI commands."""
+import time
+from pathlib import Path
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from app.db import get_engine
+from app.db.counters import install_group_counters, reconcile_group_counters
+from app.db.export import (
+    CSV, NO_COMPRESSION, EXPORT_FORMATS, EXPORT_COMPRESSIONS, EXPORT_TABLES, EXPORT_BATCH_SIZE,
+    check_export_options, export_tables)
+from app.db.migrate import upgrade, get_migrations, get_applied_versions, find_missing_indexes
+from app.db.seed import seed_database, GROUP_SIZE, COURSES_PER_STUDENT, SEED_CHUNK_SIZE
+from app.db.test_data import NUMBER_OF_STUDENTS, NUMBER_OF_GROUPS, LIST_OF_COURSES
+
+db_cli = AppGroup("db", help="Manage database schema.")
+
+counters_cli = AppGroup("counters", help="Manage materialized group student counters.")
+
+
+@db_cli.command("upgrade")
+def upgrade_schema() -> None:
+    """Apply pending schema migrations."""
+    applied = upgrade()
+    for migration in applied:
+        click.echo(f"Applied {migration.version:04d}_{migration.name}.")
+    if not applied:
+        click.echo("Schema is up to date.")
+
+
+@db_cli.command("status")
+def schema_status() -> None:
+    """Show applied and pending schema migrations and missing indexes."""
+    dialect = get_engine().dialect.name
+    if dialect != "postgresql":
+        click.echo(f"Migrations are not used, {dialect} schema is created from the models.")
+    else:
+        applied = get_applied_versions()
+        for migration in get_migrations():
+            state = "applied" if migration.version in applied else "pending"
+            click.echo(f"{migration.version:04d}_{migration.name}: {state}")
+    for table, columns, unique in find_missing_indexes():
+        click.echo(f"Missing {'unique ' if unique else ''}index on {table} ({', '.join(columns)}).")
+
+
+@counters_cli.command("install")
+def install_counters() -> None:
+    """Install groups.student_count column and triggers."""
+    try:
+        corrected = install_group_counters()
+    except RuntimeError as error:
+        raise click.ClickException(str(error))
+    click.echo(f"Group counters installed, {corrected} groups reconciled.")
+
+
+@counters_cli.command("reconcile")
+def reconcile_counters() -> None:
+    """Rebuild groups.student_count from students table."""
+    corrected = reconcile_group_counters()
+    click.echo(f"{corrected} groups reconciled.")
+
+
+@click.command("seed")
+@click.option("--students", type=click.IntRange(0), default=NUMBER_OF_STUDENTS, show_default=True,
+              help="Number of students.")
+@click.option("--groups", type=click.IntRange(0), default=NUMBER_OF_GROUPS, show_default=True,
+              help="Number of groups.")
+@click.option("--courses", type=click.IntRange(0), default=len(LIST_OF_COURSES), show_default=True,
+              help="Number of courses.")
+@click.option("--group-size", type=(int, int), default=GROUP_SIZE, show_default=True,
+              help="Minimum and maximum number of students in the group.")
+@click.option("--courses-per-student", type=(int, int), default=COURSES_PER_STUDENT, show_default=True,
+              help="Minimum and maximum number of courses of the student.")
+@click.option("--seed", "random_seed", type=int, default=0, show_default=True,
+              help="Seed of random generator.")
+@click.option("--reset", is_flag=True, help="Delete existing data first.")
+@click.option("--chunk-size", type=click.IntRange(1), default=SEED_CHUNK_SIZE, show_default=True,
+              help="Number of rows sent with one statement.")
+def seed(students: int, groups: int, courses: int, group_size: tuple[int, int],
+         courses_per_student: tuple[int, int], random_seed: int, reset: bool, chunk_size: int) -> None:
+    """Fill database with generated groups, students, courses and enrollments."""
+    try:
+        summary = seed_database(students, groups, courses, group_size, courses_per_student,
+                                random_seed, reset, chunk_size)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    click.echo(f"Created {summary.groups} groups, {summary.students} students, {summary.courses} courses "
+               f"and {summary.enrollments} enrollments in {summary.seconds:.2f} s.")
+
+
+@click.command("export")
+@click.argument("directory", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--format", "export_format", type=click.Choice(EXPORT_FORMATS), default=CSV, show_default=True,
+              help="Format of the files.")
+@click.option("--compression", type=click.Choice(EXPORT_COMPRESSIONS), default=NO_COMPRESSION,
+              show_default=True, help="Compression of the files.")
+@click.option("--table", "tables", type=click.Choice(list(EXPORT_TABLES)), multiple=True,
+              help="Exported table, all tables by default. May be repeated.")
+@click.option("--batch-size", type=click.IntRange(1), default=EXPORT_BATCH_SIZE, show_default=True,
+              help="Number of rows fetched at once.")
+def export(directory: Path, export_format: str, compression: str, tables: tuple[str, ...],
+           batch_size: int) -> None:
+    """Export groups, courses, students and enrollments from one snapshot to DIRECTORY."""
+    try:
+        check_export_options(export_format, compression, tables)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    directory.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    for name, chunks in export_tables(export_format, compression, tables or None, batch_size):
+        size = 0
+        with open(directory / name, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+                size += len(chunk)
+        click.echo(f"Exported {name}, {size} bytes.")
+    click.echo(f"Export finished in {time.perf_counter() - start:.2f} s.")
+
+
+def register_commands(app: Flask) -> None:
+    """Register CLI commands.
+
+    Args:
+        app: Flask application.
+    """
+    app.cli.add_command(db_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(seed)
+    app.cli.add_command(export)
@@ -1,2 +1,3 @@
-from .db import db_session, get_engine
+from .db import db_session, get_engine, init_db, pool_status, db_settings
+from .cache import query_cache
 from .models import Student, Course, Group
@@ -0,0 +1,163 @@
+"""Module for asyncio engine and sessions of the async API.
+
+Async engine uses asyncio Postgres driver with the same pool options as the
+sync engine. Model methods are not duplicated for the async API: run_model()
+runs them with AsyncSession.run_sync(), where their db_session() gets sync
+facade of the async session. Every round trip then waits for the driver in
+the event loop instead of blocking the thread. Inside request all model
+methods share one async session, closed when the request is torn down.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Optional
+
+from quart import g, has_app_context
+from sqlalchemy import Row, Select, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from config import Config
+from app.db.cache import configure_cache
+from app.db.db import POOL_OPTIONS, bound_session, db_settings
+
+# Async engine is created lazily in the event loop which uses it.
+_async_engine: Optional[AsyncEngine] = None
+_async_engine_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_engine_options = {option: getattr(Config, key) for key, option in POOL_OPTIONS.items()}
+_async_url = make_url(Config.SQLALCHEMY_DATABASE_URI)
+_async_driver = {"drivername": Config.ASYNC_DATABASE_DRIVER}
+
+# Session factory shared by every async session of the process.
+async_session_factory = async_sessionmaker(autoflush=False, expire_on_commit=False)
+# Key of quart.g with async session of the request.
+ASYNC_SESSION_KEY = "async_session"
+
+
+def configure_async_engine(settings) -> None:
+    """Set database URL, driver and pool options for the async engine.
+
+    Args:
+        settings: Mapping with SQLALCHEMY_DATABASE_URI, ASYNC_DATABASE_DRIVER
+            and configuration keys from POOL_OPTIONS.
+    """
+    global _async_url
+    if "SQLALCHEMY_DATABASE_URI" in settings:
+        _async_url = make_url(settings["SQLALCHEMY_DATABASE_URI"])
+    _async_engine_options.update(
+        {option: settings[key] for key, option in POOL_OPTIONS.items() if key in settings})
+    if "ASYNC_DATABASE_DRIVER" in settings:
+        _async_driver["drivername"] = settings["ASYNC_DATABASE_DRIVER"]
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return async engine of the running event loop.
+
+    Connections of the driver belong to the event loop, so engine created
+    in another loop (e.g. by previous test) is dropped without closing them.
+
+    Returns:
+        AsyncEngine instance
+    """
+    global _async_engine, _async_engine_loop
+    loop = asyncio.get_running_loop()
+    if _async_engine is not None and _async_engine_loop is not loop:
+        _async_engine.sync_engine.dispose(close=False)
+        _async_engine = None
+    if _async_engine is None:
+        _async_engine = create_async_engine(_async_url.set(**_async_driver), **_async_engine_options)
+        _async_engine_loop = loop
+        async_session_factory.configure(bind=_async_engine)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close all connections of the async engine."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+def _call_with_session(session: Session, method: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    """Call model method which uses given session as its db_session()."""
+    token = bound_session.set(session)
+    try:
+        return method(*args, **kwargs)
+    finally:
+        bound_session.reset(token)
+
+
+def _request_session() -> Optional[AsyncSession]:
+    """Get async session of the current request, it is created on first use."""
+    if not has_app_context():
+        return None
+    session = g.get(ASYNC_SESSION_KEY)
+    if session is None:
+        session = async_session_factory()
+        setattr(g, ASYNC_SESSION_KEY, session)
+    return session
+
+
+async def close_request_session(exception=None) -> None:
+    """Close async session of the request and return its connection to the pool."""
+    session = g.pop(ASYNC_SESSION_KEY, None)
+    if session is not None:
+        await session.close()
+
+
+async def run_model(method: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run sync model method on async session.
+
+    Inside request the request session is used, otherwise new session
+    is created and closed when the method returns.
+
+    Args:
+        method: Model method, e.g. Student.get_students_page.
+        *args: Positional arguments of the method.
+        **kwargs: Keyword arguments of the method.
+
+    Returns:
+        Value returned by the method.
+    """
+    get_async_engine()
+    session = _request_session()
+    if session is not None:
+        return await session.run_sync(_call_with_session, method, args, kwargs)
+    async with async_session_factory() as session:
+        return await session.run_sync(_call_with_session, method, args, kwargs)
+
+
+async def stream_rows(query: Select, batch_size: int) -> AsyncIterator[list[Row]]:
+    """Fetch rows of the query from server side cursor in batches.
+
+    Rows are fetched on a session of their own, because streamed response
+    outlives the request session.
+
+    Args:
+        query: Select statement.
+        batch_size: Number of rows fetched at once.
+
+    Yields:
+        List of rows.
+    """
+    get_async_engine()
+    async with async_session_factory() as session:
+        connection = await session.connection()
+        result = await connection.stream(query.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            yield batch
+
+
+def init_async_db(app) -> None:
+    """Configure database layer from config of the async application.
+
+    Request session is closed on teardown and async engine is disposed
+    when the application stops serving.
+
+    Args:
+        app: Quart application.
+    """
+    configure_async_engine(app.config)
+    configure_cache(app.config)
+    db_settings.update({key: app.config[key] for key in db_settings if key in app.config})
+    app.teardown_appcontext(close_request_session)
+    app.after_serving(dispose_async_engine)
@@ -0,0 +1,62 @@
+"""Module for bulk insert helpers."""
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import Insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+@dataclass
+class BulkInsertResult:
+    """Result of bulk insert.
+
+    Attributes:
+        ids: Primary keys of inserted rows.
+        conflicts: Rows which were not inserted. Each conflict is a dictionary
+            with row index in the input, row value and reason.
+    """
+    ids: list = field(default_factory=list)
+    conflicts: list[dict] = field(default_factory=list)
+
+    def add_conflict(self, row: int, value, reason: str) -> None:
+        """Register row which was not inserted.
+
+        Args:
+            row: Index of the row in the input.
+            value: Row value.
+            reason: Why row was not inserted.
+        """
+        self.conflicts.append({"row": row, "value": value, "reason": reason})
+
+
+def chunks(rows: Iterable, size: int) -> Iterator[list]:
+    """Split rows to lists of given size.
+
+    Args:
+        rows: Any iterable, it is consumed lazily.
+        size: Max number of rows in a chunk.
+
+    Yields:
+        List of rows.
+    """
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def insert_ignore(session: Session, model) -> Insert:
+    """Create INSERT statement which skips rows violating unique constraints.
+
+    Args:
+        session: SQLAlchemy session, its dialect defines statement syntax.
+        model: Model class.
+
+    Returns:
+        INSERT ... ON CONFLICT DO NOTHING statement.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return postgresql.insert(model).on_conflict_do_nothing()
@@ -0,0 +1,290 @@
+"""Module for read-through cache of query results.
+
+Results are stored under versioned keys. Write methods bump version of
+changed namespace (single course roster or all group sizes) after commit,
+so stale entries are never read again and are evicted by LRU or TTL.
+Result loaded while concurrent write bumps version is stored under old
+version and is not read either. Inside unit of work of the request
+versions are bumped after the request is committed, and until then
+results of changed namespaces are loaded without cache. Callers which
+read version of the data from database (the one ETag is built from) add it
+to the key, so data changed outside of the process, which does not bump
+cache versions, is not read from cache either.
+
+Backends:
+    memory: bounded LRU cache with TTL, local to the process.
+    redis: cache shared by all processes, requires redis package.
+    null: caching is disabled.
+"""
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Optional
+
+from config import Config
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+MEMORY = "memory"
+REDIS = "redis"
+NULL = "null"
+# Configuration keys of the cache.
+CACHE_OPTIONS = ("CACHE_BACKEND", "CACHE_MAX_ENTRIES", "CACHE_TTL", "CACHE_REDIS_URL")
+
+# Namespaces of cached results.
+COURSE_NAMESPACE = "course:{}"
+GROUPS_NAMESPACE = "groups"
+# Key of cached result: namespace, its version and query arguments.
+RESULT_KEY = "{}:{}:{}"
+# Version in the key when version of the data in database is known.
+DATA_VERSION = "{}.{}"
+# Prefix of keys stored in shared backend.
+SHARED_PREFIX = "students:"
+REDIS_MISSING = "CACHE_BACKEND 'redis' requires redis package."
+UNKNOWN_BACKEND = "Unknown cache backend '{}'."
+
+
+class MemoryBackend:
+    """Bounded LRU cache with TTL, local to the process.
+
+    Versions are kept apart from cached results, so they are never evicted.
+    """
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get cached value or None when it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value, least recently used entry is evicted when cache is full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_version(self, namespace: str) -> int:
+        """Get current version of the namespace."""
+        return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace: str) -> None:
+        """Change version of the namespace, so its entries are not read anymore."""
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def clear(self) -> None:
+        """Delete all entries.
+
+        Versions are kept, so result loaded before clear is not read after it.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedBackend:
+    """Cache stored in Redis compatible server and shared by all processes.
+
+    Entries expire after TTL and server eviction policy limits memory.
+    Version which is missing, e.g. evicted by server, starts from current
+    time, so it does not match versions of entries stored before.
+    """
+    def __init__(self, client, ttl: float):
+        self.client = client
+        self.ttl = ttl
+        # Evictions are done by server and are not counted.
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get cached value or None when it is missing."""
+        data = self.client.get(SHARED_PREFIX + key)
+        return None if data is None else pickle.loads(data)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value with TTL."""
+        self.client.set(SHARED_PREFIX + key, pickle.dumps(value), ex=int(self.ttl))
+
+    def get_version(self, namespace: str) -> int:
+        """Get current version of the namespace."""
+        key = SHARED_PREFIX + namespace
+        version = self.client.get(key)
+        if version is None:
+            self.client.set(key, time.time_ns(), nx=True)
+            version = self.client.get(key)
+        return int(version)
+
+    def bump_version(self, namespace: str) -> None:
+        """Change version of the namespace, so its entries are not read anymore."""
+        key = SHARED_PREFIX + namespace
+        self.client.set(key, time.time_ns(), nx=True)
+        self.client.incr(key)
+
+    def clear(self) -> None:
+        """Delete all entries and versions."""
+        keys = list(self.client.scan_iter(SHARED_PREFIX + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class NullBackend:
+    """Backend which stores nothing."""
+    evictions = 0
+
+    def get(self, key: str) -> None:
+        """Always miss."""
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Do not store value."""
+
+    def get_version(self, namespace: str) -> int:
+        """Versions are not used."""
+        return 0
+
+    def bump_version(self, namespace: str) -> None:
+        """Versions are not used."""
+
+    def clear(self) -> None:
+        """Nothing to delete."""
+
+
+class QueryCache:
+    """Read-through cache of query results with hit and miss counters."""
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        # Returns set, which collects namespaces invalidated once the
+        # transaction of the caller is committed, or None when changes are
+        # committed already. Set by the database layer.
+        self.pending_invalidations: Callable[[], Optional[set[str]]] = lambda: None
+
+    def get_or_load(self, namespace: str, arguments: tuple, loader: Callable[[], Any],
+                    data_version: Optional[int] = None) -> Any:
+        """Get cached result or load it and store in cache.
+
+        Args:
+            namespace: Namespace which is invalidated by writes.
+            arguments: Query arguments which make key unique in the namespace.
+            loader: Function which runs the query.
+            data_version: Version of the data read from database before
+                the query, result is cached only for this version.
+
+        Returns:
+            Query result.
+        """
+        pending = self.pending_invalidations()
+        if pending and namespace in pending:
+            # Result contains uncommitted changes of the caller.
+            return loader()
+        version = self.backend.get_version(namespace)
+        if data_version is not None:
+            version = DATA_VERSION.format(version, data_version)
+        key = RESULT_KEY.format(namespace, version, repr(arguments))
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None:
+            value = loader()
+            self.backend.set(key, value)
+        return value
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Make all cached results of the namespaces stale.
+
+        Must be called after changes are committed, or inside unit of work,
+        which invalidates them after its commit.
+        """
+        pending = self.pending_invalidations()
+        if pending is not None:
+            pending.update(namespaces)
+            return
+        self.invalidate_committed(*namespaces)
+
+    def invalidate_committed(self, *namespaces: str) -> None:
+        """Make all cached results of the namespaces stale right away."""
+        for namespace in namespaces:
+            self.backend.bump_version(namespace)
+
+    def clear(self) -> None:
+        """Delete all cached results."""
+        self.backend.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Get cache usage.
+
+        Returns:
+            Dictionary with number of hits, misses and evictions.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.backend.evictions}
+
+
+def course_namespace(course_name: str) -> str:
+    """Namespace of students of the course."""
+    return COURSE_NAMESPACE.format(course_name)
+
+
+def create_backend(settings):
+    """Create cache backend from configuration.
+
+    Args:
+        settings: Mapping with configuration keys from CACHE_OPTIONS.
+
+    Returns:
+        Cache backend.
+    """
+    backend = settings["CACHE_BACKEND"]
+    if backend == MEMORY:
+        return MemoryBackend(settings["CACHE_MAX_ENTRIES"], settings["CACHE_TTL"])
+    if backend == REDIS:
+        if redis is None:
+            raise RuntimeError(REDIS_MISSING)
+        return SharedBackend(redis.Redis.from_url(settings["CACHE_REDIS_URL"]), settings["CACHE_TTL"])
+    if backend == NULL:
+        return NullBackend()
+    raise ValueError(UNKNOWN_BACKEND.format(backend))
+
+
+# Cache options of the process, defaults are taken from Config.
+_cache_options = {key: getattr(Config, key) for key in CACHE_OPTIONS}
+
+# Cache shared by model methods of the process.
+query_cache = QueryCache(create_backend(_cache_options))
+
+
+def configure_cache(settings) -> None:
+    """Set cache backend from configuration.
+
+    Backend is replaced only when options changed, so cached results are kept.
+
+    Args:
+        settings: Mapping with configuration keys from CACHE_OPTIONS.
+    """
+    options = {key: settings[key] for key in CACHE_OPTIONS if key in settings}
+    if all(_cache_options[key] == value for key, value in options.items()):
+        return
+    _cache_options.update(options)
+    query_cache.backend = create_backend(_cache_options)
@@ -0,0 +1,90 @@
+"""Module for materialized per-group student counters.
+
+groups.student_count is kept in sync with students table by statement level
+triggers, so group size queries do not scan students table. SQLite gets
+row level triggers instead.
+"""
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import Engine, select, update, func, text
+
+from app.db import get_engine, db_session
+from app.db.cache import query_cache, GROUPS_NAMESPACE
+from app.db.models import Student, Group
+
+GROUP_COUNTERS_SQL = Path(__file__).parent / "sql" / "group_counters.sql"
+SQLITE_GROUP_COUNTERS_SQL = Path(__file__).parent / "sql" / "sqlite_group_counters.sql"
+# Triggers of students table created by both files.
+GROUP_COUNTER_TRIGGERS = {"students_insert_group_count", "students_update_group_count",
+                          "students_delete_group_count"}
+POSTGRES_TRIGGERS = "SELECT tgname FROM pg_trigger WHERE tgrelid = CAST('students' AS regclass)"
+SQLITE_TRIGGERS = "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'students'"
+UNSUPPORTED_DIALECT = "Group counters are not supported on {}, only on postgresql and sqlite."
+
+
+def install_group_counters() -> int:
+    """Install student_count column, its index and triggers.
+
+    Counters are rebuilt after installation.
+
+    Returns:
+        Number of groups which counter was corrected.
+
+    Raises:
+        RuntimeError: If database is neither Postgres nor SQLite.
+    """
+    engine = get_engine()
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.exec_driver_sql(GROUP_COUNTERS_SQL.read_text())
+    elif engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            connection.connection.driver_connection.executescript(SQLITE_GROUP_COUNTERS_SQL.read_text())
+    else:
+        raise RuntimeError(UNSUPPORTED_DIALECT.format(engine.dialect.name))
+    return reconcile_group_counters()
+
+
+def group_counters_installed(engine: Optional[Engine] = None) -> bool:
+    """Check whether all triggers maintaining groups.student_count exist.
+
+    Args:
+        engine: Engine, engine of the process by default.
+
+    Returns:
+        True when every trigger is installed.
+    """
+    engine = engine or get_engine()
+    query = {"postgresql": POSTGRES_TRIGGERS, "sqlite": SQLITE_TRIGGERS}.get(engine.dialect.name)
+    if query is None:
+        return False
+    with engine.connect() as connection:
+        return GROUP_COUNTER_TRIGGERS <= set(connection.scalars(text(query)))
+
+
+def reconcile_group_counters() -> int:
+    """Rebuild student counters of all groups from students table.
+
+    Students table is locked against writes while counters are rebuilt,
+    so concurrent trigger updates are not lost. SQLite has single writer,
+    so no lock is needed there.
+
+    Returns:
+        Number of groups which counter was corrected.
+    """
+    count = (select(func.count(Student.id))
+             .where(Student.group_id == Group.id)
+             .scalar_subquery())
+    statement = (update(Group)
+                 .where(Group.student_count != count)
+                 .values(student_count=count)
+                 .execution_options(synchronize_session=False))
+    with db_session() as session:
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(text("LOCK TABLE students IN SHARE MODE"))
+        corrected = session.execute(statement).rowcount
+        session.commit()
+    if corrected:
+        query_cache.invalidate(GROUPS_NAMESPACE)
+    return corrected
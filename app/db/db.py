@@ -1,26 +1,233 @@
 """Module for Session initialization."""
+import os
 from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
 
-from sqlalchemy import create_engine, Engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-from config import url_object
+from flask import Flask, Response, has_app_context, has_request_context, current_app
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, event, make_url, Engine, URL
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy.pool import QueuePool, StaticPool
+from config import Config
+from app.db.cache import configure_cache, query_cache
+
+# Maps configuration keys to create_engine() pool arguments.
+POOL_OPTIONS = {
+    "SQLALCHEMY_POOL_SIZE": "pool_size",
+    "SQLALCHEMY_MAX_OVERFLOW": "max_overflow",
+    "SQLALCHEMY_POOL_PRE_PING": "pool_pre_ping",
+    "SQLALCHEMY_POOL_RECYCLE": "pool_recycle",
+    "SQLALCHEMY_POOL_TIMEOUT": "pool_timeout",
+}
+# Set on every SQLite connection. Foreign keys enforce ON DELETE actions of
+# the models, WAL lets readers work while writer commits and LIKE is case
+# sensitive as on Postgres.
+SQLITE_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA case_sensitive_like = ON",
+)
+# Keys of request session info. Unit of work of the request has flushed
+# changes, was rolled back by failed model call, and namespaces of query
+# cache which are invalidated once it is committed.
+WRITES_KEY = "writes"
+ROLLBACK_ONLY_KEY = "rollback_only"
+INVALIDATIONS_KEY = "invalidations"
+CHANGES_LOST_MESSAGE = "Changes of the request were rolled back by failed model call, use savepoint()."
+POOL_STATUS_MESSAGE = ("Pool status: size={size}, checked_in={checked_in}, "
+                       "checked_out={checked_out}, overflow={overflow}")
+
+# Engine is created lazily, once per process.
+_engine: Optional[Engine] = None
+_engine_pid: Optional[int] = None
+_engine_url: URL = make_url(Config.SQLALCHEMY_DATABASE_URI)
+_engine_options = {option: getattr(Config, key) for key, option in POOL_OPTIONS.items()}
+
+# Application settings used by database layer outside of application context.
+db_settings = {"GROUP_STUDENT_COUNTER": Config.GROUP_STUDENT_COUNTER,
+               "SQL_SLOW_QUERY_MS": Config.SQL_SLOW_QUERY_MS,
+               "RETRY_TRIES": Config.RETRY_TRIES,
+               "RETRY_BASE_DELAY": Config.RETRY_BASE_DELAY,
+               "RETRY_MAX_DELAY": Config.RETRY_MAX_DELAY,
+               "RETRY_DEADLINE": Config.RETRY_DEADLINE,
+               "RETRY_BREAKER_THRESHOLD": Config.RETRY_BREAKER_THRESHOLD,
+               "RETRY_BREAKER_RESET": Config.RETRY_BREAKER_RESET,
+               "SQLALCHEMY_UNIT_OF_WORK": Config.SQLALCHEMY_UNIT_OF_WORK}
+
+# Session factory shared by every session of the process.
+session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _app_context_id() -> int:
+    """Scope function which binds session to the current application context."""
+    return id(app_ctx._get_current_object()) if has_app_context() else 0
+
+
+# Session bound to the Flask application context (one per request).
+request_session = scoped_session(session_factory, scopefunc=_app_context_id)
+
+# Session which model methods use instead of their own, set by the async API
+# while it runs model method with AsyncSession.run_sync().
+bound_session: ContextVar[Optional[Session]] = ContextVar("bound_session", default=None)
+
+
+def configure_engine(settings) -> None:
+    """Set database URL and pool options for the engine.
+
+    Existing engine is disposed, so next call of get_engine()
+    creates new engine with given options.
+
+    Args:
+        settings: Mapping with SQLALCHEMY_DATABASE_URI and configuration keys from POOL_OPTIONS.
+    """
+    global _engine, _engine_url
+    options = {option: settings[key] for key, option in POOL_OPTIONS.items() if key in settings}
+    url = make_url(settings.get("SQLALCHEMY_DATABASE_URI", _engine_url))
+    if url == _engine_url and options.items() <= _engine_options.items():
+        return
+    _engine_url = url
+    _engine_options.update(options)
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
 
 
 def get_engine() -> Engine:
-    """Create and return engine
+    """Return engine of the current process.
+
+    Engine and its connection pool are created on first call. When process
+    was forked (e.g. gunicorn with preload), inherited pool is dropped
+    without closing parent connections and new engine is created.
+
+    Returns:
+        Engine instance
+    """
+    global _engine, _engine_pid
+    if _engine is not None and _engine_pid != os.getpid():
+        _engine.dispose(close=False)
+        _engine = None
+    if _engine is None:
+        _engine = _create_engine(_engine_url)
+        _engine_pid = os.getpid()
+        session_factory.configure(bind=_engine)
+    return _engine
+
+
+def is_memory_database(url: URL) -> bool:
+    """Whether URL is SQLite database which lives in memory of the process."""
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory")
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record) -> None:
+    """Set pragmas of new SQLite connection.
+
+    Driver does not begin transactions itself, _begin_sqlite_transaction()
+    does it, otherwise SAVEPOINT and transactional DDL do not work.
+    """
+    dbapi_connection.isolation_level = None
+    for pragma in SQLITE_PRAGMAS:
+        dbapi_connection.execute(pragma)
+
+
+def _begin_sqlite_transaction(connection) -> None:
+    """Begin transaction on SQLite connection, sent past SQL instrumentation."""
+    connection.connection.driver_connection.execute("BEGIN")
+
+
+def _create_engine(url: URL) -> Engine:
+    """Create engine for database URL.
+
+    In-memory SQLite database exists while its connection is open, so
+    single connection is kept by StaticPool and shared by all threads.
+    Pool options do not apply to it.
+
+    Args:
+        url: Database URL.
 
     Returns:
         Engine instance
     """
-    return create_engine(url_object)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url, **_engine_options)
+    if is_memory_database(url):
+        engine = create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(url, **_engine_options)
+    event.listen(engine, "connect", _configure_sqlite_connection)
+    event.listen(engine, "begin", _begin_sqlite_transaction)
+    return engine
+
+
+def pool_status() -> dict[str, int]:
+    """Get connection pool usage of the current process.
+
+    Pool of in-memory SQLite database has single shared connection and reports zeros.
+
+    Returns:
+        Dictionary with pool size, checked in, checked out and overflow connections.
+    """
+    pool = get_engine().pool
+    if not isinstance(pool, QueuePool):
+        return dict.fromkeys(("size", "checked_in", "checked_out", "overflow"), 0)
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow()
+    }
 
 
 @contextmanager
 def db_session():
-    """Creates context manager with SQLAlchemy session."""
-    engine = get_engine()
-    session_generator = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
-    session = session_generator()
+    """Creates context manager with SQLAlchemy session.
+
+    Session bound with bound_session is used as is and is closed by its
+    owner. Inside application context the request session is used, and it
+    is closed when application context is torn down. Otherwise, new session
+    is created and closed on exit.
+
+    Inside request the request session is unit of work (see commit()).
+    Failed model call rolls it back, unless the call runs in savepoint().
+    """
+    session = bound_session.get()
+    if session is not None:
+        try:
+            yield session
+        except:
+            session.rollback()
+            raise
+        return
+
+    get_engine()
+    if has_app_context():
+        session = request_session()
+        try:
+            yield session
+        except:
+            if not session.in_nested_transaction():
+                # Changes of the request are lost, so the rest of them must not be committed.
+                if session.info.pop(WRITES_KEY, False):
+                    session.info[ROLLBACK_ONLY_KEY] = True
+                session.rollback()
+            raise
+        return
+
+    with standalone_session() as session:
+        yield session
+
+
+@contextmanager
+def standalone_session():
+    """Creates context manager with new SQLAlchemy session closed on exit.
+
+    Session is not bound to the application context, so generators of
+    streamed responses, which outlive the request session, use it.
+    """
+    get_engine()
+    session = session_factory()
     try:
         yield session
     except:
@@ -28,3 +235,116 @@ def db_session():
         raise
     finally:
         session.close()
+
+
+def in_unit_of_work() -> bool:
+    """Whether model calls share transaction of the current request."""
+    return (db_settings["SQLALCHEMY_UNIT_OF_WORK"] and bound_session.get() is None
+            and has_request_context())
+
+
+def commit(session: Session) -> None:
+    """Commit changes of the model method.
+
+    Inside unit of work of the request changes are flushed and committed
+    once with the request by commit_unit_of_work().
+
+    Args:
+        session: Session from db_session().
+    """
+    if in_unit_of_work():
+        session.flush()
+        session.info[WRITES_KEY] = True
+    else:
+        session.commit()
+
+
+@contextmanager
+def savepoint():
+    """Run model calls in savepoint of the request transaction.
+
+    When they fail, only their changes are rolled back and the request may
+    go on. Outside of unit of work every model call has own transaction,
+    so nothing is done.
+    """
+    if not in_unit_of_work():
+        yield
+        return
+    get_engine()
+    with request_session().begin_nested():
+        yield
+
+
+def pending_invalidations() -> Optional[set[str]]:
+    """Get cache namespaces invalidated once the request is committed.
+
+    Returns:
+        Set of namespaces inside unit of work, otherwise None.
+    """
+    if not in_unit_of_work():
+        return None
+    return request_session().info.setdefault(INVALIDATIONS_KEY, set())
+
+
+query_cache.pending_invalidations = pending_invalidations
+
+
+def request_rolled_back() -> bool:
+    """Whether changes of the request were rolled back by failed model call."""
+    return in_unit_of_work() and request_session().info.get(ROLLBACK_ONLY_KEY, False)
+
+
+def commit_unit_of_work(success: bool = True) -> None:
+    """Finish unit of work of the request.
+
+    Changes are committed and query cache of changed data is invalidated,
+    or changes are rolled back when request failed.
+
+    Args:
+        success: Whether request succeeded.
+
+    Raises:
+        RuntimeError: When request succeeded, but its changes were rolled
+            back by failed model call.
+    """
+    if not request_session.registry.has():
+        return
+    session = request_session()
+    rolled_back = session.info.pop(ROLLBACK_ONLY_KEY, False)
+    writes = session.info.pop(WRITES_KEY, False)
+    namespaces = session.info.pop(INVALIDATIONS_KEY, set())
+    if not success or rolled_back:
+        session.rollback()
+        if success:
+            raise RuntimeError(CHANGES_LOST_MESSAGE)
+        return
+    if writes:
+        session.commit()
+    query_cache.invalidate_committed(*namespaces)
+
+
+def _commit_request(response: Response) -> Response:
+    """Commit unit of work of the request unless its response is an error."""
+    if in_unit_of_work():
+        commit_unit_of_work(response.status_code < 400)
+    return response
+
+
+def remove_session(exception=None) -> None:
+    """Close request session and return its connection to the pool."""
+    request_session.remove()
+    if _engine is not None:
+        current_app.logger.debug(POOL_STATUS_MESSAGE.format(**pool_status()))
+
+
+def init_db(app: Flask) -> None:
+    """Configure database layer from application config and register commit and teardown of the request session.
+
+    Args:
+        app: Flask application.
+    """
+    configure_engine(app.config)
+    configure_cache(app.config)
+    db_settings.update({key: app.config[key] for key in db_settings if key in app.config})
+    app.after_request(_commit_request)
+    app.teardown_appcontext(remove_session)
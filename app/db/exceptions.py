@@ -0,0 +1,46 @@
+"""Module for database layer exceptions."""
+import math
+
+from sqlalchemy.exc import NoResultFound
+from werkzeug.exceptions import ServiceUnavailable
+
+from app.api.constants import DATABASE_UNAVAILABLE
+
+
+class CoursesNotFound(NoResultFound):
+    """Raised when some of requested courses do not exist."""
+
+    def __init__(self, course_names: list[str]):
+        """Initialize exception.
+
+        Args:
+            course_names: Names of courses which were not found.
+        """
+        super().__init__(course_names)
+        self.course_names = course_names
+
+
+class StudentsNotFound(NoResultFound):
+    """Raised when some of requested students do not exist."""
+
+    def __init__(self, student_ids: list[int]):
+        """Initialize exception.
+
+        Args:
+            student_ids: IDs of students which were not found.
+        """
+        super().__init__(student_ids)
+        self.student_ids = student_ids
+
+
+class DatabaseUnavailable(ServiceUnavailable):
+    """Raised when database is down, answered with 503 Service Unavailable."""
+    description = DATABASE_UNAVAILABLE
+
+    def __init__(self, retry_after: float):
+        """Initialize exception.
+
+        Args:
+            retry_after: Seconds after which client may try again.
+        """
+        super().__init__(retry_after=math.ceil(retry_after))
@@ -0,0 +1,451 @@
+"""Module for export of groups, courses, students and enrollments.
+
+All tables are read in one REPEATABLE READ read only transaction, so the
+exported files are consistent with each other while the data keeps
+changing. Rows are streamed from the database in batches and encoded on the
+fly, so memory does not grow with table size. On Postgres CSV and NDJSON
+are produced by COPY TO STDOUT, Parquet and other databases read rows from
+a cursor in batches. Parquet needs pyarrow and zstd compression needs
+zstandard.
+"""
+import csv
+import io
+import queue
+import threading
+import zipfile
+import zlib
+from contextlib import closing, contextmanager
+from typing import Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import BigInteger, Column, Connection, Integer, Select, select
+
+from app.api.helper_functions import json_dumps
+from app.db.db import get_engine
+from app.db.models import Student, Course, Group, StudentCourse
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+CSV = "csv"
+NDJSON = "ndjson"
+PARQUET = "parquet"
+NO_COMPRESSION = "none"
+GZIP = "gzip"
+ZSTD = "zstd"
+EXPORT_FORMATS = (CSV, NDJSON, PARQUET)
+EXPORT_COMPRESSIONS = (NO_COMPRESSION, GZIP, ZSTD)
+# Exported columns of every table, tables are in order of their dependencies.
+EXPORT_TABLES = {
+    "groups": (Group.id,),
+    "courses": (Course.id, Course.course_name, Course.description),
+    "students": (Student.id, Student.first_name, Student.last_name, Student.group_id),
+    "student_course": (StudentCourse.student_id, StudentCourse.course_id),
+}
+FILE_EXTENSIONS = {CSV: ".csv", NDJSON: ".ndjson", PARQUET: ".parquet"}
+COMPRESSION_EXTENSIONS = {NO_COMPRESSION: "", GZIP: ".gz", ZSTD: ".zst"}
+# Number of rows fetched from cursor at once, one Parquet row group.
+EXPORT_BATCH_SIZE = 50000
+# Bytes of CSV parsed into one Parquet row group.
+PARQUET_CSV_BLOCK_SIZE = 4 * 1024 * 1024
+# Name of server side cursor.
+EXPORT_CURSOR = "export"
+# Bytes of COPY output collected into one chunk.
+COPY_CHUNK_SIZE = 256 * 1024
+# Number of chunks COPY may get ahead of the consumer.
+COPY_QUEUE_SIZE = 4
+
+FORMAT_NOT_SUPPORTED = "Format '{}' is not supported, use one of: {}."
+COMPRESSION_NOT_SUPPORTED = "Compression '{}' is not supported, use one of: {}."
+TABLE_NOT_SUPPORTED = "Table '{}' can not be exported, use one of: {}."
+PARQUET_NOT_INSTALLED = "Parquet export needs pyarrow, install it with pip install .[export]."
+ZSTD_NOT_INSTALLED = "Zstandard compression needs zstandard, install it with pip install .[export]."
+
+
+class _ChunkWriter:
+    """Write only file which collects written bytes until they are taken."""
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        """Return bytes written since last call."""
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read only file which reads bytes from iterator of chunks."""
+    def __init__(self, chunks: Iterator[bytes]):
+        super().__init__()
+        self.chunks = chunks
+        self.rest = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.rest:
+            self.rest = next(self.chunks, b"")
+            if not self.rest:
+                return 0
+        size = min(len(buffer), len(self.rest))
+        buffer[:size] = self.rest[:size]
+        self.rest = self.rest[size:]
+        return size
+
+    def close(self) -> None:
+        self.chunks.close()
+        super().close()
+
+
+class _CopyCancelled(Exception):
+    """Consumer stopped reading output of COPY."""
+
+
+class _QueueWriter:
+    """Write only file which passes COPY output to the consumer in chunks.
+
+    Queue is bounded, so COPY waits while the consumer is behind.
+    """
+    def __init__(self, chunks: queue.Queue):
+        self.queue = chunks
+        self.buffer: list[bytes] = []
+        self.size = 0
+        self.cancelled = threading.Event()
+
+    def write(self, data: bytes) -> None:
+        self.buffer.append(data)
+        self.size += len(data)
+        if self.size >= COPY_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.put(b"".join(self.buffer))
+            self.buffer.clear()
+            self.size = 0
+
+    def put(self, item) -> None:
+        """Put item to the queue, give up when the consumer is gone."""
+        while True:
+            if self.cancelled.is_set():
+                raise _CopyCancelled
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def check_export_options(export_format: str, compression: str, tables: Iterable[str]) -> None:
+    """Check that export with given options is possible.
+
+    Raises:
+        ValueError: When format, compression or table is unknown or its package is not installed.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(FORMAT_NOT_SUPPORTED.format(export_format, ", ".join(EXPORT_FORMATS)))
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ValueError(COMPRESSION_NOT_SUPPORTED.format(compression, ", ".join(EXPORT_COMPRESSIONS)))
+    for table in tables:
+        if table not in EXPORT_TABLES:
+            raise ValueError(TABLE_NOT_SUPPORTED.format(table, ", ".join(EXPORT_TABLES)))
+    if export_format == PARQUET and pyarrow is None:
+        raise ValueError(PARQUET_NOT_INSTALLED)
+    if compression == ZSTD and zstandard is None:
+        raise ValueError(ZSTD_NOT_INSTALLED)
+
+
+def export_file_name(table: str, export_format: str, compression: str) -> str:
+    """Get file name of exported table, e.g. students.csv.gz.
+
+    Parquet is compressed inside the file, so its name has no compression extension.
+    """
+    extension = "" if export_format == PARQUET else COMPRESSION_EXTENSIONS[compression]
+    return f"{table}{FILE_EXTENSIONS[export_format]}{extension}"
+
+
+@contextmanager
+def snapshot() -> Iterator[Connection]:
+    """Open read only transaction which sees the same data in every statement.
+
+    Yields:
+        Connection in REPEATABLE READ transaction on Postgres, in default transaction elsewhere.
+    """
+    with get_engine().connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        with connection.begin():
+            yield connection
+
+
+def _query(columns: Sequence[Column]) -> Select:
+    """Select columns of the table ordered by its primary key."""
+    return select(*columns).order_by(*columns[0].table.primary_key.columns)
+
+
+def _row_batches(connection: Connection, query: Select, batch_size: int) -> Iterator[list[tuple]]:
+    """Fetch rows of the query in batches.
+
+    DBAPI cursor is used directly, building Row objects would take longer
+    than fetching. On Postgres the cursor is a server side cursor.
+    """
+    if connection.dialect.name == "postgresql":
+        cursor = connection.connection.cursor(EXPORT_CURSOR)
+    else:
+        cursor = connection.connection.cursor()
+    try:
+        cursor.execute(str(query.compile(dialect=connection.dialect)))
+        while rows := cursor.fetchmany(batch_size):
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _copy(connection: Connection, statement: str) -> Iterator[bytes]:
+    """Stream output of COPY TO STDOUT.
+
+    psycopg2 pushes COPY output to a file, so COPY runs in a thread which
+    hands chunks over through bounded queue. When the consumer stops early,
+    COPY is aborted and the connection is invalidated, because it is left
+    in the middle of COPY.
+    """
+    chunks = queue.Queue(COPY_QUEUE_SIZE)
+    writer = _QueueWriter(chunks)
+    cursor = connection.connection.cursor()
+
+    def copy() -> None:
+        try:
+            cursor.copy_expert(statement, writer)
+            writer.flush()
+            writer.put(None)
+        except _CopyCancelled:
+            pass
+        except Exception as error:
+            try:
+                writer.put(error)
+            except _CopyCancelled:
+                pass
+
+    thread = threading.Thread(target=copy, daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while (chunk := chunks.get()) is not None:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+        finished = True
+    finally:
+        writer.cancelled.set()
+        thread.join()
+        if not finished:
+            connection.invalidate()
+
+
+def _copy_csv(connection: Connection, query: Select) -> Iterator[bytes]:
+    """Stream result of the query as CSV with header."""
+    return _copy(connection, f"COPY ({query.compile(dialect=connection.dialect)}) TO STDOUT WITH (FORMAT csv, HEADER)")
+
+
+def _copy_ndjson(connection: Connection, query: Select) -> Iterator[bytes]:
+    """Stream result of the query as newline delimited JSON objects.
+
+    Rows are converted to JSON by Postgres. Quote and delimiter of CSV
+    format are control characters, which JSON text never contains, so
+    JSON is copied without quoting or escaping.
+    """
+    return _copy(connection, f"COPY (SELECT row_to_json(rows) FROM ({query.compile(dialect=connection.dialect)}) "
+                             f"AS rows) TO STDOUT WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')")
+
+
+def _encode_csv(columns: Sequence[Column], batches: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+    """Encode rows as CSV with header, NULL is written as empty value like COPY does."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([column.name for column in columns])
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _encode_ndjson(columns: Sequence[Column], batches: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+    """Encode rows as newline delimited JSON objects."""
+    names = [column.name for column in columns]
+    for rows in batches:
+        yield b"".join(json_dumps(dict(zip(names, row))) + b"\n" for row in rows)
+
+
+def _arrow_type(column: Column):
+    """Get Arrow type of the column."""
+    if isinstance(column.type, BigInteger):
+        return pyarrow.int64()
+    if isinstance(column.type, Integer):
+        return pyarrow.int32()
+    return pyarrow.string()
+
+
+def _arrow_schema(columns: Sequence[Column]):
+    """Get Arrow schema of the columns."""
+    return pyarrow.schema([pyarrow.field(column.name, _arrow_type(column), column.nullable)
+                           for column in columns])
+
+
+def _arrow_batches(schema, batches: Iterable[Sequence[tuple]]) -> Iterator:
+    """Convert batches of rows to Arrow record batches."""
+    for rows in batches:
+        values = list(zip(*rows))
+        yield pyarrow.record_batch(
+            [pyarrow.array(value, field.type) for value, field in zip(values, schema)], schema=schema)
+
+
+def _arrow_batches_from_csv(schema, chunks: Iterator[bytes]) -> Iterator:
+    """Parse CSV with header to Arrow record batches.
+
+    Unquoted empty value is NULL and quoted one is empty string, as COPY writes them.
+    """
+    reader = pyarrow.csv.open_csv(
+        _ChunkReader(chunks),
+        read_options=pyarrow.csv.ReadOptions(block_size=PARQUET_CSV_BLOCK_SIZE, use_threads=False),
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types=schema, strings_can_be_null=True, quoted_strings_can_be_null=False))
+    for batch in reader:
+        yield batch.cast(schema)
+
+
+def _encode_parquet(schema, batches: Iterable, compression: str) -> Iterator[bytes]:
+    """Write Arrow record batches as Parquet file, every batch is one row group."""
+    sink = _ChunkWriter()
+    with pyarrow.parquet.ParquetWriter(sink, schema, compression=compression) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def _compress(chunks: Iterator[bytes], compression: str) -> Iterator[bytes]:
+    """Compress stream of chunks with gzip or zstd."""
+    if compression == NO_COMPRESSION:
+        yield from chunks
+        return
+    if compression == GZIP:
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    else:
+        compressor = zstandard.ZstdCompressor().compressobj()
+    with closing(chunks):
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def _export_table(connection: Connection, table: str, export_format: str, compression: str,
+                  batch_size: int) -> Iterator[bytes]:
+    """Stream one table in given format and compression."""
+    columns = EXPORT_TABLES[table]
+    query = _query(columns)
+    if export_format == PARQUET:
+        schema = _arrow_schema(columns)
+        if connection.dialect.name == "postgresql":
+            batches = _arrow_batches_from_csv(schema, _copy_csv(connection, query))
+        else:
+            batches = _arrow_batches(schema, _row_batches(connection, query, batch_size))
+        return _encode_parquet(schema, batches, compression)
+    if connection.dialect.name == "postgresql":
+        chunks = (_copy_csv if export_format == CSV else _copy_ndjson)(connection, query)
+    elif export_format == CSV:
+        chunks = _encode_csv(columns, _row_batches(connection, query, batch_size))
+    else:
+        chunks = _encode_ndjson(columns, _row_batches(connection, query, batch_size))
+    return _compress(chunks, compression)
+
+
+def export_tables(export_format: str = CSV, compression: str = NO_COMPRESSION,
+                  tables: Optional[Iterable[str]] = None,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple[str, Iterator[bytes]]]:
+    """Export tables from one snapshot of the database.
+
+    Content of every file should be read before the next file is requested.
+
+    Args:
+        export_format: One of EXPORT_FORMATS.
+        compression: One of EXPORT_COMPRESSIONS, Parquet uses it for its pages.
+        tables: Names of exported tables, all tables from EXPORT_TABLES by default.
+        batch_size: Number of rows fetched at once.
+
+    Yields:
+        File name and iterator of its content.
+
+    Raises:
+        ValueError: When options are not supported.
+    """
+    tables = list(EXPORT_TABLES) if tables is None else list(tables)
+    check_export_options(export_format, compression, tables)
+    tables = [table for table in EXPORT_TABLES if table in tables]
+    with snapshot() as connection:
+        for table in tables:
+            chunks = _export_table(connection, table, export_format, compression, batch_size)
+            try:
+                yield export_file_name(table, export_format, compression), chunks
+            finally:
+                # Stop reading the table before the transaction ends.
+                chunks.close()
+
+
+def export_archive(export_format: str = CSV, compression: str = NO_COMPRESSION,
+                   tables: Optional[Iterable[str]] = None,
+                   batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """Stream ZIP archive with exported tables.
+
+    Files are already compressed, so they are stored in the archive as is.
+    Archive is written with data descriptors, so no seeking is needed and
+    sizes of the files need not be known in advance.
+
+    Args:
+        export_format: One of EXPORT_FORMATS.
+        compression: One of EXPORT_COMPRESSIONS.
+        tables: Names of exported tables, all tables by default.
+        batch_size: Number of rows fetched at once.
+
+    Yields:
+        Chunks of the archive.
+    """
+    sink = _ChunkWriter()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for name, chunks in export_tables(export_format, compression, tables, batch_size):
+            with archive.open(name, "w", force_zip64=True) as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    if sink.chunks:
+                        yield sink.take()
+    yield sink.take()
@@ -0,0 +1,142 @@
+"""Module for per-request SQL instrumentation.
+
+Every statement executed on any engine is counted and timed. Inside Flask
+request statistics are accumulated in flask.g and returned in Server-Timing
+and X-DB-Queries response headers. Statements slower than
+SQL_SLOW_QUERY_MS are logged with shapes of their parameters, never with
+values. Request which runs more statements than its query budget is
+logged or, with SQL_ENFORCE_QUERY_BUDGET, fails.
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from flask import Flask, Response, current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import Engine, event
+
+from app.db.db import db_settings
+
+# Keys of flask.g and connection info.
+STATS_KEY = "sql_stats"
+REQUEST_START_KEY = "request_start"
+STATEMENT_START_KEY = "statement_start"
+
+DB_QUERIES_HEADER = "X-DB-Queries"
+SERVER_TIMING_HEADER = "Server-Timing"
+SERVER_TIMING = 'db;dur={:.2f};desc="{} queries", app;dur={:.2f}'
+SLOW_QUERY_MESSAGE = "Slow query {:.2f} ms: {} parameters: {}"
+QUERY_BUDGET_MESSAGE = "{} {} ran {} queries, budget is {}."
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when request runs more statements than its query budget."""
+
+
+@dataclass
+class QueryStats:
+    """Statements executed during one request.
+
+    Attributes:
+        count: Number of statements.
+        duration: Time spent in database, in seconds.
+    """
+    count: int = 0
+    duration: float = 0.0
+
+
+def parameter_shape(parameters) -> str:
+    """Describe parameters of the statement without their values.
+
+    Example:
+        {'id_1': 'int', 'param_1': 'str'}, 3 x {'student_id': 'int'}
+
+    Args:
+        parameters: Parameters passed to DBAPI cursor.
+
+    Returns:
+        Parameter names and types.
+    """
+    if isinstance(parameters, dict):
+        return repr({name: type(value).__name__ for name, value in parameters.items()})
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, (list, tuple)):
+        return repr([type(value).__name__ for value in parameters])
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Remember start time of the statement."""
+    conn.info[STATEMENT_START_KEY] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Count statement and log it when it is slow."""
+    duration = time.perf_counter() - conn.info[STATEMENT_START_KEY]
+    if has_request_context():
+        stats = g.setdefault(STATS_KEY, QueryStats())
+        stats.count += 1
+        stats.duration += duration
+    threshold = db_settings["SQL_SLOW_QUERY_MS"]
+    if threshold is not None and duration * 1000 >= threshold:
+        (current_app.logger if has_app_context() else logger).warning(
+            SLOW_QUERY_MESSAGE.format(duration * 1000, statement, parameter_shape(parameters)))
+
+
+def request_stats() -> QueryStats:
+    """Get statements executed so far during the current request.
+
+    Returns:
+        Query statistics.
+    """
+    return g.get(STATS_KEY) or QueryStats()
+
+
+def _start_request() -> None:
+    """Remember start time of the request."""
+    g.setdefault(REQUEST_START_KEY, time.perf_counter())
+
+
+def _add_headers(response: Response) -> Response:
+    """Add query count and timing headers and check query budget.
+
+    Statements of streamed body run after headers are sent, so they are
+    not counted.
+    """
+    stats = request_stats()
+    elapsed = time.perf_counter() - g.get(REQUEST_START_KEY, time.perf_counter())
+    response.headers[DB_QUERIES_HEADER] = str(stats.count)
+    response.headers.add(SERVER_TIMING_HEADER,
+                         SERVER_TIMING.format(stats.duration * 1000, stats.count, elapsed * 1000))
+
+    budget = current_app.config["SQL_QUERY_BUDGETS"].get(request.endpoint,
+                                                         current_app.config["SQL_QUERY_BUDGET"])
+    if budget is not None and stats.count > budget:
+        message = QUERY_BUDGET_MESSAGE.format(request.method, request.path, stats.count, budget)
+        if current_app.config["SQL_ENFORCE_QUERY_BUDGET"]:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+
+def install_instrumentation() -> None:
+    """Listen to statements of all engines.
+
+    Listeners are added once, so repeated calls do nothing.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_instrumentation(app: Flask) -> None:
+    """Register request hooks which report statements of the request.
+
+    Args:
+        app: Flask application.
+    """
+    install_instrumentation()
+    app.before_request(_start_request)
+    app.after_request(_add_headers)
@@ -0,0 +1,230 @@
+"""Module for versioned schema migrations.
+
+Migrations are SQL files in app/db/migrations named <version>_<name>.sql.
+They are applied in version order and recorded in schema_migrations table.
+File which starts with NO_TRANSACTION_MARK is executed statement by statement
+outside of transaction, as required by CREATE INDEX CONCURRENTLY.
+Migrations are written for Postgres, schema of other databases (SQLite
+used by tests and benchmarks) is created from the models instead.
+"""
+import logging
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Engine, inspect, text
+
+from app.db import get_engine, db_settings
+from app.db.counters import group_counters_installed
+from app.db.models import Base
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# Data version triggers of SQLite schema.
+SQLITE_VERSIONS_SQL = Path(__file__).parent / "sql" / "sqlite_versions.sql"
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+NO_TRANSACTION_MARK = "-- migrate:no-transaction"
+# Advisory lock held while migrations run, so concurrent runners wait for each other.
+MIGRATION_LOCK_KEY = 20230401
+
+# Indexes required by lookups of the models: (table, columns, unique).
+EXPECTED_INDEXES = [
+    ("courses", ("course_name",), True),
+    ("students", ("group_id",), False),
+    ("student_course", ("course_id",), False),
+]
+MISSING_INDEX_MESSAGE = "Missing {}index on {} ({}). Run 'flask db upgrade'."
+INVALID_INDEX_MESSAGE = "Index {} is invalid. Drop it and run 'flask db upgrade'."
+MISSING_COUNTERS_MESSAGE = ("GROUP_STUDENT_COUNTER is enabled, but group counter triggers are missing, "
+                            "group sizes are wrong. Run 'flask counters install'.")
+# Indexes left invalid by failed CREATE INDEX CONCURRENTLY.
+INVALID_INDEXES = """
+SELECT index_class.relname
+FROM pg_index
+JOIN pg_class AS index_class ON index_class.oid = pg_index.indexrelid
+WHERE NOT pg_index.indisvalid
+"""
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+)
+"""
+RECORD_MIGRATION = "INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"
+
+
+class Migration(NamedTuple):
+    """Migration file."""
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def transactional(self) -> bool:
+        """Whether migration is applied in single transaction."""
+        return not self.path.read_text().startswith(NO_TRANSACTION_MARK)
+
+    def statements(self) -> list[str]:
+        """Split migration to separate statements, comments are skipped."""
+        lines = [line for line in self.path.read_text().splitlines()
+                 if not line.lstrip().startswith("--")]
+        return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def get_migrations() -> list[Migration]:
+    """Get all migrations ordered by version.
+
+    Returns:
+        List of migrations.
+    """
+    migrations = []
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        match = MIGRATION_FILE.match(path.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+    return sorted(migrations)
+
+
+def get_applied_versions(engine: Optional[Engine] = None) -> set[int]:
+    """Get versions of applied migrations.
+
+    Args:
+        engine: Engine, engine of the process by default.
+
+    Returns:
+        Set of versions.
+    """
+    engine = engine or get_engine()
+    if not inspect(engine).has_table("schema_migrations"):
+        return set()
+    with engine.connect() as connection:
+        return set(connection.scalars(text("SELECT version FROM schema_migrations")))
+
+
+def _apply(engine: Engine, migration: Migration) -> None:
+    """Apply migration and record its version."""
+    record = {"version": migration.version, "name": migration.name}
+    if migration.transactional:
+        with engine.begin() as connection:
+            connection.exec_driver_sql(migration.path.read_text())
+            connection.execute(text(RECORD_MIGRATION), record)
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for statement in migration.statements():
+            connection.exec_driver_sql(statement)
+        connection.execute(text(RECORD_MIGRATION), record)
+
+
+def create_schema(engine: Engine) -> None:
+    """Create missing tables and indexes of the models.
+
+    On SQLite data version triggers are created too.
+
+    Args:
+        engine: Engine.
+    """
+    Base.metadata.create_all(engine)
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            connection.connection.driver_connection.executescript(SQLITE_VERSIONS_SQL.read_text())
+
+
+def upgrade(engine: Optional[Engine] = None) -> list[Migration]:
+    """Apply pending migrations.
+
+    Migrations are idempotent, so migration interrupted before it was
+    recorded can be applied again. Database other than Postgres gets
+    schema of the models and no migration is applied.
+
+    Args:
+        engine: Engine, engine of the process by default.
+
+    Returns:
+        Applied migrations.
+    """
+    engine = engine or get_engine()
+    if engine.dialect.name != "postgresql":
+        create_schema(engine)
+        return []
+    applied = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_connection:
+        lock_connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            lock_connection.execute(text(CREATE_MIGRATIONS_TABLE))
+            done = set(lock_connection.scalars(text("SELECT version FROM schema_migrations")))
+            for migration in get_migrations():
+                if migration.version not in done:
+                    _apply(engine, migration)
+                    applied.append(migration)
+        finally:
+            lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    return applied
+
+
+def find_missing_indexes(engine: Optional[Engine] = None) -> list[tuple[str, tuple, bool]]:
+    """Compare database indexes with EXPECTED_INDEXES.
+
+    Expected index is present when any index, unique or primary key
+    constraint starts with its columns. Unique index must have exactly
+    its columns. Indexes of missing table are missing too.
+
+    Args:
+        engine: Engine, engine of the process by default.
+
+    Returns:
+        Missing items of EXPECTED_INDEXES.
+    """
+    inspector = inspect(engine or get_engine())
+    missing = []
+    for table, columns, unique in EXPECTED_INDEXES:
+        if not inspector.has_table(table):
+            missing.append((table, columns, unique))
+            continue
+        indexes = [(tuple(index["column_names"]), index["unique"])
+                   for index in inspector.get_indexes(table)]
+        indexes += [(tuple(constraint["column_names"]), True)
+                    for constraint in inspector.get_unique_constraints(table)]
+        indexes.append((tuple(inspector.get_pk_constraint(table)["constrained_columns"]), True))
+        if not any(index_columns == columns if unique else index_columns[:len(columns)] == columns
+                   for index_columns, index_unique in indexes
+                   if index_unique or not unique):
+            missing.append((table, columns, unique))
+    return missing
+
+
+def find_invalid_indexes(engine: Optional[Engine] = None) -> list[str]:
+    """Find indexes left invalid by failed CREATE INDEX CONCURRENTLY.
+
+    Such index is not used by queries, but IF NOT EXISTS skips it.
+
+    Args:
+        engine: Engine, engine of the process by default.
+
+    Returns:
+        Names of invalid indexes.
+    """
+    engine = engine or get_engine()
+    if engine.dialect.name != "postgresql":
+        return []
+    with engine.connect() as connection:
+        return list(connection.scalars(text(INVALID_INDEXES)))
+
+
+def check_schema(logger: logging.Logger, engine: Optional[Engine] = None) -> None:
+    """Log warning for every missing or invalid index.
+
+    Error is logged when group sizes are read from counters, which triggers
+    are not installed.
+
+    Args:
+        logger: Logger of the application.
+        engine: Engine, engine of the process by default.
+    """
+    for table, columns, unique in find_missing_indexes(engine):
+        logger.warning(MISSING_INDEX_MESSAGE.format("unique " if unique else "", table, ", ".join(columns)))
+    for index in find_invalid_indexes(engine):
+        logger.warning(INVALID_INDEX_MESSAGE.format(index))
+    if db_settings["GROUP_STUDENT_COUNTER"] and not group_counters_installed(engine):
+        logger.error(MISSING_COUNTERS_MESSAGE)
@@ -1,6 +1,9 @@
 CREATE TABLE IF NOT EXISTS "groups" (
-    id VARCHAR(5) PRIMARY KEY
+    id VARCHAR(5) PRIMARY KEY,
+    student_count INT NOT NULL DEFAULT 0
 );
+-- Databases created before student_count was added.
+ALTER TABLE "groups" ADD COLUMN IF NOT EXISTS student_count INT NOT NULL DEFAULT 0;
 
 CREATE TABLE IF NOT EXISTS students (
     id SERIAL PRIMARY KEY,
@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- Indexes are built without blocking writes, so migration can run on live database.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_students_group_id ON students (group_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_student_course_course_id ON student_course (course_id);
@@ -0,0 +1,108 @@
+-- Versions of data returned by read endpoints, used as ETags.
+-- Every change takes new value from the sequence, so version of recreated
+-- course or group set never repeats older one.
+CREATE SEQUENCE IF NOT EXISTS data_version_seq;
+
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS roster_version BIGINT NOT NULL DEFAULT nextval('data_version_seq');
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT nextval('data_version_seq')
+);
+INSERT INTO data_versions (name) VALUES ('groups') ON CONFLICT DO NOTHING;
+
+-- Statement level triggers bump every affected course once per statement.
+CREATE OR REPLACE FUNCTION bump_roster_versions() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE courses SET roster_version = nextval('data_version_seq');
+    ELSIF TG_OP = 'INSERT' THEN
+        UPDATE courses SET roster_version = nextval('data_version_seq')
+        WHERE id IN (SELECT course_id FROM new_rows);
+    ELSE
+        UPDATE courses SET roster_version = nextval('data_version_seq')
+        WHERE id IN (SELECT course_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_course_insert_version ON student_course;
+CREATE TRIGGER student_course_insert_version
+    AFTER INSERT ON student_course
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_roster_versions();
+
+DROP TRIGGER IF EXISTS student_course_delete_version ON student_course;
+CREATE TRIGGER student_course_delete_version
+    AFTER DELETE ON student_course
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_roster_versions();
+
+DROP TRIGGER IF EXISTS student_course_truncate_version ON student_course;
+CREATE TRIGGER student_course_truncate_version
+    AFTER TRUNCATE ON student_course
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_roster_versions();
+
+-- Group sizes change when student with group is inserted, deleted or moved.
+-- Updated students also change rosters of their courses.
+CREATE OR REPLACE FUNCTION bump_versions_of_students() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE data_versions SET version = nextval('data_version_seq') WHERE name = 'groups';
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        UPDATE courses SET roster_version = nextval('data_version_seq')
+        WHERE id IN (SELECT student_course.course_id
+                     FROM student_course JOIN new_rows ON new_rows.id = student_course.student_id);
+        IF EXISTS (SELECT 1 FROM new_rows JOIN old_rows USING (id)
+                   WHERE new_rows.group_id IS DISTINCT FROM old_rows.group_id) THEN
+            UPDATE data_versions SET version = nextval('data_version_seq') WHERE name = 'groups';
+        END IF;
+    ELSIF TG_OP = 'INSERT' THEN
+        IF EXISTS (SELECT 1 FROM new_rows WHERE group_id IS NOT NULL) THEN
+            UPDATE data_versions SET version = nextval('data_version_seq') WHERE name = 'groups';
+        END IF;
+    ELSIF EXISTS (SELECT 1 FROM old_rows WHERE group_id IS NOT NULL) THEN
+        UPDATE data_versions SET version = nextval('data_version_seq') WHERE name = 'groups';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS students_insert_version ON students;
+CREATE TRIGGER students_insert_version
+    AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_versions_of_students();
+
+DROP TRIGGER IF EXISTS students_update_version ON students;
+CREATE TRIGGER students_update_version
+    AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_versions_of_students();
+
+DROP TRIGGER IF EXISTS students_delete_version ON students;
+CREATE TRIGGER students_delete_version
+    AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_versions_of_students();
+
+DROP TRIGGER IF EXISTS students_truncate_version ON students;
+CREATE TRIGGER students_truncate_version
+    AFTER TRUNCATE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_versions_of_students();
+
+-- Any change of groups table changes group list.
+CREATE OR REPLACE FUNCTION bump_groups_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_versions SET version = nextval('data_version_seq') WHERE name = 'groups';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS groups_change_version ON "groups";
+CREATE TRIGGER groups_change_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "groups"
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_groups_version();
@@ -0,0 +1,68 @@
+-- Version of every group, so students of different groups are written
+-- without waiting for lock of the single 'groups' row of data_versions.
+-- Version of group list is sum of group versions and of the 'groups' row,
+-- which keeps versions of deleted groups. Every change increases the sum,
+-- so version of group list never repeats older one.
+ALTER TABLE "groups" ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1;
+
+-- Group sizes change when student with group is inserted, deleted or moved.
+-- Updated students also change rosters of their courses.
+CREATE OR REPLACE FUNCTION bump_versions_of_students() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE "groups" SET version = version + 1;
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        UPDATE courses SET roster_version = nextval('data_version_seq')
+        WHERE id IN (SELECT student_course.course_id
+                     FROM student_course JOIN new_rows ON new_rows.id = student_course.student_id);
+        UPDATE "groups" SET version = version + 1
+        WHERE id IN (SELECT unnest(ARRAY[old_rows.group_id, new_rows.group_id])
+                     FROM new_rows JOIN old_rows USING (id)
+                     WHERE new_rows.group_id IS DISTINCT FROM old_rows.group_id);
+    ELSIF TG_OP = 'INSERT' THEN
+        UPDATE "groups" SET version = version + 1 WHERE id IN (SELECT group_id FROM new_rows);
+    ELSE
+        UPDATE "groups" SET version = version + 1 WHERE id IN (SELECT group_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Deleted groups move their versions to the 'groups' row, renamed group
+-- gets new version. Student counters and versions updated by triggers
+-- do not change group list, so they do not lock the 'groups' row.
+CREATE OR REPLACE FUNCTION bump_groups_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        NEW.version = OLD.version + 1;
+        RETURN NEW;
+    ELSIF TG_OP = 'TRUNCATE' THEN
+        UPDATE data_versions SET version = version + (SELECT count(*) + coalesce(sum(version), 0) FROM "groups")
+        WHERE name = 'groups';
+    ELSE
+        UPDATE data_versions SET version = version + (SELECT count(*) + coalesce(sum(version), 0) FROM old_rows)
+        WHERE name = 'groups';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS groups_change_version ON "groups";
+
+DROP TRIGGER IF EXISTS groups_rename_version ON "groups";
+CREATE TRIGGER groups_rename_version
+    BEFORE UPDATE OF id ON "groups"
+    FOR EACH ROW EXECUTE FUNCTION bump_groups_version();
+
+DROP TRIGGER IF EXISTS groups_delete_version ON "groups";
+CREATE TRIGGER groups_delete_version
+    AFTER DELETE ON "groups"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_groups_version();
+
+DROP TRIGGER IF EXISTS groups_truncate_version ON "groups";
+CREATE TRIGGER groups_truncate_version
+    BEFORE TRUNCATE ON "groups"
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_groups_version();
@@ -1,28 +1,78 @@
 """Module for database models"""
 
+from typing import Iterable, Iterator, NamedTuple, Optional
+
 from flask import abort
-from sqlalchemy.exc import NoResultFound, IntegrityError, DisconnectionError
-from sqlalchemy.ext.declarative import DeferredReflection
-from sqlalchemy import Column, String, Integer, ForeignKey
-from sqlalchemy.orm import relationship, declarative_base
-from reretry import retry
+from sqlalchemy.exc import NoResultFound, IntegrityError
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, Select, cast, insert, select, delete, func, or_, true
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import relationship, declarative_base, Session
+from sqlalchemy.sql.expression import ColumnElement
+
+from app.api.constants import (
+    BULK_CHUNK_SIZE, BULK_ALREADY_EXISTS, BULK_NAME_MISSING, BULK_NAME_TOO_LONG,
+    BULK_GROUP_NOT_FOUND, BULK_INVALID_ROW, ORDER_BY_SIZE, STREAM_BATCH_SIZE, GROUPS_VERSION)
+from app.db import db_session, db_settings
+from app.db.db import commit, in_unit_of_work, standalone_session
+from app.db.bulk import BulkInsertResult, chunks, insert_ignore
+from app.db.cache import query_cache, course_namespace, GROUPS_NAMESPACE
+from app.db.exceptions import CoursesNotFound, StudentsNotFound
+from app.db.retry import retry_on_disconnect
+
+
+# Constructs a base class.
+# Declared columns must match schema created by migrations in app/db/migrations,
+# tables are not reflected, so importing models does not connect to the database.
+Base = declarative_base()
 
-from app.api.constants import TRIES, DELAY
-from app.db import get_engine, db_session
 
+class NextDataVersion(ColumnElement):
+    """Default of version columns, next value of data_version_seq.
+
+    SQLite has no sequences, there versions start from 0 and are set by
+    triggers from app/db/sql/sqlite_versions.sql.
+    """
+    inherit_cache = True
+
+
+@compiles(NextDataVersion)
+def _next_data_version(element, compiler, **kwargs) -> str:
+    return "nextval('data_version_seq')"
 
-# Constructs a base class
-Base = declarative_base()
 
+@compiles(NextDataVersion, "sqlite")
+def _next_data_version_sqlite(element, compiler, **kwargs) -> str:
+    return "0"
 
-class Student(DeferredReflection, Base):
+
+class StudentRow(NamedTuple):
+    """Student read from selected columns without creating ORM object.
+
+    Used by read-only queries, where identity map and attribute
+    instrumentation of Student objects are not needed.
+    """
+    id: int
+    first_name: str
+    last_name: str
+    group_id: Optional[str]
+
+    def to_dict(self) -> dict:
+        """Creates dictionary from student row.
+
+        Result:
+            Dictionary with students data.
+        """
+        return self._asdict()
+
+
+class Student(Base):
     """Class represents table 'students'."""
     __tablename__ = "students"
 
     id = Column(Integer, primary_key=True, unique=True, autoincrement=True)
     first_name = Column(String(20), nullable=False)
     last_name = Column(String(20), nullable=False)
-    group_id = Column(String(5), ForeignKey("groups.id", ondelete="SET NULL"))
+    group_id = Column(String(5), ForeignKey("groups.id", ondelete="SET NULL"), index=True)
 
     courses = relationship("Course", secondary="student_course", back_populates="students", cascade="all, delete")
     group = relationship("Group", back_populates="students")
@@ -43,7 +93,7 @@ class Student(DeferredReflection, Base):
         return f"<{self.first_name} {self.last_name}, in group: {self.group_id}>"
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Student.create_student")
     def create_student(cls, first_name, last_name, group_id: str = None) -> int:
         """Create new student.
 
@@ -58,7 +108,6 @@ class Student(DeferredReflection, Base):
         Raises:
             IntegrityError: When group_id does not exist.
         """
-        print("Hello")
         with db_session() as session:
             student = Student(first_name=first_name,
                               last_name=last_name,
@@ -68,30 +117,100 @@ class Student(DeferredReflection, Base):
             except IntegrityError:
                 # Raise when group_id does not exist.
                 raise IntegrityError
-            session.commit()
+            commit(session)
             created_id = student.id
+        if group_id is not None:
+            query_cache.invalidate(GROUPS_NAMESPACE)
         return created_id
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Student.create_multiple_students")
     def create_multiple_students(cls, student_list: list, group_id: str = None) -> None:
         """Create multiple students for list of students.
 
+        All students are inserted with single multi-row INSERT statement.
+
         Args:
             student_list: list of students.
             group_id: ID of group to which students are assigned.
+
+        Raises:
+            IntegrityError: When group_id does not exist.
         """
+        if not student_list:
+            return
+        rows = []
+        for student_name in student_list:
+            f_name, l_name = student_name.split(" ")
+            rows.append({"first_name": f_name, "last_name": l_name, "group_id": group_id})
         with db_session() as session:
-            for student_name in student_list:
-                f_name, l_name = student_name.split(" ")
-                student = Student(first_name=f_name,
-                                  last_name=l_name,
-                                  group_id=group_id)
-                session.add(student)
-            session.commit()
+            session.execute(insert(Student), rows)
+            commit(session)
+        if group_id is not None:
+            query_cache.invalidate(GROUPS_NAMESPACE)
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    def bulk_create_students(cls, students: Iterable[dict],
+                             chunk_size: int = BULK_CHUNK_SIZE) -> BulkInsertResult:
+        """Create students in chunks of multi-row INSERT statements.
+
+        Each chunk is committed separately. Inside unit of work of the
+        request chunks are committed in own session, so big import is not
+        held in one transaction until the request ends. Rows which are not
+        dictionaries of strings, rows with missing or too long names and
+        rows referring to non-existing group are reported as conflicts, and
+        the rest of the chunk is inserted.
+        Method is not retried, because already committed chunks would be
+        inserted again.
+
+        Args:
+            students: Iterable of dictionaries with first_name, last_name
+                and optional group_id, it is consumed lazily.
+            chunk_size: Number of rows in single INSERT statement.
+
+        Returns:
+            Result with created student ids in input order and conflicts.
+        """
+        result = BulkInsertResult()
+        max_length = Student.first_name.type.length
+        # Core insert, ORM bulk insert splits the batch wherever group_id switches to NULL.
+        table = Student.__table__
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        session_scope = standalone_session if in_unit_of_work() else db_session
+        with session_scope() as session:
+            for chunk in chunks(enumerate(students), chunk_size):
+                group_ids = {row.get("group_id") for _, row in chunk if isinstance(row, dict)}
+                group_ids = {group_id for group_id in group_ids if isinstance(group_id, str)}
+                existing_groups = set(session.scalars(
+                    select(Group.id).where(Group.id.in_(group_ids)))) if group_ids else set()
+                rows = []
+                for index, row in chunk:
+                    if not isinstance(row, dict):
+                        result.add_conflict(index, row, BULK_INVALID_ROW)
+                        continue
+                    first_name, last_name = row.get("first_name"), row.get("last_name")
+                    group_id = row.get("group_id")
+                    if not all([first_name, last_name]):
+                        result.add_conflict(index, row, BULK_NAME_MISSING)
+                    elif not all(isinstance(value, str) for value in (first_name, last_name, group_id or "")):
+                        result.add_conflict(index, row, BULK_INVALID_ROW)
+                    elif max(len(first_name), len(last_name)) > max_length:
+                        result.add_conflict(index, row, BULK_NAME_TOO_LONG.format(max_length))
+                    elif group_id is not None and group_id not in existing_groups:
+                        result.add_conflict(index, row, BULK_GROUP_NOT_FOUND.format(group_id))
+                    else:
+                        rows.append({"first_name": first_name,
+                                     "last_name": last_name,
+                                     "group_id": group_id})
+                if rows:
+                    result.ids.extend(session.connection().scalars(statement, rows))
+                session.commit()
+                if any(row["group_id"] is not None for row in rows):
+                    query_cache.invalidate_committed(GROUPS_NAMESPACE)
+        return result
+
+    @classmethod
+    @retry_on_disconnect("Student.get_student")
     def get_student(cls, student_id: int, session=None):
         """Get students with specific id.
 
@@ -110,19 +229,81 @@ class Student(DeferredReflection, Base):
         return student
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
-    def get_all_students(cls) -> list[dict]:
+    @retry_on_disconnect("Student.get_all_students")
+    def get_all_students(cls) -> list[StudentRow]:
         """Get list of all students.
 
         Returns:
-            list of dictionary of students.
+            list of student rows ordered by id.
+        """
+        with db_session() as session:
+            students = list(_student_rows(session, cls._filtered_students()))
+        return students
+
+    @classmethod
+    def _filtered_students(cls, group_id: str = None, name_prefix: str = None) -> Select:
+        """Build query of students ordered by id.
+
+        Args:
+            group_id: Return only students of this group.
+            name_prefix: Return only students which first or last name starts with it.
+
+        Returns:
+            Select statement.
+        """
+        query = select(*STUDENT_ROW_COLUMNS).order_by(Student.id)
+        if group_id is not None:
+            query = query.where(Student.group_id == group_id)
+        if name_prefix:
+            query = query.where(or_(Student.first_name.startswith(name_prefix, autoescape=True),
+                                    Student.last_name.startswith(name_prefix, autoescape=True)))
+        return query
+
+    @classmethod
+    @retry_on_disconnect("Student.get_students_page")
+    def get_students_page(cls, limit: int, after_id: int = None,
+                          group_id: str = None, name_prefix: str = None) -> list[StudentRow]:
+        """Get page of students using keyset pagination.
+
+        Args:
+            limit: Max number of students.
+            after_id: Return only students with greater id.
+            group_id: Return only students of this group.
+            name_prefix: Return only students which first or last name starts with it.
+
+        Returns:
+            List of student rows ordered by id.
         """
+        query = cls._filtered_students(group_id, name_prefix).limit(limit)
+        if after_id is not None:
+            query = query.where(Student.id > after_id)
         with db_session() as session:
-            students = session.query(Student).all()
+            students = list(_student_rows(session, query))
         return students
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    def iter_students(cls, group_id: str = None, name_prefix: str = None,
+                      batch_size: int = STREAM_BATCH_SIZE) -> Iterator[StudentRow]:
+        """Iterate over students fetching them from server side cursor in batches.
+
+        Only one batch of students is held in memory at once. Students are
+        read on a session of their own, because streamed response outlives
+        the request session.
+
+        Args:
+            group_id: Return only students of this group.
+            name_prefix: Return only students which first or last name starts with it.
+            batch_size: Number of rows fetched at once.
+
+        Yields:
+            Student rows ordered by id.
+        """
+        query = cls._filtered_students(group_id, name_prefix).execution_options(yield_per=batch_size)
+        with standalone_session() as session:
+            yield from _student_rows(session, query)
+
+    @classmethod
+    @retry_on_disconnect("Student.delete_student")
     def delete_student(cls, student_id: int) -> None:
         """Delete student by specific ID.
 
@@ -133,40 +314,95 @@ class Student(DeferredReflection, Base):
             UserWarning: When 0 rows was deleted.
         """
         with db_session() as session:
-            deleted_rows = session.query(Student).filter(Student.id == student_id).delete()
-            if deleted_rows == 0:
+            # Courses of the student, their rosters change with deleted student.
+            course_names = session.scalars(
+                select(Course.course_name)
+                .join(StudentCourse, StudentCourse.course_id == Course.id)
+                .where(StudentCourse.student_id == student_id)).all()
+            deleted = session.execute(delete(Student)
+                                      .where(Student.id == student_id)
+                                      .returning(Student.group_id)
+                                      .execution_options(synchronize_session=False)).all()
+            if not deleted:
                 raise UserWarning
-            session.commit()
+            commit(session)
+        namespaces = [course_namespace(course_name) for course_name in course_names]
+        if deleted[0].group_id is not None:
+            namespaces.append(GROUPS_NAMESPACE)
+        query_cache.invalidate(*namespaces)
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Student.add_student_to_course")
     def add_student_to_course(cls, student_id: int, course_list: list[str]) -> None:
         """Add students to the course.
 
-        Assign specific student to the courses from the list.
+        Assign specific student to the courses from the list. Courses are
+        looked up with single IN query and assigned with single INSERT,
+        courses already assigned to the student are skipped.
 
         Args:
             student_id: student ID.
             course_list: list of courses.
 
         Raises:
-            NoResultFound: If either student or course was not found.
+            CoursesNotFound: If some of the courses were not found.
+            NoResultFound: If student was not found.
         """
         with db_session() as session:
+            course_ids = Course.get_course_ids(course_list, session)
+            if not course_ids:
+                return
+            statement = insert_ignore(session, StudentCourse).values(
+                [{"student_id": student_id, "course_id": course_id} for course_id in course_ids])
             try:
-                # Get student.
-                student = Student.get_student(student_id, session)
-                for course_name in course_list:
-                    # Get course.
-                    course = session.query(Course).filter(Course.course_name == course_name).one()
-                    # Assign course to student.
-                    student.courses.append(course)
-            except NoResultFound:
+                session.execute(statement)
+            except IntegrityError:
+                # Raise when student does not exist.
                 raise NoResultFound
-            session.commit()
+            commit(session)
+        query_cache.invalidate(*map(course_namespace, set(course_list)))
+
+    @classmethod
+    @retry_on_disconnect("Student.add_students_to_courses")
+    def add_students_to_courses(cls, student_ids: list[int], course_list: list[str]) -> int:
+        """Add every student from the list to every course from the list.
+
+        All assignments are inserted with single INSERT ... SELECT statement
+        in one transaction, existing assignments are skipped.
+
+        Args:
+            student_ids: list of student IDs.
+            course_list: list of courses.
+
+        Returns:
+            Number of new assignments.
+
+        Raises:
+            CoursesNotFound: If some of the courses were not found.
+            StudentsNotFound: If some of the students were not found.
+        """
+        student_ids = set(student_ids)
+        with db_session() as session:
+            course_ids = Course.get_course_ids(course_list, session)
+            existing_ids = set(session.scalars(select(Student.id).where(Student.id.in_(student_ids))))
+            missing_ids = student_ids - existing_ids
+            if missing_ids:
+                raise StudentsNotFound(sorted(missing_ids))
+            if not course_ids or not student_ids:
+                return 0
+            # Every student is paired with every course.
+            pairs = (select(Student.id, Course.id)
+                     .join(Course, true())
+                     .where(Student.id.in_(student_ids), Course.id.in_(course_ids)))
+            statement = insert_ignore(session, StudentCourse).from_select(
+                ["student_id", "course_id"], pairs)
+            created = session.execute(statement).rowcount
+            commit(session)
+        if created:
+            query_cache.invalidate(*map(course_namespace, set(course_list)))
+        return created
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
     def remove_student_from_course(cls, student_id: int, course_name: str) -> None:
         """Remove student from course.
 
@@ -180,16 +416,47 @@ class Student(DeferredReflection, Base):
             NoResultFound: If either student or course was not found.
             ValueError: If course is not assigned to the student.
         """
+        cls.remove_student_from_courses(student_id, [course_name])
+
+    @classmethod
+    @retry_on_disconnect("Student.remove_student_from_courses")
+    def remove_student_from_courses(cls, student_id: int, course_list: list[str]) -> int:
+        """Remove student from several courses.
+
+        Assignments are deleted with single DELETE statement. Student and
+        courses are looked up only when some course was not removed, to
+        find out why.
+
+        Args:
+            student_id: student ID.
+            course_list: list of course names.
+
+        Returns:
+            Number of removed courses.
+
+        Raises:
+            CoursesNotFound: If some of the courses were not found.
+            NoResultFound: If student was not found.
+            ValueError: If none of the courses is assigned to the student.
+        """
+        course_names = set(course_list)
+        course_ids = select(Course.id).where(Course.course_name.in_(course_names))
+        statement = (delete(StudentCourse)
+                     .where(StudentCourse.student_id == student_id,
+                            StudentCourse.course_id.in_(course_ids))
+                     .returning(StudentCourse.course_id)
+                     .execution_options(synchronize_session=False))
         with db_session() as session:
-            try:
-                student = session.query(Student).filter_by(id=student_id).one()
-                course = session.query(Course).filter(Course.course_name == course_name).one()
-                student.courses.remove(course)
-            except NoResultFound:
-                raise NoResultFound
-            except ValueError:
-                raise ValueError
-            session.commit()
+            removed = len(session.execute(statement).all())
+            if removed < len(course_names):
+                Course.get_course_ids(course_names, session)
+                if session.scalar(select(Student.id).where(Student.id == student_id)) is None:
+                    raise NoResultFound
+                if not removed:
+                    raise ValueError
+            commit(session)
+        query_cache.invalidate(*map(course_namespace, course_names))
+        return removed
 
     def to_dict(self) -> dict:
         """Creates dictionary from student object.
@@ -208,13 +475,35 @@ class Student(DeferredReflection, Base):
         return result
 
 
-class Course(DeferredReflection, Base):
+# Columns selected for StudentRow.
+STUDENT_ROW_COLUMNS = (Student.id, Student.first_name, Student.last_name, Student.group_id)
+
+
+def _student_rows(session: Session, query: Select) -> Iterator[StudentRow]:
+    """Execute query of STUDENT_ROW_COLUMNS on session connection.
+
+    Query is executed as Core statement and rows are mapped to StudentRow
+    directly, bypassing ORM loading.
+
+    Args:
+        session: SQLAlchemy session.
+        query: Select statement.
+
+    Returns:
+        Iterator of student rows.
+    """
+    return map(StudentRow._make, session.connection().execute(query))
+
+
+class Course(Base):
     """Class represents table 'course'."""
     __tablename__ = "courses"
 
     id = Column(Integer, primary_key=True, unique=True, autoincrement=True)
-    course_name = Column(String(50), nullable=False)
+    course_name = Column(String(50), nullable=False, unique=True)
     description = Column(String(200), nullable=False)
+    # Changed by triggers whenever students of the course change.
+    roster_version = Column(BigInteger, nullable=False, server_default=NextDataVersion())
     students = relationship("Student", secondary="student_course", back_populates="courses", passive_deletes=True)
 
     def __int__(self, course_name: str, description: str) -> None:
@@ -234,7 +523,7 @@ class Course(DeferredReflection, Base):
         return f"<Course: {self.course_name}>"
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Course.create_course")
     def create_course(cls, course_name: str, description: str):
         """Create new course.
 
@@ -249,10 +538,10 @@ class Course(DeferredReflection, Base):
                 session.add(course)
             except IntegrityError:
                 raise IntegrityError
-            session.commit()
+            commit(session)
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Course.create_multiple_courses")
     def create_multiple_courses(cls, courses: dict[str: str]) -> None:
         """Create courses from dict of courses.
 
@@ -266,45 +555,218 @@ class Course(DeferredReflection, Base):
         Raises:
             IntegrityError: If the course with this name already exists.
         """
+        if not courses:
+            return
+        with db_session() as session:
+            session.execute(insert(Course),
+                            [{"course_name": name, "description": desc}
+                             for name, desc in courses.items()])
+            commit(session)
+
+    @classmethod
+    def bulk_create_courses(cls, courses: dict[str: str],
+                            chunk_size: int = BULK_CHUNK_SIZE) -> BulkInsertResult:
+        """Create courses in chunks of multi-row INSERT statements.
+
+        Courses which names already exist are reported as conflicts.
+
+        Args:
+            courses:
+                dictionary where key is course name and
+                value is course description.
+            chunk_size: Number of rows in single INSERT statement.
+
+        Returns:
+            Result with created course ids in input order and conflicts.
+        """
+        result = BulkInsertResult()
         with db_session() as session:
-            for name, desc in courses.items():
-                # Create course object.
-                course = Course(course_name=name, description=desc)
-                try:
-                    session.add(course)
-                except IntegrityError:
-                    raise IntegrityError
-            session.commit()
+            for chunk in chunks(enumerate(courses.items()), chunk_size):
+                statement = insert_ignore(session, Course).values(
+                    [{"course_name": name, "description": desc} for _, (name, desc) in chunk]
+                ).returning(Course.course_name, Course.id)
+                inserted = dict(session.execute(statement).tuples().all())
+                for index, (name, _) in chunk:
+                    if name in inserted:
+                        result.ids.append(inserted.pop(name))
+                    else:
+                        result.add_conflict(index, name, BULK_ALREADY_EXISTS)
+                commit(session)
+        return result
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
-    def find_students_in_course(cls, course_name: str) -> list[dict]:
+    def get_course_ids(cls, course_list: list[str], session: Session) -> list[int]:
+        """Get IDs of courses with given names using single IN query.
+
+        Args:
+            course_list: list of course names.
+            session: SQLAlchemy session.
+
+        Returns:
+            list of course IDs.
+
+        Raises:
+            CoursesNotFound: If some of the courses were not found.
+        """
+        course_names = set(course_list)
+        courses = dict(session.execute(
+            select(Course.course_name, Course.id).where(Course.course_name.in_(course_names))).tuples().all())
+        missing_names = course_names - courses.keys()
+        if missing_names:
+            raise CoursesNotFound(sorted(missing_names))
+        return list(courses.values())
+
+    @classmethod
+    @retry_on_disconnect("Course.find_students_in_course")
+    def find_students_in_course(cls, course_name: str, version: Optional[int] = None) -> list[StudentRow]:
         """Find all students related to the course with a given name.
 
+        Result is cached until students of the course are changed.
+
+        Args:
+            course_name: Name of specific course.
+            version: Roster version read before, cached result of another
+                version is not used.
+
+        Returns:
+            List of student rows ordered by id.
+        """
+        def load() -> list[StudentRow]:
+            with db_session() as session:
+                return list(_student_rows(session, cls._students_in_course(course_name)))
+
+        return query_cache.get_or_load(course_namespace(course_name), (), load, version)
+
+    @classmethod
+    @retry_on_disconnect("Course.remove_all_students")
+    def remove_all_students(cls, course_name: str) -> int:
+        """Remove all students from the course with single DELETE statement.
+
+        Args:
+            course_name: Name of specific course.
+
+        Returns:
+            Number of removed students.
+
+        Raises:
+            CoursesNotFound: If course was not found.
+        """
+        course_ids = select(Course.id).where(Course.course_name == course_name)
+        statement = (delete(StudentCourse)
+                     .where(StudentCourse.course_id.in_(course_ids))
+                     .execution_options(synchronize_session=False))
+        with db_session() as session:
+            removed = session.execute(statement).rowcount
+            if not removed:
+                Course.get_course_ids([course_name], session)
+            commit(session)
+        if removed:
+            query_cache.invalidate(course_namespace(course_name))
+        return removed
+
+    @classmethod
+    @retry_on_disconnect("Course.get_roster_version")
+    def get_roster_version(cls, course_name: str) -> Optional[int]:
+        """Get version of students related to the course.
+
+        Args:
+            course_name: Name of specific course.
+
+        Returns:
+            Version, or None if course was not found.
+        """
+        with db_session() as session:
+            version = session.scalar(select(Course.roster_version).where(Course.course_name == course_name))
+        return version
+
+    @classmethod
+    def _students_in_course(cls, course_name: str) -> Select:
+        """Build query of student columns related to the course ordered by student id.
+
+        Args:
+            course_name: Name of specific course.
+
+        Returns:
+            Select statement.
+        """
+        return (select(*STUDENT_ROW_COLUMNS)
+                .join(StudentCourse, StudentCourse.student_id == Student.id)
+                .join(Course, Course.id == StudentCourse.course_id)
+                .where(Course.course_name == course_name)
+                .order_by(Student.id))
+
+    @classmethod
+    @retry_on_disconnect("Course.get_students_page_in_course")
+    def get_students_page_in_course(cls, course_name: str, limit: int,
+                                    after_id: int = None) -> list[dict]:
+        """Get page of students related to the course using keyset pagination.
+
         Args:
             course_name: Name of specific course.
+            limit: Max number of students.
+            after_id: Return only students with greater id.
 
         Returns:
-            List of dictionary of students.
+            List of dictionary of students ordered by id.
         """
+        query = cls._students_in_course(course_name).limit(limit)
+        if after_id is not None:
+            query = query.where(Student.id > after_id)
         with db_session() as session:
-            students = session.query(Student).join(Student.courses).filter(Course.course_name == course_name).all()
+            students = [row.to_dict() for row in _student_rows(session, query)]
         return students
 
+    @classmethod
+    def iter_students_in_course(cls, course_name: str,
+                                batch_size: int = STREAM_BATCH_SIZE) -> Iterator[dict]:
+        """Iterate over students related to the course fetching them in batches.
+
+        Only student columns are selected, no ORM objects are created.
+        Students are read on a session of their own, because streamed
+        response outlives the request session.
+
+        Args:
+            course_name: Name of specific course.
+            batch_size: Number of rows fetched at once.
 
-class StudentCourse(DeferredReflection, Base):
+        Yields:
+            Dictionary of student ordered by id.
+        """
+        query = cls._students_in_course(course_name).execution_options(yield_per=batch_size)
+        with standalone_session() as session:
+            for row in _student_rows(session, query):
+                yield row.to_dict()
+
+
+class StudentCourse(Base):
     """Class represents association table 'student_course'."""
     __tablename__ = "student_course"
 
     student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
-    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class DataVersion(Base):
+    """Class represents table 'data_versions'.
+
+    Versions are changed by triggers from migration 0003_data_versions.sql,
+    row 'groups' keeps versions of deleted groups since 0004_group_versions.sql.
+    """
+    __tablename__ = "data_versions"
 
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default=NextDataVersion())
 
-class Group(DeferredReflection, Base):
+
+class Group(Base):
     """Class represents table 'groups'."""
     __tablename__ = "groups"
 
-    id = Column(String, primary_key=True, unique=True)
+    id = Column(String(5), primary_key=True, unique=True)
+    # Maintained by triggers from app/db/sql/group_counters.sql.
+    student_count = Column(Integer, nullable=False, server_default="0")
+    # Changed by triggers from migration 0004_group_versions.sql.
+    version = Column(BigInteger, nullable=False, server_default="1")
     students = relationship("Student", back_populates="group")
 
     def __init__(self, id: str):
@@ -319,7 +781,7 @@ class Group(DeferredReflection, Base):
         return f"<Group id: {self.id}>"
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Group.create_group")
     def create_group(cls, group_name: str) -> None:
         """Creates new group.
 
@@ -335,10 +797,11 @@ class Group(DeferredReflection, Base):
                 session.add(group)
             except IntegrityError:
                 raise IntegrityError
-            session.commit()
+            commit(session)
+        query_cache.invalidate(GROUPS_NAMESPACE)
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Group.create_multiple_groups")
     def create_multiple_groups(cls, group_list: list[str]) -> None:
         """Creates multiple groups from list of groups.
 
@@ -348,33 +811,108 @@ class Group(DeferredReflection, Base):
         Raises:
             IntegrityError: If the group with given id already exists.
         """
+        if not group_list:
+            return
+        with db_session() as session:
+            session.execute(insert(Group), [{"id": group_name} for group_name in group_list])
+            commit(session)
+        query_cache.invalidate(GROUPS_NAMESPACE)
+
+    @classmethod
+    def bulk_create_groups(cls, group_list: Iterable[str],
+                           chunk_size: int = BULK_CHUNK_SIZE) -> BulkInsertResult:
+        """Create groups in chunks of multi-row INSERT statements.
+
+        Groups which ids already exist are reported as conflicts.
+
+        Args:
+            group_list: Iterable of group ids.
+            chunk_size: Number of rows in single INSERT statement.
+
+        Returns:
+            Result with created group ids in input order and conflicts.
+        """
+        result = BulkInsertResult()
+        with db_session() as session:
+            for chunk in chunks(enumerate(group_list), chunk_size):
+                statement = insert_ignore(session, Group).values(
+                    [{"id": group_name} for _, group_name in chunk]
+                ).returning(Group.id)
+                inserted = set(session.scalars(statement))
+                for index, group_name in chunk:
+                    if group_name in inserted:
+                        result.ids.append(group_name)
+                        inserted.discard(group_name)
+                    else:
+                        result.add_conflict(index, group_name, BULK_ALREADY_EXISTS)
+                commit(session)
+        if result.ids:
+            query_cache.invalidate(GROUPS_NAMESPACE)
+        return result
+
+    @classmethod
+    @retry_on_disconnect("Group.get_version")
+    def get_version(cls) -> int:
+        """Get version of groups and their student counts.
+
+        Version is sum of group versions and versions of deleted groups,
+        so writers of different groups do not lock the same row.
+
+        Returns:
+            Version.
+        """
+        group_versions = select(func.coalesce(func.sum(Group.version), 0)).scalar_subquery()
         with db_session() as session:
-            for group_name in group_list:
-                group = Group(id=group_name)
-                try:
-                    session.add(group)
-                except IntegrityError:
-                    raise IntegrityError
-            session.commit()
+            version = session.scalar(select(DataVersion.version + cast(group_versions, BigInteger))
+                                     .where(DataVersion.name == GROUPS_VERSION))
+        return version
 
     @classmethod
-    @retry(exceptions=DisconnectionError, tries=TRIES, delay=DELAY)
+    @retry_on_disconnect("Group.get_all_groups_not_bigger_then")
     def get_all_groups_not_bigger_then(cls,
-                                       student_count: int) -> list[str]:
+                                       student_count: int,
+                                       order_by: str = None,
+                                       limit: int = None,
+                                       offset: int = None,
+                                       version: Optional[int] = None) -> list[str]:
         """Finds all groups with less or equals student count.
 
+        Student count is read from groups.student_count when
+        GROUP_STUDENT_COUNTER is enabled. Otherwise, it is calculated in
+        database with single aggregate query. Student rows are not loaded.
+        Result is cached until students of any group or groups are changed.
+
         Args:
             student_count: max student number in the group.
+            order_by: "size" to sort groups by student count, otherwise
+                groups are sorted by id.
+            limit: max number of returned groups.
+            offset: number of skipped groups.
+            version: Groups version read before, cached result of another
+                version is not used.
 
         Returns:
             list of groups.
         """
-        with db_session() as session:
-            groups = [group.id
-                      for group in session.query(Group).all()
-                      if len(group.students) <= student_count]
-
-        return groups
-
+        def load() -> list[str]:
+            if db_settings["GROUP_STUDENT_COUNTER"]:
+                count = Group.student_count
+                query = select(Group.id).where(count <= student_count)
+            else:
+                count = func.count(Student.id)
+                query = (select(Group.id)
+                         .outerjoin(Student, Student.group_id == Group.id)
+                         .group_by(Group.id)
+                         .having(count <= student_count))
+            if order_by == ORDER_BY_SIZE:
+                query = query.order_by(count, Group.id)
+            else:
+                query = query.order_by(Group.id)
+            query = query.limit(limit).offset(offset)
+
+            with db_session() as session:
+                return session.scalars(query).all()
+
+        return query_cache.get_or_load(GROUPS_NAMESPACE, (student_count, order_by, limit, offset), load,
+                                       version)
 
-DeferredReflection.prepare(get_engine())
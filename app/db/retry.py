@@ -0,0 +1,181 @@
+"""Module for retry policy of model methods.
+
+Model method is retried when database connection is lost. Delays grow
+exponentially from RETRY_BASE_DELAY up to RETRY_MAX_DELAY with full jitter,
+so requests which failed together do not retry together. All retries of
+one request fit into RETRY_DEADLINE seconds from its first retried call.
+
+Lost connection is invalidated by SQLAlchemy and the session is rolled
+back, so next attempt checks out a fresh connection from the pool. Inside
+unit of work of the request earlier changes of the request are lost with
+the connection, so the call is not retried then.
+Inside the async API the delay is awaited in the event loop instead of
+blocking it.
+
+Circuit breaker counts failed attempts. After RETRY_BREAKER_THRESHOLD of
+them in a row database is considered down and calls fail at once with
+DatabaseUnavailable (503) for RETRY_BREAKER_RESET seconds. Then one trial
+call is let through, which closes or reopens the breaker.
+"""
+import asyncio
+import random
+import time
+from functools import wraps
+from threading import Lock
+from typing import Callable, Optional
+
+from flask import has_app_context
+from sqlalchemy.exc import DBAPIError, DisconnectionError
+from sqlalchemy.util import await_only
+
+from app.db.db import bound_session, db_settings, request_session, request_rolled_back
+from app.db.exceptions import DatabaseUnavailable
+from app.metrics import record_retry
+
+# Key of request session info with deadline of retries of the request.
+RETRY_DEADLINE_KEY = "retry_deadline"
+
+
+class CircuitBreaker:
+    """Circuit breaker of the process shared by all model methods."""
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial = False
+        self._lock = Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are failing fast."""
+        return self.opened_at is not None
+
+    def allow(self, reset_timeout: float) -> bool:
+        """Check whether call may reach the database.
+
+        When breaker is open and reset timeout passed, one trial call is allowed.
+
+        Args:
+            reset_timeout: Seconds the breaker stays open.
+
+        Returns:
+            True when call is allowed.
+        """
+        if self.opened_at is None:
+            return True
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.trial or time.monotonic() - self.opened_at < reset_timeout:
+                return False
+            self.trial = True
+            return True
+
+    def record_success(self) -> None:
+        """Close the breaker, database answered."""
+        if not self.failures and self.opened_at is None:
+            return
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def record_failure(self, threshold: int) -> None:
+        """Count failed attempt, open the breaker after threshold or failed trial.
+
+        Args:
+            threshold: Number of failed attempts in a row which opens the breaker.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.trial or self.failures >= threshold:
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+
+breaker = CircuitBreaker()
+
+
+def is_disconnect(error: Exception) -> bool:
+    """Check whether error means that connection to the database was lost."""
+    return (isinstance(error, DisconnectionError)
+            or isinstance(error, DBAPIError) and error.connection_invalidated)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Get delay before next attempt, exponential backoff with full jitter.
+
+    Args:
+        attempt: Number of failed attempt, starting from 1.
+
+    Returns:
+        Delay in seconds.
+    """
+    cap = min(db_settings["RETRY_MAX_DELAY"], db_settings["RETRY_BASE_DELAY"] * 2 ** (attempt - 1))
+    return random.uniform(0, cap)
+
+
+def _retry_deadline() -> float:
+    """Get time until which the call may be retried.
+
+    Deadline of the request is kept in info of the request session, so it
+    is shared by all model methods called during the request.
+    """
+    deadline = time.monotonic() + db_settings["RETRY_DEADLINE"]
+    session = bound_session.get()
+    if session is None and has_app_context():
+        session = request_session()
+    if session is None:
+        return deadline
+    return session.info.setdefault(RETRY_DEADLINE_KEY, deadline)
+
+
+def _sleep(delay: float) -> None:
+    """Wait before next attempt without blocking the event loop of the async API."""
+    if bound_session.get() is not None:
+        await_only(asyncio.sleep(delay))
+    else:
+        time.sleep(delay)
+
+
+def retry_on_disconnect(method: str) -> Callable:
+    """Decorator which retries model method after lost database connection.
+
+    Args:
+        method: Name of the model method used in metrics.
+
+    Returns:
+        Decorator of the model method.
+    """
+    on_retry = record_retry(method)
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not breaker.allow(db_settings["RETRY_BREAKER_RESET"]):
+                raise DatabaseUnavailable(db_settings["RETRY_BREAKER_RESET"])
+            deadline = None
+            attempt = 0
+            while True:
+                try:
+                    result = function(*args, **kwargs)
+                except DatabaseUnavailable:
+                    # Raised by nested model method, which already retried.
+                    raise
+                except Exception as error:
+                    if not is_disconnect(error):
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure(db_settings["RETRY_BREAKER_THRESHOLD"])
+                    attempt += 1
+                    deadline = deadline or _retry_deadline()
+                    delay = backoff_delay(attempt)
+                    if (attempt >= db_settings["RETRY_TRIES"] or breaker.is_open
+                            or time.monotonic() + delay > deadline or request_rolled_back()):
+                        raise DatabaseUnavailable(db_settings["RETRY_BREAKER_RESET"]) from error
+                    on_retry(error)
+                    _sleep(delay)
+                else:
+                    breaker.record_success()
+                    return result
+        return wrapper
+    return decorator
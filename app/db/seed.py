@@ -0,0 +1,295 @@
+"""Module for seeding database with generated data.
+
+Unlike app/db/test_data.py, seeder generates any number of groups, students,
+courses and enrollments. Data depends only on given sizes and random seed.
+On Postgres rows are loaded with COPY and foreign keys are validated once
+after load, other databases use multi-row INSERT statements. Everything is
+loaded in single transaction.
+"""
+import io
+import random
+import string
+import time
+from contextlib import contextmanager, nullcontext
+from itertools import product
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import Table, delete, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.db import db_session, Student, Course, Group
+from app.db.bulk import chunks
+from app.db.cache import query_cache
+from app.db.models import StudentCourse
+from app.db.test_data import (
+    FIRST_NAME, LAST_NAME, LIST_OF_COURSES, NUMBER_OF_GROUPS, NUMBER_OF_STUDENTS,
+    START_RANGE, END_RANGE, COURSE_START_RANGE, COURSE_END_RANGE)
+
+# Number of rows sent with one COPY or INSERT statement.
+SEED_CHUNK_SIZE = 50000
+# Range of number of students in the group.
+GROUP_SIZE = (START_RANGE, END_RANGE - 1)
+# Range of number of courses of the student.
+COURSES_PER_STUDENT = (COURSE_START_RANGE, COURSE_END_RANGE - 1)
+# Number of distinct group names like AB-21.
+MAX_GROUPS = len(string.ascii_uppercase) ** 2 * len(string.digits) ** 2
+
+DATABASE_NOT_EMPTY = "Database already contains students, use reset to replace them."
+TOO_MANY_GROUPS = "Can not generate more than {} groups."
+INVALID_RANGE = "Invalid range {}, minimum should not be bigger than maximum."
+TOO_MANY_COURSES_PER_STUDENT = "Student can not attend more than {} courses."
+
+# Reserves ids from students id sequence, so rows can be copied with their ids.
+RESERVE_STUDENT_IDS = ("SELECT nextval(pg_get_serial_sequence('students', 'id')) "
+                       "FROM generate_series(1, :count)")
+# Foreign keys of the table, they are checked row by row during load.
+FOREIGN_KEYS = ("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'")
+TRUNCATE_TABLES = 'TRUNCATE student_course, students, courses, "groups" RESTART IDENTITY'
+# Value of NULL in COPY text format.
+COPY_NULL = r"\N"
+
+
+class SeedSummary(NamedTuple):
+    """Number of created rows and time spent."""
+    groups: int
+    students: int
+    courses: int
+    enrollments: int
+    seconds: float
+
+
+def generate_group_names(rng: random.Random, count: int) -> list[str]:
+    """Generates unique group names.
+
+    Example:
+        Group name: AB-21.
+
+    Args:
+        rng: Random generator.
+        count: Number of groups.
+
+    Returns:
+        List of group names.
+    """
+    if count > MAX_GROUPS:
+        raise ValueError(TOO_MANY_GROUPS.format(MAX_GROUPS))
+    letters = [''.join(pair) for pair in product(string.ascii_uppercase, repeat=2)]
+    numbers = len(string.digits) ** 2
+    return [f"{letters[number // numbers]}-{number % numbers:02d}"
+            for number in rng.sample(range(MAX_GROUPS), count)]
+
+
+def generate_courses(count: int) -> dict[str, str]:
+    """Generates courses with description.
+
+    Courses from LIST_OF_COURSES are used first.
+
+    Args:
+        count: Number of courses.
+
+    Returns:
+        Dictionary where key is course and value is description.
+    """
+    names = LIST_OF_COURSES[:count]
+    names += [f"Course {number}" for number in range(len(names) + 1, count + 1)]
+    return {name: f"Subject of {name}" for name in names}
+
+
+def generate_students(rng: random.Random, count: int, group_names: list[str],
+                      group_size: tuple[int, int] = GROUP_SIZE) -> list[tuple[str, str, Optional[str]]]:
+    """Generates students and assigns them to groups.
+
+    Groups get random number of students from group_size range while
+    enough students are left. It is possible that some groups will be
+    without students or students without groups.
+
+    Args:
+        rng: Random generator.
+        count: Number of students.
+        group_names: Names of groups.
+        group_size: Minimum and maximum number of students in the group.
+
+    Returns:
+        List of first name, last name and group id of students.
+    """
+    group_ids = []
+    for group_name in group_names:
+        number = rng.randint(*group_size)
+        if len(group_ids) + number > count:
+            break
+        group_ids.extend([group_name] * number)
+    group_ids.extend([None] * (count - len(group_ids)))
+    rng.shuffle(group_ids)
+    return [(rng.choice(FIRST_NAME), rng.choice(LAST_NAME), group_id) for group_id in group_ids]
+
+
+def generate_enrollments(rng: random.Random, student_ids: Iterable[int], course_ids: list[int],
+                         courses_per_student: tuple[int, int] = COURSES_PER_STUDENT
+                         ) -> Iterator[tuple[int, int]]:
+    """Randomly assigns courses to students.
+
+    Args:
+        rng: Random generator.
+        student_ids: IDs of students.
+        course_ids: IDs of courses.
+        courses_per_student: Minimum and maximum number of courses of the student.
+
+    Yields:
+        Student id and course id.
+    """
+    for student_id in student_ids:
+        for course_id in rng.sample(course_ids, rng.randint(*courses_per_student)):
+            yield student_id, course_id
+
+
+def _check_range(value: tuple[int, int]) -> None:
+    """Raise ValueError when range minimum is bigger than maximum."""
+    if value[0] > value[1] or value[0] < 0:
+        raise ValueError(INVALID_RANGE.format(value))
+
+
+def _copy(session: Session, table: Table, columns: list[str],
+          rows: Iterable[tuple], chunk_size: int) -> int:
+    """Load rows to the table with COPY FROM STDIN.
+
+    Rows are sent in chunks, so memory does not grow with number of rows.
+
+    Returns:
+        Number of loaded rows.
+    """
+    preparer = session.get_bind().dialect.identifier_preparer
+    statement = f"COPY {preparer.format_table(table)} ({', '.join(columns)}) FROM STDIN"
+    cursor = session.connection().connection.cursor()
+    count = 0
+    for chunk in chunks(rows, chunk_size):
+        data = "".join("\t".join(COPY_NULL if value is None else str(value) for value in row) + "\n"
+                       for row in chunk)
+        cursor.copy_expert(statement, io.StringIO(data))
+        count += len(chunk)
+    return count
+
+
+@contextmanager
+def _without_foreign_keys(session: Session, table: Table):
+    """Drop foreign keys of the table and add them back on exit.
+
+    Adding constraint validates all rows with single query, which is
+    several times faster than checking every copied row. Constraints are
+    dropped in the seeding transaction, so they are never missing for
+    other sessions.
+    """
+    preparer = session.get_bind().dialect.identifier_preparer
+    table_name = preparer.format_table(table)
+    foreign_keys = session.execute(text(FOREIGN_KEYS), {"table": table_name}).all()
+    for name, _ in foreign_keys:
+        session.execute(text(f"ALTER TABLE {table_name} DROP CONSTRAINT {preparer.quote(name)}"))
+    yield
+    for name, definition in foreign_keys:
+        session.execute(text(f"ALTER TABLE {table_name} ADD CONSTRAINT {preparer.quote(name)} {definition}"))
+
+
+def _insert(session: Session, table: Table, columns: list[str],
+            rows: Iterable[tuple], chunk_size: int) -> int:
+    """Load rows to the table with multi-row INSERT statements.
+
+    Returns:
+        Number of loaded rows.
+    """
+    count = 0
+    for chunk in chunks(rows, chunk_size):
+        session.execute(insert(table), [dict(zip(columns, row)) for row in chunk])
+        count += len(chunk)
+    return count
+
+
+def _insert_students(session: Session, students: list[tuple], use_copy: bool, chunk_size: int) -> list[int]:
+    """Load students and return their ids in input order."""
+    columns = ["first_name", "last_name", "group_id"]
+    if use_copy:
+        student_ids = list(session.scalars(text(RESERVE_STUDENT_IDS), {"count": len(students)}))
+        rows = ((student_id, *student) for student_id, student in zip(student_ids, students))
+        with _without_foreign_keys(session, Student.__table__):
+            _copy(session, Student.__table__, ["id"] + columns, rows, chunk_size)
+        return student_ids
+
+    student_ids = []
+    statement = insert(Student).returning(Student.id, sort_by_parameter_order=True)
+    for chunk in chunks(students, chunk_size):
+        student_ids.extend(session.scalars(statement, [dict(zip(columns, row)) for row in chunk]))
+    return student_ids
+
+
+def _clear(session: Session, use_copy: bool) -> None:
+    """Delete all seeded tables."""
+    if use_copy:
+        session.execute(text(TRUNCATE_TABLES))
+        return
+    for model in (StudentCourse, Student, Course, Group):
+        session.execute(delete(model))
+
+
+def seed_database(students: int = NUMBER_OF_STUDENTS,
+                  groups: int = NUMBER_OF_GROUPS,
+                  courses: int = len(LIST_OF_COURSES),
+                  group_size: tuple[int, int] = GROUP_SIZE,
+                  courses_per_student: tuple[int, int] = COURSES_PER_STUDENT,
+                  seed: int = 0,
+                  reset: bool = False,
+                  chunk_size: int = SEED_CHUNK_SIZE) -> SeedSummary:
+    """Fill database with generated data.
+
+    Course ids are known before enrollments are generated, so enrollments
+    are loaded without any lookup queries.
+
+    Args:
+        students: Number of students.
+        groups: Number of groups.
+        courses: Number of courses.
+        group_size: Minimum and maximum number of students in the group.
+        courses_per_student: Minimum and maximum number of courses of the student.
+        seed: Seed of random generator, same seed generates same data.
+        reset: Delete existing data before seeding.
+        chunk_size: Number of rows sent with one statement.
+
+    Returns:
+        Summary with number of created rows.
+
+    Raises:
+        ValueError: When database already has students and reset is not set,
+            or when sizes are invalid.
+    """
+    for value in (group_size, courses_per_student):
+        _check_range(value)
+    if courses_per_student[1] > courses:
+        raise ValueError(TOO_MANY_COURSES_PER_STUDENT.format(courses))
+
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    group_names = generate_group_names(rng, groups)
+    course_rows = generate_courses(courses)
+    student_rows = generate_students(rng, students, group_names, group_size)
+
+    with db_session() as session:
+        use_copy = session.get_bind().dialect.name == "postgresql"
+        if reset:
+            _clear(session, use_copy)
+        elif session.scalar(select(Student.id).limit(1)) is not None:
+            raise ValueError(DATABASE_NOT_EMPTY)
+        load = _copy if use_copy else _insert
+
+        load(session, Group.__table__, ["id"], ((name,) for name in group_names), chunk_size)
+        course_ids = list(session.scalars(
+            insert(Course).returning(Course.id, sort_by_parameter_order=True),
+            [{"course_name": name, "description": desc} for name, desc in course_rows.items()]
+        )) if course_rows else []
+        student_ids = _insert_students(session, student_rows, use_copy, chunk_size)
+        enrollment_rows = generate_enrollments(rng, student_ids, course_ids, courses_per_student)
+        with _without_foreign_keys(session, StudentCourse.__table__) if use_copy else nullcontext():
+            enrollments = load(session, StudentCourse.__table__, ["student_id", "course_id"],
+                               enrollment_rows, chunk_size)
+        session.commit()
+    query_cache.clear()
+
+    return SeedSummary(len(group_names), len(student_ids), len(course_ids), enrollments,
+                       time.perf_counter() - start)
@@ -0,0 +1,47 @@
+ALTER TABLE "groups" ADD COLUMN IF NOT EXISTS student_count INT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS ix_groups_student_count ON "groups" (student_count, id);
+
+-- Statement level triggers update every affected group once per statement,
+-- so bulk inserts and deletes do not update group rows once per student.
+CREATE OR REPLACE FUNCTION sync_group_student_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE "groups" AS g
+        SET student_count = g.student_count + changed.number
+        FROM (SELECT group_id, count(*) AS number
+              FROM new_students
+              WHERE group_id IS NOT NULL
+              GROUP BY group_id) AS changed
+        WHERE g.id = changed.group_id;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE "groups" AS g
+        SET student_count = g.student_count - changed.number
+        FROM (SELECT group_id, count(*) AS number
+              FROM old_students
+              WHERE group_id IS NOT NULL
+              GROUP BY group_id) AS changed
+        WHERE g.id = changed.group_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS students_insert_group_count ON students;
+CREATE TRIGGER students_insert_group_count
+    AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_students
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_group_student_count();
+
+DROP TRIGGER IF EXISTS students_update_group_count ON students;
+CREATE TRIGGER students_update_group_count
+    AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_students NEW TABLE AS new_students
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_group_student_count();
+
+DROP TRIGGER IF EXISTS students_delete_group_count ON students;
+CREATE TRIGGER students_delete_group_count
+    AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_students
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_group_student_count();
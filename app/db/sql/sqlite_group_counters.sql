@@ -0,0 +1,21 @@
+-- SQLite counterpart of group_counters.sql. SQLite has no statement level
+-- triggers, so the counter of the group changes once per changed student.
+-- groups.student_count column is created from the models.
+CREATE TRIGGER IF NOT EXISTS students_insert_group_count AFTER INSERT ON students
+WHEN NEW.group_id IS NOT NULL
+BEGIN
+    UPDATE "groups" SET student_count = student_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS students_update_group_count AFTER UPDATE OF group_id ON students
+WHEN NEW.group_id IS NOT OLD.group_id
+BEGIN
+    UPDATE "groups" SET student_count = student_count - 1 WHERE id = OLD.group_id;
+    UPDATE "groups" SET student_count = student_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS students_delete_group_count AFTER DELETE ON students
+WHEN OLD.group_id IS NOT NULL
+BEGIN
+    UPDATE "groups" SET student_count = student_count - 1 WHERE id = OLD.group_id;
+END;
@@ -0,0 +1,60 @@
+-- SQLite counterpart of data versions from migrations 0003_data_versions.sql
+-- and 0004_group_versions.sql.
+-- SQLite has no sequences, data_version_seq is a table with the last value,
+-- and no statement level triggers, so versions change once per changed row.
+CREATE TABLE IF NOT EXISTS data_version_seq (value INTEGER NOT NULL);
+INSERT INTO data_version_seq (value) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM data_version_seq);
+INSERT OR IGNORE INTO data_versions (name, version) VALUES ('groups', 0);
+
+CREATE TRIGGER IF NOT EXISTS courses_insert_version AFTER INSERT ON courses
+BEGIN
+    UPDATE data_version_seq SET value = value + 1;
+    UPDATE courses SET roster_version = (SELECT value FROM data_version_seq) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS student_course_insert_version AFTER INSERT ON student_course
+BEGIN
+    UPDATE data_version_seq SET value = value + 1;
+    UPDATE courses SET roster_version = (SELECT value FROM data_version_seq) WHERE id = NEW.course_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS student_course_delete_version AFTER DELETE ON student_course
+BEGIN
+    UPDATE data_version_seq SET value = value + 1;
+    UPDATE courses SET roster_version = (SELECT value FROM data_version_seq) WHERE id = OLD.course_id;
+END;
+
+-- Group sizes change when student with group is inserted, deleted or moved.
+-- Updated students also change rosters of their courses.
+CREATE TRIGGER IF NOT EXISTS students_insert_version AFTER INSERT ON students
+WHEN NEW.group_id IS NOT NULL
+BEGIN
+    UPDATE "groups" SET version = version + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS students_delete_version AFTER DELETE ON students
+WHEN OLD.group_id IS NOT NULL
+BEGIN
+    UPDATE "groups" SET version = version + 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS students_update_version AFTER UPDATE ON students
+BEGIN
+    UPDATE data_version_seq SET value = value + 1;
+    UPDATE courses SET roster_version = (SELECT value FROM data_version_seq)
+    WHERE id IN (SELECT course_id FROM student_course WHERE student_id = NEW.id);
+    UPDATE "groups" SET version = version + 1
+    WHERE id IN (OLD.group_id, NEW.group_id) AND NEW.group_id IS NOT OLD.group_id;
+END;
+
+-- Deleted groups move their versions to the 'groups' row, renamed group
+-- gets new version.
+CREATE TRIGGER IF NOT EXISTS groups_rename_version AFTER UPDATE OF id ON "groups"
+BEGIN
+    UPDATE "groups" SET version = OLD.version + 1 WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_delete_version AFTER DELETE ON "groups"
+BEGIN
+    UPDATE data_versions SET version = version + OLD.version + 1 WHERE name = 'groups';
+END;
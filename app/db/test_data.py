@@ -1,10 +1,8 @@
-"""Module for generating test data and adding them to database"""
+"""Module for generating test data, database is seeded by app.db.seed"""
 import random
 import string
 from typing import Optional, Union
 
-from app.db import Student, Group, Course, db_session
-
 # 20 first names.
 FIRST_NAME = ['Monica', 'Rachel', 'Phoeby', 'Daniela', 'Rebecca', 'Eva',
               'Alexandra', 'Katherine', 'Lisa', 'Hannah', 'Sonny', 'Pedro',
@@ -128,70 +126,3 @@ def get_courses_with_description() -> dict[str: str]:
     """
     course_description = {course: f'Subject of {course}' for course in LIST_OF_COURSES}
     return course_description
-
-
-def add_test_data_to_groups_table(list_of_groups: list) -> None:
-    """Adds test data to groups table.
-
-    Args:
-        list_of_groups: list of randomly generated groups.
-    """
-    Group.create_multiple_groups(list_of_groups)
-
-
-def add_test_data_to_students_table(
-        students_groups: dict[Optional[str]: Union[list[str], list]]) -> None:
-    """Add test data to students table.
-
-    Args:
-        students_groups: dictionary of groups and students.
-    """
-    for group, students in students_groups.items():
-        # Create students in single group.
-        Student.create_multiple_students(students, group)
-
-
-def add_test_data_to_course_table() -> None:
-    """Add test data to course table."""
-    # Get input data.
-    course_dict = get_courses_with_description()
-    Course.create_multiple_courses(course_dict)
-
-
-def add_students_to_course() -> None:
-    """Assign course to student.
-
-    Randomly assign from 1 to 3 courses for each student.
-    """
-    with db_session() as session:
-        # Get all students.
-        students = session.query(Student).all()
-        for student in students:
-            # For each student get random number from 1 to 3 and get equivalent
-            # number of unique courses from list of courses.
-            number = random.choice(range(COURSE_START_RANGE, COURSE_END_RANGE))
-            course_list = random.sample(LIST_OF_COURSES, k=number)
-            for course_name in course_list:
-                # Assign each course to student.
-                course = session.query(Course).filter(Course.course_name == course_name).first()
-                student.courses.append(course)
-        session.commit()
-
-
-def add_test_data_to_database() -> None:
-    """Adds test data to database"""
-    # Check if DB already have test data in it.
-    with db_session() as session:
-        if not session.query(Student).first():
-            # Get randomly generated groups and students.
-            students_groups = students_to_groups()
-
-            # Remove all None value keys to create groups.
-            group_list = [group
-                          for group in list(students_groups.keys())
-                          if group is not None]
-            add_test_data_to_groups_table(group_list)
-
-            add_test_data_to_students_table(students_groups)
-            add_test_data_to_course_table()
-            add_students_to_course()
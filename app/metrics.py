@@ -0,0 +1,126 @@
+"""Module for Prometheus metrics.
+
+Exports request latency histogram per route, in-flight requests, connection
+pool usage and number of retried model calls on /metrics. Metrics require
+prometheus_client. Under gunicorn with several workers set
+PROMETHEUS_MULTIPROC_DIR to an empty directory, so values of all workers
+are kept in shared files and summed on scrape.
+"""
+import os
+import time
+
+from flask import Blueprint, Flask, Response, g, request
+
+from app.db.db import pool_status
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+metrics_bp = Blueprint("metrics", __name__)
+
+MULTIPROC_DIR = "PROMETHEUS_MULTIPROC_DIR"
+# Key of flask.g with request start time.
+METRICS_START_KEY = "metrics_start"
+# Route label of requests which did not match any route.
+UNMATCHED_ROUTE = "unmatched"
+# Latency buckets in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = prometheus_client.Histogram(
+        "http_request_duration_seconds", "Request latency.",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS)
+    REQUESTS_IN_FLIGHT = prometheus_client.Gauge(
+        "http_requests_in_flight", "Requests being handled.", multiprocess_mode="livesum")
+    POOL_CHECKED_OUT = prometheus_client.Gauge(
+        "db_pool_checked_out", "Connections checked out from the pool.", multiprocess_mode="livesum")
+    POOL_OVERFLOW = prometheus_client.Gauge(
+        "db_pool_overflow", "Connections opened over the pool size.", multiprocess_mode="livesum")
+    DB_RETRIES = prometheus_client.Counter(
+        "db_retries", "Model calls retried after database disconnection.", ["method"])
+
+
+def record_retry(method: str):
+    """Create retry callback which counts retries of the model method.
+
+    Args:
+        method: Name of the model method.
+
+    Returns:
+        Callback which retry_on_disconnect() calls with the error before
+        every retry of the model method.
+    """
+    def callback(error: Exception) -> None:
+        if prometheus_client is not None:
+            DB_RETRIES.labels(method).inc()
+    return callback
+
+
+def _update_pool_gauges() -> None:
+    """Set pool gauges from pool of the current process."""
+    status = pool_status()
+    POOL_CHECKED_OUT.set(status["checked_out"])
+    POOL_OVERFLOW.set(status["overflow"])
+
+
+def _start_request() -> None:
+    """Count request as in flight and remember its start."""
+    g.setdefault(METRICS_START_KEY, time.perf_counter())
+    REQUESTS_IN_FLIGHT.inc()
+
+
+def _observe_request(response: Response) -> Response:
+    """Observe request latency and pool usage."""
+    route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+    REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(
+        time.perf_counter() - g.get(METRICS_START_KEY, time.perf_counter()))
+    _update_pool_gauges()
+    return response
+
+
+def _finish_request(exception=None) -> None:
+    """Remove request from in flight requests."""
+    if g.pop(METRICS_START_KEY, None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
+
+
+@metrics_bp.route("/metrics")
+def metrics() -> Response:
+    """Export metrics in Prometheus text format."""
+    _update_pool_gauges()
+    if os.environ.get(MULTIPROC_DIR):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(prometheus_client.generate_latest(registry),
+                    mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app: Flask) -> None:
+    """Register metrics endpoint and request hooks.
+
+    Nothing is registered when prometheus_client is not installed.
+
+    Args:
+        app: Flask application.
+    """
+    if prometheus_client is None:
+        return
+    app.register_blueprint(metrics_bp)
+    app.before_request(_start_request)
+    app.after_request(_observe_request)
+    app.teardown_request(_finish_request)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Remove live gauges of exited worker, called from gunicorn child_exit hook.
+
+    Args:
+        pid: Process id of the worker.
+    """
+    if prometheus_client is not None and os.environ.get(MULTIPROC_DIR):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,4 @@
+from app import create_async_app
+from app.constants import DEVELOPMENT
+
+app = create_async_app(DEVELOPMENT)
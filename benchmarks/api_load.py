@@ -0,0 +1,356 @@
+"""Load benchmark of every REST API route at several database sizes.
+
+For every scale the database is seeded with seed_database() and a fixed
+random seed, so runs on the same machine are comparable, then the sync
+API is started with gunicorn. Every scenario is driven by concurrent
+clients for a fixed time and its throughput, latency percentiles, status
+codes and queries per request (X-DB-Queries header) are written to a JSON
+file. Conditional scenarios send If-None-Match with ETag of the previous
+response to the same URL, so they measure 304 answers. Scenarios which
+write run after the read ones. Two result files are
+compared with the compare command, which exits with 1 on regression.
+Requires gunicorn and aiohttp.
+
+Usage:
+    python -m benchmarks.api_load run --scales 1k,100k,1M --output results.json
+    python -m benchmarks.api_load compare baseline.json results.json --threshold 10
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Callable, NamedTuple, Optional
+
+import aiohttp
+from sqlalchemy import func, select
+
+from app.db import db_session, Student, Course, Group
+from app.db.instrumentation import DB_QUERIES_HEADER
+from app.db.seed import seed_database
+from benchmarks.async_load import HOST, server_command, wait_for_server
+
+# Number of ids, names and groups sampled for request parameters.
+SAMPLE_SIZE = 1000
+# Average number of students in the group of seeded database.
+STUDENTS_PER_GROUP = 20
+SCALE_SUFFIXES = {"k": 1000, "m": 1000000}
+IMPORT_BODY = "first_name,last_name,group_id\n" + "".join(f"Load{number},Import,\n" for number in range(100))
+
+
+class Scenario(NamedTuple):
+    """Request sent repeatedly to one route.
+
+    Attributes:
+        name: Endpoint name, same as in SQL_QUERY_BUDGETS, with variant after a dot.
+        method: HTTP method.
+        url: URL template formatted with request parameters.
+        json: Function which builds JSON body from request parameters.
+        data: Raw body.
+        headers: Request headers.
+        conditional: Send If-None-Match with ETag of the previous response to the URL.
+    """
+    name: str
+    method: str
+    url: str
+    json: Optional[Callable[[dict], object]] = None
+    data: Optional[str] = None
+    headers: Optional[dict] = None
+    conditional: bool = False
+
+
+SCENARIOS = (
+    Scenario("students", "GET", "/api/v1/students/"),
+    Scenario("students.page", "GET", "/api/v1/students/?limit=100"),
+    Scenario("students.group", "GET", "/api/v1/students/?group_id={group}&limit=100"),
+    Scenario("students.name", "GET", "/api/v1/students/?name={prefix}&limit=100"),
+    Scenario("students.stream", "GET", "/api/v1/students/?stream=true&group_id={group}"),
+    Scenario("students.msgpack", "GET", "/api/v1/students/?limit=100", headers={"Accept": "application/msgpack"}),
+    Scenario("coursestudents", "GET", "/api/v1/courses/{course}/students"),
+    Scenario("coursestudents.page", "GET", "/api/v1/courses/{course}/students?limit=100"),
+    Scenario("coursestudents.conditional", "GET", "/api/v1/courses/{course}/students", conditional=True),
+    Scenario("groups", "GET", "/api/v1/groups/?student_count=25"),
+    Scenario("groups.page", "GET", "/api/v1/groups/?student_count=25&order_by=size&limit=100"),
+    Scenario("groups.conditional", "GET", "/api/v1/groups/?student_count=25", conditional=True),
+    Scenario("export.groups", "GET", "/api/v1/export/?table=groups"),
+    # Writes.
+    Scenario("students.create", "POST", "/api/v1/students/",
+             json=lambda params: {"first_name": "Load", "last_name": "Test", "group_id": params["group"]}),
+    Scenario("studentsimport", "POST", "/api/v1/students/import", data=IMPORT_BODY,
+             headers={"Content-Type": "text/csv"}),
+    Scenario("studentcourses.put", "PUT", "/api/v1/students/{student_id}/courses/",
+             json=lambda params: {"courses": [params["course"]]}),
+    Scenario("studentcourses.delete", "DELETE", "/api/v1/students/{student_id}/courses/?course={course}"),
+    Scenario("enrollments", "PUT", "/api/v1/enrollments/",
+             json=lambda params: {"student_ids": params["student_ids"], "courses": [params["course"]]}),
+    Scenario("singlestudent.delete", "DELETE", "/api/v1/students/{unique_student_id}/"),
+)
+
+
+def parse_scale(value: str) -> int:
+    """Parse number of students like 1000, 100k or 1M."""
+    multiplier = SCALE_SUFFIXES.get(value[-1:].lower(), 1)
+    number = value[:-1] if multiplier > 1 else value
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid scale '{value}'")
+
+
+def seed(students: int, random_seed: int) -> dict:
+    """Seed database with given number of students and sample request parameters.
+
+    Returns:
+        Lists of student ids, first name prefixes, course names and group names.
+    """
+    groups = max(1, students // STUDENTS_PER_GROUP)
+    seed_database(students=students, groups=groups, seed=random_seed, reset=True)
+    with db_session() as session:
+        rows = session.execute(select(Student.id, Student.first_name)
+                               .order_by(func.random()).limit(SAMPLE_SIZE)).all()
+        return {
+            "student_ids": [row.id for row in rows],
+            "prefixes": sorted({row.first_name[:2] for row in rows}),
+            "courses": list(session.scalars(select(Course.course_name))),
+            "groups": list(session.scalars(select(Group.id).limit(SAMPLE_SIZE))),
+        }
+
+
+class Parameters:
+    """Random request parameters from the sample of seeded data."""
+    def __init__(self, sample: dict, rng: random.Random):
+        self.sample = sample
+        self.rng = rng
+        # Every student is deleted once.
+        self.unique_student_ids = iter(rng.sample(sample["student_ids"], len(sample["student_ids"])))
+
+    def student_id(self) -> int:
+        return self.rng.choice(self.sample["student_ids"])
+
+    def student_ids(self) -> list[int]:
+        return self.rng.sample(self.sample["student_ids"], min(10, len(self.sample["student_ids"])))
+
+    def unique_student_id(self) -> int:
+        return next(self.unique_student_ids, 0)
+
+    def prefix(self) -> str:
+        return self.rng.choice(self.sample["prefixes"])
+
+    def course(self) -> str:
+        return self.rng.choice(self.sample["courses"])
+
+    def group(self) -> str:
+        return self.rng.choice(self.sample["groups"])
+
+
+class RequestParameters(dict):
+    """Parameters of one request, each is drawn when the scenario uses it."""
+    def __init__(self, parameters: Parameters):
+        super().__init__()
+        self.parameters = parameters
+
+    def __missing__(self, key: str):
+        value = self[key] = getattr(self.parameters, key)()
+        return value
+
+
+async def client(session: aiohttp.ClientSession, base_url: str, scenario: Scenario, parameters: Parameters,
+                 deadline: float, stats: dict) -> None:
+    """Send requests of the scenario one after another until deadline."""
+    # ETags of conditional scenario by URL.
+    etags = {}
+    while time.perf_counter() < deadline:
+        params = RequestParameters(parameters)
+        url = base_url + scenario.url.format_map(params)
+        headers = scenario.headers
+        if url in etags:
+            headers = {**(headers or {}), "If-None-Match": etags[url]}
+        start = time.perf_counter()
+        try:
+            async with session.request(scenario.method, url,
+                                       json=scenario.json(params) if scenario.json else None,
+                                       data=scenario.data, headers=headers) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            stats["statuses"]["error"] += 1
+            continue
+        if scenario.conditional and "ETag" in response.headers:
+            etags[url] = response.headers["ETag"]
+        stats["latencies"].append(time.perf_counter() - start)
+        stats["statuses"][str(response.status)] += 1
+        if DB_QUERIES_HEADER in response.headers:
+            stats["queries"].append(int(response.headers[DB_QUERIES_HEADER]))
+
+
+def percentile(values: list[float], value: float) -> float:
+    """Get percentile of sorted values in milliseconds."""
+    return values[min(len(values) - 1, int(len(values) * value))] * 1000 if values else 0
+
+
+async def run_scenario(base_url: str, scenario: Scenario, parameters: Parameters, clients: int,
+                       duration: float) -> dict:
+    """Drive the scenario with concurrent clients.
+
+    Returns:
+        Dictionary with throughput, latency percentiles in ms, status counts and queries per request.
+    """
+    stats = {"latencies": [], "statuses": Counter(), "queries": []}
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client(session, base_url, scenario, parameters, deadline, stats)
+                               for _ in range(clients)))
+    latencies = sorted(stats["latencies"])
+    queries = stats["queries"]
+    errors = stats["statuses"]["error"] + sum(count for status, count in stats["statuses"].items()
+                                              if status.startswith("5"))
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / duration, 1),
+        "p50": round(percentile(latencies, 0.5), 2),
+        "p95": round(percentile(latencies, 0.95), 2),
+        "p99": round(percentile(latencies, 0.99), 2),
+        "errors": errors,
+        "statuses": dict(stats["statuses"]),
+        "queries_mean": round(sum(queries) / len(queries), 2) if queries else None,
+        "queries_max": max(queries, default=None),
+    }
+
+
+def run_scale(students: int, args: argparse.Namespace, scenarios: list[Scenario]) -> dict:
+    """Seed database, start the server and run every scenario."""
+    sample = seed(students, args.seed)
+    base_url = f"http://{HOST}:{args.port}"
+    server = subprocess.Popen(server_command("sync", args.port, args.workers, args.threads))
+    results = {}
+    try:
+        asyncio.run(wait_for_server(base_url))
+        parameters = Parameters(sample, random.Random(args.seed))
+        for scenario in scenarios:
+            asyncio.run(run_scenario(base_url, scenario, parameters, args.clients, args.warmup))
+            result = asyncio.run(run_scenario(base_url, scenario, parameters, args.clients, args.duration))
+            results[scenario.name] = result
+            print(f"{students:>9} {scenario.name:<28} {result['rps']:>9.1f} {result['p50']:>9.1f} "
+                  f"{result['p95']:>9.1f} {result['p99']:>9.1f} {result['queries_mean'] or 0:>8.2f} "
+                  f"{result['errors']:>7}")
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Get commit of the working tree, if it is a git repository."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run benchmark at every scale and write results."""
+    scenarios = [scenario for scenario in SCENARIOS
+                 if not args.scenario or scenario.name.split(".")[0] in args.scenario
+                 or scenario.name in args.scenario]
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "clients": args.clients,
+            "duration": args.duration,
+            "workers": args.workers,
+            "threads": args.threads,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    print(f"{'students':>9} {'scenario':<28} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'queries':>8} {'errors':>7}")
+    for students in args.scales:
+        report["results"][str(students)] = run_scale(students, args, scenarios)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}.")
+
+
+def compare(args: argparse.Namespace) -> int:
+    """Compare two result files.
+
+    Scenario regresses when its p95 latency grows or its throughput drops by
+    more than threshold percent, when it runs more queries per request or
+    when it starts failing.
+
+    Returns:
+        Exit code, 1 when any scenario regressed.
+    """
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    with open(args.current) as file:
+        current = json.load(file)["results"]
+    limit = args.threshold / 100
+    regressions = 0
+    print(f"{'students':>9} {'scenario':<28} {'req/s':>9} {'p95':>9} {'queries':>14}")
+    for scale, results in current.items():
+        for name, new in results.items():
+            old = baseline.get(scale, {}).get(name)
+            if old is None:
+                continue
+            rps = (new["rps"] - old["rps"]) / old["rps"] if old["rps"] else 0
+            p95 = (new["p95"] - old["p95"]) / old["p95"] if old["p95"] else 0
+            reasons = []
+            if rps < -limit:
+                reasons.append("throughput")
+            if p95 > limit:
+                reasons.append("latency")
+            if (new["queries_mean"] or 0) > (old["queries_mean"] or 0) + 0.01:
+                reasons.append("queries")
+            if new["errors"] > old["errors"]:
+                reasons.append("errors")
+            regressions += bool(reasons)
+            print(f"{scale:>9} {name:<28} {rps:>+9.1%} {p95:>+9.1%} "
+                  f"{old['queries_mean'] or 0:>6.2f} -> {new['queries_mean'] or 0:<6.2f}"
+                  f"{'  REGRESSION: ' + ', '.join(reasons) if reasons else ''}")
+    print(f"{regressions} regressions.")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmark.")
+    run_parser.add_argument("--scales", default=[1000, 100000], help="Numbers of students, e.g. 1k,100k,1M.",
+                            type=lambda value: [parse_scale(scale) for scale in value.split(",")])
+    run_parser.add_argument("--scenario", action="append",
+                            help="Scenario or endpoint to run, e.g. students or groups.page. All by default.")
+    run_parser.add_argument("--clients", type=int, default=16, help="Number of concurrent clients.")
+    run_parser.add_argument("--duration", type=float, default=10, help="Seconds of load per scenario.")
+    run_parser.add_argument("--warmup", type=float, default=1, help="Seconds of load before measuring.")
+    run_parser.add_argument("--workers", type=int, default=2, help="Server processes.")
+    run_parser.add_argument("--threads", type=int, default=8, help="Threads of the worker.")
+    run_parser.add_argument("--port", type=int, default=8765, help="Port of the server.")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of data and request parameters.")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="Results file.")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files.")
+    compare_parser.add_argument("baseline", help="Results of the previous run.")
+    compare_parser.add_argument("current", help="Results of the new run.")
+    compare_parser.add_argument("--threshold", type=float, default=10,
+                                help="Allowed change of latency and throughput in percent.")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
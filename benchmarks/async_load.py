@@ -0,0 +1,140 @@
+"""Load test of sync (wsgi.py) and async (asgi.py) API.
+
+Starts each server, keeps the given number of concurrent clients sending
+read requests for a fixed time and prints throughput and latency
+percentiles. Both servers get the same number of processes and the same
+connection pool per process. Sync API handles at most workers x threads
+requests at once, async API handles all clients in the event loop.
+Requires gunicorn, uvicorn and aiohttp.
+
+Usage:
+    python -m benchmarks.async_load --clients 500 --duration 20 --students 10000
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+
+import aiohttp
+from sqlalchemy import select
+
+from app.db import db_session, Course
+from app.db.seed import seed_database
+
+HOST = "127.0.0.1"
+# Read requests, {course} is replaced with random course name.
+URLS = (
+    "/api/v1/students/?limit=20",
+    "/api/v1/courses/{course}/students?limit=20",
+    "/api/v1/groups/?student_count=25",
+)
+
+
+def server_command(name: str, port: int, workers: int, threads: int) -> list[str]:
+    """Command which starts sync or async server."""
+    if name == "sync":
+        return [sys.executable, "-m", "gunicorn", "wsgi:app", "--bind", f"{HOST}:{port}",
+                "--workers", str(workers), "--threads", str(threads), "--log-level", "warning"]
+    return [sys.executable, "-m", "uvicorn", "asgi:app", "--host", HOST, "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+
+
+async def wait_for_server(base_url: str, timeout: float = 30) -> None:
+    """Wait until server answers requests."""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(base_url + URLS[0]) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def client(session: aiohttp.ClientSession, urls: list[str], deadline: float,
+                 latencies: list[float], errors: list[int]) -> None:
+    """Send requests one after another until deadline."""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            async with session.get(random.choice(urls)) as response:
+                await response.read()
+                if response.status >= 500:
+                    errors.append(response.status)
+                    continue
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            errors.append(0)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def load(base_url: str, courses: list[str], clients: int, duration: float) -> dict:
+    """Run concurrent clients against the server.
+
+    Returns:
+        Dictionary with requests per second, latency percentiles in ms and number of errors.
+    """
+    urls = [base_url + url.format(course=course) for url in URLS for course in courses[:20]]
+    latencies, errors = [], []
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client(session, urls, deadline, latencies, errors)
+                               for _ in range(clients)))
+    latencies.sort()
+
+    def percentile(value: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * value))] * 1000 if latencies else 0
+
+    return {"rps": len(latencies) / duration, "p50": percentile(0.5), "p95": percentile(0.95),
+            "p99": percentile(0.99), "errors": len(errors)}
+
+
+def run_server(name: str, args: argparse.Namespace, courses: list[str]) -> dict:
+    """Start the server, warm it up, measure it and stop it."""
+    base_url = f"http://{HOST}:{args.port}"
+    server = subprocess.Popen(server_command(name, args.port, args.workers, args.threads))
+    try:
+        asyncio.run(wait_for_server(base_url))
+        asyncio.run(load(base_url, courses, min(args.clients, 50), 2))
+        return asyncio.run(load(base_url, courses, args.clients, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500, help="Number of concurrent clients.")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load per server.")
+    parser.add_argument("--workers", type=int, default=2, help="Server processes.")
+    parser.add_argument("--threads", type=int, default=16, help="Threads of sync worker.")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the server.")
+    parser.add_argument("--students", type=int, help="Seed database with this number of students first.")
+    parser.add_argument("--server", choices=["sync", "async"], action="append",
+                        help="Server to measure, both by default.")
+    args = parser.parse_args()
+
+    if args.students is not None:
+        seed_database(students=args.students, reset=True)
+    with db_session() as session:
+        courses = list(session.scalars(select(Course.course_name)))
+    if not courses:
+        parser.error("Database is empty, seed it with --students.")
+
+    print(f"{args.clients} clients, {args.workers} workers, {args.duration:.0f} s")
+    print(f"{'server':<8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for name in args.server or ["sync", "async"]:
+        result = run_server(name, args, courses)
+        print(f"{name:<8} {result['rps']:>10.0f} {result['p50']:>10.1f} {result['p95']:>10.1f} "
+              f"{result['p99']:>10.1f} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark of student insert paths.
+
+Compares rows/sec of one ORM object per row (previous implementation of
+Student.create_multiple_students), single multi-row INSERT statement and
+chunked bulk insert with RETURNING.
+
+Usage:
+    python -m benchmarks.bulk_insert --rows 20000
+"""
+import argparse
+import time
+from typing import Callable
+
+from app.db import db_session, Student
+
+# Last name used to find and delete benchmark rows.
+BENCHMARK_LAST_NAME = "Benchmark"
+
+
+def orm_per_row(count: int) -> None:
+    """Insert students adding one ORM object per row."""
+    with db_session() as session:
+        for number in range(count):
+            session.add(Student(first_name=f"S{number}", last_name=BENCHMARK_LAST_NAME))
+        session.commit()
+
+
+def multi_row_insert(count: int) -> None:
+    """Insert students with Student.create_multiple_students."""
+    Student.create_multiple_students([f"S{number} {BENCHMARK_LAST_NAME}" for number in range(count)])
+
+
+def bulk_insert(count: int, chunk_size: int) -> None:
+    """Insert students with Student.bulk_create_students."""
+    Student.bulk_create_students(({"first_name": f"S{number}", "last_name": BENCHMARK_LAST_NAME}
+                                  for number in range(count)),
+                                 chunk_size=chunk_size)
+
+
+def cleanup() -> None:
+    """Delete students created by benchmark."""
+    with db_session() as session:
+        session.query(Student).filter(Student.last_name == BENCHMARK_LAST_NAME).delete()
+        session.commit()
+
+
+def measure(name: str, function: Callable[[int], None], count: int) -> float:
+    """Run insert function and print its throughput.
+
+    Returns:
+        Inserted rows per second.
+    """
+    start = time.perf_counter()
+    function(count)
+    elapsed = time.perf_counter() - start
+    cleanup()
+    rows_per_second = count / elapsed
+    print(f"{name:<20} {count:>8} rows {elapsed:>8.3f} s {rows_per_second:>12.0f} rows/s")
+    return rows_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="Number of students to insert.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per bulk INSERT statement.")
+    args = parser.parse_args()
+
+    cleanup()
+    measure("orm per row", orm_per_row, args.rows)
+    measure("multi-row insert", multi_row_insert, args.rows)
+    measure("bulk insert", lambda count: bulk_insert(count, args.chunk_size), args.rows)
+
+
+if __name__ == "__main__":
+    main()
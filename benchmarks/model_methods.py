@@ -0,0 +1,273 @@
+"""Micro-benchmarks of model methods of Student, Course and Group.
+
+For every data size the database is seeded with seed_database() and a
+fixed random seed, then every method is called several times. Wall time is
+measured without tracing, queries are counted by the SQL instrumentation
+listeners inside a test request context and peak allocated memory is
+measured with tracemalloc in one extra call. Query cache is disabled unless
+--cache is given, so every call reaches the database. Methods which run
+more queries or allocate more memory on bigger data (N+1 loads, whole
+table hydration) are listed at the end.
+
+Usage:
+    python -m benchmarks.model_methods --sizes 1k,10k,100k --repeat 5
+    python -m benchmarks.model_methods --sizes 1k,100k --method Course --output models.json
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from collections import deque
+from itertools import count
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from flask import Flask
+from sqlalchemy import delete, func, select
+
+from app import create_app
+from app.constants import DEVELOPMENT
+from app.db import db_session, Student, Course, Group
+from app.db.cache import configure_cache
+from app.db.db import commit_unit_of_work
+from app.db.instrumentation import request_stats
+from app.db.models import StudentCourse
+from app.db.seed import seed_database
+from benchmarks.api_load import STUDENTS_PER_GROUP, git_revision, parse_scale
+
+# Last name of created students and name of created courses, used to delete them.
+BENCHMARK_LAST_NAME = "Benchmark"
+BENCHMARK_COURSE = "Benchmark"
+# Created groups are lowercase, seeded groups are uppercase.
+BENCHMARK_GROUP_PREFIX = "b"
+# Number of students enrolled or removed at once.
+BATCH = 100
+
+_names = count()
+# Groups created by benchmark, deleted by id, because LIKE of SQLite ignores case.
+_created_groups: set[str] = set()
+
+
+def group_names(number: int) -> list[str]:
+    """Get names of new groups, they are deleted by cleanup()."""
+    names = [f"{BENCHMARK_GROUP_PREFIX}{next(_names) % 10000:04d}" for _ in range(number)]
+    _created_groups.update(names)
+    return names
+
+
+def course_names(number: int) -> dict[str, str]:
+    """Get new courses with description."""
+    return {f"{BENCHMARK_COURSE} {next(_names)}": BENCHMARK_COURSE for _ in range(number)}
+
+
+class Case(NamedTuple):
+    """Benchmarked call of a model method.
+
+    Attributes:
+        name: Method name with variant in brackets.
+        call: Function which calls the method with prepared data.
+        setup: Function which prepares data before every call, it is not measured.
+    """
+    name: str
+    call: Callable[[dict], Any]
+    setup: Optional[Callable[[dict], None]] = None
+
+
+def enroll(data: dict, student_ids: list[int]) -> None:
+    """Enroll students to the benchmark course."""
+    Student.add_students_to_courses(student_ids, [BENCHMARK_COURSE])
+
+
+def create_student(data: dict) -> None:
+    """Create student which is deleted by the call."""
+    data["new_student_id"] = Student.create_student("Bench", BENCHMARK_LAST_NAME)
+
+
+CASES = (
+    Case("Student.create_student",
+         lambda data: Student.create_student("Bench", BENCHMARK_LAST_NAME, data["group"])),
+    Case("Student.create_multiple_students",
+         lambda data: Student.create_multiple_students(
+             [f"S{number} {BENCHMARK_LAST_NAME}" for number in range(BATCH)], data["group"])),
+    Case("Student.bulk_create_students",
+         lambda data: Student.bulk_create_students(
+             {"first_name": f"S{number}", "last_name": BENCHMARK_LAST_NAME, "group_id": data["group"]}
+             for number in range(10 * BATCH))),
+    Case("Student.get_student", lambda data: Student.get_student(data["student_id"])),
+    Case("Student.get_all_students", lambda data: Student.get_all_students()),
+    Case("Student.get_students_page", lambda data: Student.get_students_page(BATCH)),
+    Case("Student.get_students_page[group]",
+         lambda data: Student.get_students_page(BATCH, group_id=data["group"])),
+    Case("Student.get_students_page[name]",
+         lambda data: Student.get_students_page(BATCH, name_prefix=data["prefix"])),
+    Case("Student.iter_students", lambda data: Student.iter_students()),
+    Case("Student.add_student_to_course",
+         lambda data: Student.add_student_to_course(data["student_id"], [BENCHMARK_COURSE])),
+    Case("Student.add_students_to_courses",
+         lambda data: Student.add_students_to_courses(data["student_ids"], [BENCHMARK_COURSE])),
+    Case("Student.remove_student_from_course",
+         lambda data: Student.remove_student_from_course(data["student_id"], BENCHMARK_COURSE),
+         setup=lambda data: enroll(data, [data["student_id"]])),
+    Case("Student.remove_student_from_courses",
+         lambda data: Student.remove_student_from_courses(data["student_id"], [BENCHMARK_COURSE]),
+         setup=lambda data: enroll(data, [data["student_id"]])),
+    Case("Student.delete_student", lambda data: Student.delete_student(data["new_student_id"]),
+         setup=create_student),
+    Case("Course.create_course", lambda data: Course.create_course(*next(iter(course_names(1).items())))),
+    Case("Course.create_multiple_courses", lambda data: Course.create_multiple_courses(course_names(10))),
+    Case("Course.bulk_create_courses", lambda data: Course.bulk_create_courses(course_names(BATCH))),
+    Case("Course.find_students_in_course", lambda data: Course.find_students_in_course(data["course"])),
+    Case("Course.get_students_page_in_course",
+         lambda data: Course.get_students_page_in_course(data["course"], BATCH)),
+    Case("Course.iter_students_in_course", lambda data: Course.iter_students_in_course(data["course"])),
+    Case("Course.get_roster_version", lambda data: Course.get_roster_version(data["course"])),
+    Case("Course.remove_all_students", lambda data: Course.remove_all_students(BENCHMARK_COURSE),
+         setup=lambda data: enroll(data, data["student_ids"])),
+    Case("Group.create_group", lambda data: Group.create_group(group_names(1)[0])),
+    Case("Group.create_multiple_groups", lambda data: Group.create_multiple_groups(group_names(10))),
+    Case("Group.bulk_create_groups", lambda data: Group.bulk_create_groups(group_names(BATCH))),
+    Case("Group.get_version", lambda data: Group.get_version()),
+    Case("Group.get_all_groups_not_bigger_then",
+         lambda data: Group.get_all_groups_not_bigger_then(25)),
+    Case("Group.get_all_groups_not_bigger_then[size]",
+         lambda data: Group.get_all_groups_not_bigger_then(25, order_by="size", limit=BATCH)),
+)
+
+
+def prepare(students: int, random_seed: int) -> dict:
+    """Seed database and choose arguments of the methods.
+
+    Returns:
+        Dictionary with sampled student ids, prefix of a first name, the most
+        popular course and the biggest group.
+    """
+    seed_database(students=students, groups=max(1, students // STUDENTS_PER_GROUP), seed=random_seed,
+                  reset=True)
+    Course.create_course(BENCHMARK_COURSE, BENCHMARK_COURSE)
+    with db_session() as session:
+        student_ids = list(session.scalars(select(Student.id).order_by(Student.id).limit(BATCH)))
+        course = session.scalar(select(Course.course_name)
+                                .join(StudentCourse, StudentCourse.course_id == Course.id)
+                                .group_by(Course.course_name).order_by(func.count().desc()).limit(1))
+        group = session.scalar(select(Student.group_id).where(Student.group_id.is_not(None))
+                               .group_by(Student.group_id).order_by(func.count().desc()).limit(1))
+        first_name = session.scalar(select(Student.first_name).where(Student.id == student_ids[0]))
+    return {"student_id": student_ids[0], "student_ids": student_ids, "prefix": first_name[:2],
+            "course": course, "group": group}
+
+
+def cleanup() -> None:
+    """Delete rows created by benchmark, except the benchmark course."""
+    with db_session() as session:
+        session.execute(delete(Student).where(Student.last_name == BENCHMARK_LAST_NAME))
+        session.execute(delete(Course).where(Course.course_name.like(f"{BENCHMARK_COURSE} %")))
+        if _created_groups:
+            session.execute(delete(Group).where(Group.id.in_(_created_groups)))
+        session.execute(delete(StudentCourse).where(StudentCourse.course_id.in_(
+            select(Course.id).where(Course.course_name == BENCHMARK_COURSE))))
+        session.commit()
+    _created_groups.clear()
+
+
+def call(app: Flask, case: Case, data: dict) -> tuple[float, int]:
+    """Call the method inside test request context.
+
+    Returned iterators are consumed, so streaming methods are measured whole,
+    and changes are committed as after the request.
+
+    Returns:
+        Wall time in seconds and number of queries.
+    """
+    if case.setup:
+        case.setup(data)
+    with app.test_request_context():
+        start = time.perf_counter()
+        result = case.call(data)
+        if isinstance(result, Iterator):
+            deque(result, maxlen=0)
+        commit_unit_of_work()
+        elapsed = time.perf_counter() - start
+        queries = request_stats().count
+    cleanup()
+    return elapsed, queries
+
+
+def measure(app: Flask, case: Case, data: dict, repeat: int) -> dict:
+    """Measure the case several times, then once more under tracemalloc.
+
+    Returns:
+        Dictionary with median and minimum time in ms, queries of the call and peak memory in KiB.
+    """
+    times, queries = [], []
+    for _ in range(repeat):
+        elapsed, number = call(app, case, data)
+        times.append(elapsed)
+        queries.append(number)
+    tracemalloc.start()
+    try:
+        call(app, case, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"median_ms": round(statistics.median(times) * 1000, 3), "min_ms": round(min(times) * 1000, 3),
+            "queries": max(queries), "peak_kib": round(peak / 1024, 1)}
+
+
+def report_scaling(results: dict[int, dict[str, dict]]) -> None:
+    """Print methods which run more queries or use more memory on bigger data."""
+    smallest, largest = min(results), max(results)
+    print(f"\nChange from {smallest} to {largest} students:")
+    for name, small in results[smallest].items():
+        large = results[largest].get(name)
+        if large is None:
+            continue
+        reasons = []
+        if large["queries"] > small["queries"]:
+            reasons.append(f"queries {small['queries']} -> {large['queries']}")
+        memory = large["peak_kib"] / small["peak_kib"] if small["peak_kib"] else 1
+        if memory > 2:
+            reasons.append(f"peak memory x{memory:.1f}")
+        if reasons:
+            print(f"{name:<44} {', '.join(reasons)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=[1000, 10000], help="Numbers of students, e.g. 1k,10k,100k.",
+                        type=lambda value: [parse_scale(size) for size in value.split(",")])
+    parser.add_argument("--repeat", type=int, default=5, help="Measured calls of every method.")
+    parser.add_argument("--method", action="append",
+                        help="Method or class to run, e.g. Course or Student.create_student. All by default.")
+    parser.add_argument("--cache", action="store_true", help="Keep query cache enabled.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of generated data.")
+    parser.add_argument("--output", help="Write results to JSON file.")
+    args = parser.parse_args()
+
+    app = create_app(DEVELOPMENT)
+    if not args.cache:
+        configure_cache({"CACHE_BACKEND": "null"})
+    cases = [case for case in CASES if not args.method
+             or any(case.name == method or case.name.split(".")[0] == method
+                    or case.name.split("[")[0] == method for method in args.method)]
+
+    results = {}
+    print(f"{'students':>9} {'method':<44} {'median ms':>10} {'min ms':>10} {'queries':>8} {'peak KiB':>10}")
+    for students in args.sizes:
+        data = prepare(students, args.seed)
+        results[students] = {}
+        for case in cases:
+            result = results[students][case.name] = measure(app, case, data, args.repeat)
+            print(f"{students:>9} {case.name:<44} {result['median_ms']:>10.2f} {result['min_ms']:>10.2f} "
+                  f"{result['queries']:>8} {result['peak_kib']:>10.1f}")
+    if len(results) > 1:
+        report_scaling(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"meta": {"revision": git_revision(), "repeat": args.repeat, "cache": args.cache,
+                                "seed": args.seed},
+                       "results": {str(size): result for size, result in results.items()}}, file, indent=2)
+        print(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Micro-benchmark of reading students.
+
+Compares per-row cost of loading Student objects and converting them with
+dict_helper (previous read path) against selecting columns into StudentRow.
+
+Usage:
+    python -m benchmarks.student_rows --rows 50000
+"""
+import argparse
+import time
+from typing import Callable
+
+from sqlalchemy import select
+
+from app.api.helper_functions import dict_helper
+from app.db import db_session, Student
+from app.db.models import STUDENT_ROW_COLUMNS, _student_rows
+
+# Last name used to find and delete benchmark rows.
+BENCHMARK_LAST_NAME = "Benchmark"
+
+
+def orm_objects() -> list[dict]:
+    """Load Student objects and convert them to dictionaries."""
+    with db_session() as session:
+        students = session.query(Student).filter(Student.last_name == BENCHMARK_LAST_NAME).all()
+        return dict_helper(students)
+
+
+def column_rows() -> list[dict]:
+    """Select student columns into StudentRow and convert them to dictionaries."""
+    query = select(*STUDENT_ROW_COLUMNS).where(Student.last_name == BENCHMARK_LAST_NAME)
+    with db_session() as session:
+        return dict_helper(list(_student_rows(session, query)))
+
+
+def measure(name: str, function: Callable[[], list], repeat: int) -> float:
+    """Run read function several times and print the best per-row cost.
+
+    Returns:
+        Microseconds per row.
+    """
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(function())
+        best = min(best, time.perf_counter() - start)
+    per_row = best / rows * 1_000_000
+    print(f"{name:<12} {rows:>8} rows {best:>8.3f} s {per_row:>8.2f} us/row")
+    return per_row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000, help="Number of students to read.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs, the best one is reported.")
+    args = parser.parse_args()
+
+    Student.bulk_create_students({"first_name": f"S{number}", "last_name": BENCHMARK_LAST_NAME}
+                                 for number in range(args.rows))
+    try:
+        orm = measure("orm objects", orm_objects, args.repeat)
+        rows = measure("column rows", column_rows, args.repeat)
+        print(f"speedup      {orm / rows:.1f}x")
+    finally:
+        with db_session() as session:
+            session.query(Student).filter(Student.last_name == BENCHMARK_LAST_NAME).delete()
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
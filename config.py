@@ -1,7 +1,8 @@
 """Module contains app configurations"""
 import logging
+import os
 
-from sqlalchemy import URL
+from sqlalchemy import URL, make_url
 
 from app.constants import LOGGING_FILE, LOGGING_FORMAT, DEVELOPMENT, TESTING, DEFAULT
 
@@ -15,6 +16,25 @@ url_object = URL.create(
 )
 
 
+def database_url(variable: str, default: URL) -> URL:
+    """Read database URL from environment variable.
+
+    "{worker}" in the URL is replaced by id of pytest-xdist worker ("main"
+    without xdist), so every worker of parallel test run has own database.
+
+    Args:
+        variable: Name of environment variable.
+        default: URL used when variable is not set.
+
+    Returns:
+        Database URL.
+    """
+    url = os.environ.get(variable)
+    if url is None:
+        return default
+    return make_url(url.replace("{worker}", os.environ.get("PYTEST_XDIST_WORKER", "main")))
+
+
 class Config:
     """Base configuration class.
 
@@ -23,10 +43,75 @@ class Config:
     DEBUG = False
     TESTING = False
 
+    # Database of the engine, DATABASE_URL environment variable replaces it.
+    # Postgres schema is created by migrations, SQLite schema by "flask db
+    # upgrade" from the models (see app/db/migrate.py).
+    SQLALCHEMY_DATABASE_URI = database_url("DATABASE_URL", url_object)
+
+    # Connection pool of the per-process engine.
+    # Every gunicorn worker holds up to POOL_SIZE + MAX_OVERFLOW connections.
+    SQLALCHEMY_POOL_SIZE = 5
+    SQLALCHEMY_MAX_OVERFLOW = 10
+    SQLALCHEMY_POOL_PRE_PING = True
+    SQLALCHEMY_POOL_RECYCLE = 1800
+    SQLALCHEMY_POOL_TIMEOUT = 30
+    # Model calls during request share one transaction, committed after the
+    # request unless its response is an error. Otherwise, every model call
+    # commits its own transaction.
+    SQLALCHEMY_UNIT_OF_WORK = True
+    # Driver of the asyncio engine used by the async API (asgi.py), which
+    # has its own pool with the options above.
+    ASYNC_DATABASE_DRIVER = "postgresql+asyncpg"
+
+    # Retry of model methods after lost database connection. Delays grow
+    # exponentially from RETRY_BASE_DELAY to RETRY_MAX_DELAY with jitter and
+    # all retries of a request fit into RETRY_DEADLINE seconds. After
+    # RETRY_BREAKER_THRESHOLD failed attempts in a row calls fail with 503
+    # for RETRY_BREAKER_RESET seconds.
+    RETRY_TRIES = 3
+    RETRY_BASE_DELAY = 0.1
+    RETRY_MAX_DELAY = 1.0
+    RETRY_DEADLINE = 2.0
+    RETRY_BREAKER_THRESHOLD = 5
+    RETRY_BREAKER_RESET = 10
+
+    # Read group sizes from groups.student_count maintained by triggers.
+    # Triggers are installed with "flask counters install".
+    GROUP_STUDENT_COUNTER = False
+
+    # Read-through cache of course rosters and group sizes.
+    # CACHE_BACKEND is "memory" (LRU with TTL per process), "redis" (shared) or "null".
+    CACHE_BACKEND = "memory"
+    CACHE_MAX_ENTRIES = 1024
+    CACHE_TTL = 60
+    CACHE_REDIS_URL = "redis://localhost:6379/0"
+
+    # SQL instrumentation. Statements slower than SQL_SLOW_QUERY_MS are logged
+    # (None disables). Requests running more statements than the budget of
+    # their endpoint (or SQL_QUERY_BUDGET) are logged, or fail when enforced.
+    SQL_SLOW_QUERY_MS = 100
+    SQL_QUERY_BUDGET = None
+    SQL_QUERY_BUDGETS = {
+        "api.students": 2,
+        "api.singlestudent": 2,
+        "api.studentcourses": 3,
+        "api.enrollments": 3,
+        "api.coursestudents": 2,
+        "api.groups": 2,
+    }
+    SQL_ENFORCE_QUERY_BUDGET = False
+
+    # Warn on startup when indexes expected by the models are missing.
+    # Check needs database round trip, so it is off unless enabled.
+    CHECK_SCHEMA_ON_STARTUP = False
+
 
 class DevelopmentConfig(Config):
     """Configuration for development"""
     DEBUG = True
+    CHECK_SCHEMA_ON_STARTUP = True
+    # Local database restarts quickly.
+    RETRY_BREAKER_RESET = 2
 
     @staticmethod
     def init_app(config_name: str):
@@ -36,13 +121,19 @@ class DevelopmentConfig(Config):
                             level=logging.DEBUG,
                             format=LOGGING_FORMAT)
 
-        from app.db.test_data import add_test_data_to_database
-        add_test_data_to_database()
-
 
 class TestingConfig(Config):
     """Configuration for testing"""
     TESTING = True
+    # TEST_DATABASE_URL runs tests without Postgres, e.g. on shared in-memory
+    # SQLite "sqlite:///file:students?mode=memory&cache=shared&uri=true" or on
+    # SQLite file per worker "sqlite:///students-{worker}.db".
+    SQLALCHEMY_DATABASE_URI = database_url("TEST_DATABASE_URL", url_object)
+    SQL_ENFORCE_QUERY_BUDGET = True
+    RETRY_BASE_DELAY = 0.001
+    RETRY_MAX_DELAY = 0.01
+    RETRY_DEADLINE = 0.1
+    RETRY_BREAKER_RESET = 0.1
 
     @staticmethod
     def init_app(config_name: str):
@@ -52,9 +143,6 @@ class TestingConfig(Config):
                             level=logging.DEBUG,
                             format=LOGGING_FORMAT)
 
-        from app.db.test_data import add_test_data_to_database
-        add_test_data_to_database()
-
 
 config = {
     DEVELOPMENT: DevelopmentConfig,
@@ -7,4 +7,16 @@ setup(
     install_requires=[
         "flask"
     ],
+    extras_require={
+        # Faster JSON encoding and MessagePack responses.
+        "speedups": ["orjson", "msgpack"],
+        # Cache shared by all workers, CACHE_BACKEND = "redis".
+        "cache": ["redis"],
+        # /metrics endpoint.
+        "metrics": ["prometheus_client"],
+        # Async API served from asgi.py.
+        "async": ["quart", "asyncpg", "uvicorn"],
+        # Parquet files and zstd compression of exports.
+        "export": ["pyarrow", "zstandard"]
+    },
 )
@@ -0,0 +1,47 @@
+"""Database of the tests.
+
+Tests run on the database of TestingConfig, Postgres by default. With
+TEST_DATABASE_URL pointing to SQLite they run without Postgres, also in
+parallel with pytest-xdist when every worker has own SQLite file:
+
+    TEST_DATABASE_URL="sqlite:///file:students?mode=memory&cache=shared&uri=true" pytest
+    TEST_DATABASE_URL="sqlite:////tmp/students-{worker}.db" pytest -n 4 --dist loadfile
+
+Tests of one module build on each other, so they run in the same worker.
+
+Tests of Postgres only features are marked with "postgres" and skipped
+on other databases.
+"""
+import pytest
+
+from app.db import get_engine
+from app.db.db import configure_engine
+from app.db.migrate import upgrade
+from app.db.models import Base
+from config import TestingConfig
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register markers and point the engine to the test database."""
+    config.addinivalue_line("markers", "postgres: test needs Postgres database.")
+    configure_engine({"SQLALCHEMY_DATABASE_URI": TestingConfig.SQLALCHEMY_DATABASE_URI})
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """Skip tests marked with "postgres" on other databases."""
+    backend = get_engine().dialect.name
+    if backend == "postgresql":
+        return
+    skip = pytest.mark.skip(reason=f"Needs Postgres, tests run on {backend}.")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    """Create schema of the test database, SQLite database is created empty."""
+    engine = get_engine()
+    if engine.dialect.name == "sqlite":
+        Base.metadata.drop_all(engine)
+    upgrade(engine)
@@ -0,0 +1,168 @@
+"""Tests for async API"""
+import asyncio
+import json
+
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy import select
+
+from app import create_app, create_async_app
+from app.constants import TESTING
+from app.db import db_session, Student, Course, Group
+from app.db.async_db import run_model
+from app.db.seed import seed_database
+
+# Async engine uses asyncpg driver.
+pytestmark = pytest.mark.postgres
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded_database():
+    """Seed a database and delete data once tests are finished."""
+    seed_database(students=100, groups=5, courses=5, courses_per_student=(1, 2), seed=7, reset=True)
+    yield
+    with db_session() as session:
+        session.query(Student).delete()
+        session.query(Group).delete()
+        session.query(Course).delete()
+        session.commit()
+
+
+@pytest.fixture(scope="module")
+def sync_client() -> FlaskClient:
+    """Create test client of the sync application.
+
+    Returns:
+        Flask Client for test purpose.
+    """
+    return create_app(TESTING).test_client()
+
+
+@pytest.fixture(scope="module")
+def async_app():
+    """Create async application."""
+    return create_async_app(TESTING)
+
+
+def request(async_app, method: str, url: str, **kwargs):
+    """Send request to async application in new event loop.
+
+    Returns:
+        Tuple of response and its body.
+    """
+    async def send():
+        async with async_app.test_app() as test_app:
+            response = await test_app.test_client().open(url, method=method, **kwargs)
+            return response, await response.get_data()
+    return asyncio.run(send())
+
+
+def course_name() -> str:
+    """Get name of the first seeded course."""
+    with db_session() as session:
+        return session.scalar(select(Course.course_name).order_by(Course.id))
+
+
+@pytest.mark.parametrize("url", ["/api/v1/students/?limit=7",
+                                 "/api/v1/students/?limit=7&cursor=Nw==",
+                                 "/api/v1/groups/?student_count=100&order_by=size",
+                                 "/api/v1/groups/?student_count=x",
+                                 "/api/v1/students/?limit=0"])
+def test_responses_match_sync_api(url: str, async_app, sync_client: FlaskClient):
+    """Test async API answers with the same status and body as sync API."""
+    response, body = request(async_app, "GET", url)
+    expected = sync_client.get(url)
+    assert response.status_code == expected.status_code
+    assert body == expected.data
+
+
+def test_course_students_and_etag(async_app, sync_client: FlaskClient):
+    """Test course roster has the same ETag as in sync API and answers If-None-Match."""
+    url = f"/api/v1/courses/{course_name()}/students"
+    response, body = request(async_app, "GET", url)
+    expected = sync_client.get(url)
+    assert response.status_code == 200
+    assert body == expected.data
+    assert response.headers["ETag"] == expected.headers["ETag"]
+
+    response, body = request(async_app, "GET", url, headers={"If-None-Match": expected.headers["ETag"]})
+    assert response.status_code == 304
+    assert body == b""
+
+
+def test_streamed_course_students(async_app, sync_client: FlaskClient):
+    """Test streamed JSON array and NDJSON are the same as in sync API."""
+    url = f"/api/v1/courses/{course_name()}/students?stream=true"
+    response, body = request(async_app, "GET", url)
+    assert body == sync_client.get(url).data
+    headers = {"Accept": "application/x-ndjson"}
+    response, body = request(async_app, "GET", url, headers=headers)
+    assert response.mimetype == "application/x-ndjson"
+    assert body == sync_client.get(url, headers=headers).data
+
+
+def test_write_endpoints(async_app):
+    """Test student is created, enrolled and deleted with async API."""
+    course = course_name()
+    response, _ = request(async_app, "POST", "/api/v1/students/",
+                          json={"first_name": "Async", "last_name": "Student"})
+    assert response.status_code == 201
+    student_id = int(response.headers["Location"].split("/")[-2])
+
+    response, body = request(async_app, "PUT", "/api/v1/enrollments/",
+                             json={"student_ids": [student_id], "courses": [course]})
+    assert (response.status_code, body) == (200, b'{"created":1}\n')
+    _, body = request(async_app, "GET", f"/api/v1/courses/{course}/students")
+    assert b'"first_name":"Async"' in body
+
+    response, _ = request(async_app, "DELETE", f"/api/v1/students/{student_id}/")
+    assert response.status_code == 200
+    response, body = request(async_app, "DELETE", f"/api/v1/students/{student_id}/")
+    assert response.status_code == 404
+    assert body == f'{{"message":"A student with ID \'{student_id}\' was not found."}}\n'.encode()
+
+
+@pytest.mark.parametrize("url, body", [("/api/v1/enrollments/", {"student_ids": 5, "courses": ["Art"]}),
+                                       ("/api/v1/enrollments/", [1]),
+                                       ("/api/v1/students/1/courses/", {"courses": [["Art"]]})])
+def test_invalid_bodies_match_sync_api(url: str, body, async_app, sync_client: FlaskClient):
+    """Test bodies of wrong type are rejected as by sync API."""
+    response, data = request(async_app, "PUT", url, json=body)
+    expected = sync_client.put(url, json=body)
+    assert (response.status_code, json.loads(data)) == (400, expected.json)
+
+
+@pytest.mark.parametrize("method, url", [("DELETE", "/api/v1/students/abc/"),
+                                         ("DELETE", "/api/v1/students/abc/courses/?course=Art")])
+def test_student_id_converter_matches_sync_api(method: str, url: str, async_app, sync_client: FlaskClient):
+    """Test student id which is not integer matches no route in both APIs."""
+    response, _ = request(async_app, method, url)
+    assert response.status_code == sync_client.open(url, method=method).status_code == 404
+
+
+def test_import_students(async_app):
+    """Test students are imported from body received in chunks by async API."""
+    group_id = Group.get_all_groups_not_bigger_then(1000)[0]
+    rows = "".join(f"Async{number},Import,{group_id if number % 2 else ''}\n" for number in range(300))
+    response, body = request(async_app, "POST", "/api/v1/students/import",
+                             data="first_name,last_name,group_id\n" + rows + "Bad,Import,XX-00\n",
+                             headers={"Content-Type": "text/csv"})
+    result = json.loads(body)
+    assert (response.status_code, result["created"]) == (200, 300)
+    assert [conflict["row"] for conflict in result["conflicts"]] == [300]
+    with db_session() as session:
+        assert session.query(Student).filter_by(last_name="Import", group_id=group_id).count() == 150
+
+    response, _ = request(async_app, "POST", "/api/v1/students/import", data="name\nAnna\n",
+                          headers={"Content-Type": "text/csv"})
+    assert response.status_code == 400
+
+
+def test_model_methods_use_async_session():
+    """Test model method runs on the session of run_model()."""
+    def current_session():
+        with db_session() as session:
+            return session.bind.dialect.driver
+
+    assert asyncio.run(run_model(current_session)) == "asyncpg"
+    assert current_session() == "psycopg2"
@@ -0,0 +1,118 @@
+"""Tests for query result cache"""
+import pytest
+
+from app.db.cache import MemoryBackend, SharedBackend, NullBackend, QueryCache, create_backend
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of Redis client used by SharedBackend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, pattern):
+        return [key for key in self.data if key.startswith(pattern.rstrip("*"))]
+
+
+@pytest.fixture(params=["memory", "shared"])
+def cache(request) -> QueryCache:
+    """Create cache with every backend.
+
+    Returns:
+        Query cache.
+    """
+    if request.param == "memory":
+        return QueryCache(MemoryBackend(max_entries=10, ttl=60))
+    return QueryCache(SharedBackend(FakeRedis(), ttl=60))
+
+
+def test_result_is_loaded_once(cache: QueryCache):
+    """Test loader is called only on cache miss."""
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_load("course:Art", (), lambda: calls.append(1) or ["Karl"]) == ["Karl"]
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_invalidate_namespace(cache: QueryCache):
+    """Test invalidation reloads only results of the namespace."""
+    cache.get_or_load("course:Art", (), lambda: ["Karl"])
+    cache.get_or_load("course:Math", (), lambda: ["Anna"])
+    cache.invalidate("course:Art")
+    assert cache.get_or_load("course:Art", (), lambda: []) == []
+    assert cache.get_or_load("course:Math", (), lambda: []) == ["Anna"]
+
+
+
+def test_data_version_is_part_of_key(cache: QueryCache):
+    """Test result cached for one version of the data is not read for another one."""
+    cache.get_or_load("course:Art", (), lambda: ["Karl"], data_version=1)
+    assert cache.get_or_load("course:Art", (), lambda: ["Karl", "Anna"], data_version=2) == ["Karl", "Anna"]
+    assert cache.get_or_load("course:Art", (), lambda: [], data_version=2) == ["Karl", "Anna"]
+
+def test_arguments_are_part_of_key(cache: QueryCache):
+    """Test results of different arguments are cached apart."""
+    cache.get_or_load("groups", (10, None), lambda: ["AA-11"])
+    assert cache.get_or_load("groups", (20, None), lambda: ["BB-11"]) == ["BB-11"]
+
+
+def test_clear(cache: QueryCache):
+    """Test clear deletes all results."""
+    cache.get_or_load("groups", (10,), lambda: ["AA-11"])
+    cache.clear()
+    assert cache.get_or_load("groups", (10,), lambda: []) == []
+
+
+def test_memory_backend_evicts_least_recently_used():
+    """Test least recently used entry is evicted when cache is full."""
+    backend = MemoryBackend(max_entries=2, ttl=60)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.evictions == 1
+
+
+def test_memory_backend_expires_entries():
+    """Test entry is not returned after TTL."""
+    backend = MemoryBackend(max_entries=2, ttl=-1)
+    backend.set("a", 1)
+    assert backend.get("a") is None
+    assert backend.evictions == 1
+
+
+def test_shared_backend_version_survives_eviction():
+    """Test missing version does not match versions of stored results."""
+    client = FakeRedis()
+    backend = SharedBackend(client, ttl=60)
+    version = backend.get_version("groups")
+    client.delete("students:groups")
+    assert backend.get_version("groups") != version
+
+
+def test_create_backend():
+    """Test backend is chosen by configuration."""
+    settings = {"CACHE_BACKEND": "null", "CACHE_MAX_ENTRIES": 1, "CACHE_TTL": 1, "CACHE_REDIS_URL": ""}
+    assert isinstance(create_backend(settings), NullBackend)
+    with pytest.raises(ValueError):
+        create_backend({**settings, "CACHE_BACKEND": "disk"})
@@ -1,7 +1,16 @@
 """Tests for functions for test data generation for database"""
 
+import random
 import re
 
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import db_session, get_engine, Student
+from app.db.db import bound_session
+from app.db.models import StudentCourse
+from app.db.seed import seed_database, generate_group_names, generate_students as seed_students
 from app.db.test_data import generate_groups, generate_students, students_to_groups,\
     get_courses_with_description
 
@@ -47,6 +56,44 @@ def test_get_courses_with_description():
     assert len(course_description.values()) == 10
 
 
-
-
-
+def test_seed_generation_is_reproducible():
+    """Test same seed generates same groups and students."""
+    first, second = random.Random(1), random.Random(1)
+    groups = generate_group_names(first, 50)
+    assert groups == generate_group_names(second, 50)
+    assert len(set(groups)) == 50
+    assert seed_students(first, 500, groups) == seed_students(second, 500, groups)
+
+
+@pytest.fixture
+def rolled_back_database():
+    """Bind model calls to transaction which is rolled back once test is finished.
+
+    Commits of the seeder only release savepoints, so seeded and reset
+    tables are never seen by other test modules.
+    """
+    connection = get_engine().connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    token = bound_session.set(session)
+    yield
+    bound_session.reset(token)
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+def test_seed_database(rolled_back_database):
+    """Test seeder creates requested number of rows."""
+    summary = seed_database(students=500, groups=20, courses=15, group_size=(5, 10),
+                            courses_per_student=(2, 3), reset=True, chunk_size=100)
+    assert (summary.groups, summary.students, summary.courses) == (20, 500, 15)
+    with db_session() as session:
+        assert session.scalar(select(func.count()).select_from(Student)) == 500
+        assert session.scalar(select(func.count()).select_from(StudentCourse)) == summary.enrollments
+        assert 1000 <= summary.enrollments <= 1500
+        grouped = session.scalar(select(func.count()).where(Student.group_id.is_not(None)))
+        assert 100 <= grouped <= 200
+
+    with pytest.raises(ValueError):
+        seed_database(students=10)
@@ -0,0 +1,211 @@
+"""Tests for engine and session management"""
+import logging
+
+import pytest
+from flask import Flask
+from sqlalchemy import delete, event, inspect, insert, make_url, select
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app
+from app.constants import TESTING
+from app.db import (
+    db_session, db_settings, get_engine, init_db, pool_status, query_cache, Student, Course, Group)
+from app.db.cache import GROUPS_NAMESPACE
+from app.db.db import _create_engine, commit_unit_of_work, savepoint
+from app.db.instrumentation import parameter_shape
+from app.db.migrate import (
+    get_migrations, upgrade, find_missing_indexes, check_schema, MISSING_COUNTERS_MESSAGE)
+from app.db.models import Base, DataVersion
+
+
+def test_engine_is_created_once():
+    """Test engine is shared between calls."""
+    assert get_engine() is get_engine()
+
+
+def test_session_is_shared_in_app_context():
+    """Test model calls in one application context use the same session."""
+    app = Flask(__name__)
+    init_db(app)
+    with app.app_context():
+        with db_session() as first, db_session() as second:
+            assert first is second
+
+
+def test_session_is_new_outside_app_context():
+    """Test each call outside application context creates new session."""
+    with db_session() as first, db_session() as second:
+        assert first is not second
+
+
+@pytest.fixture
+def commits():
+    """Count commits of the engine and delete created groups and students after test."""
+    committed = []
+    listener = lambda connection: committed.append(1)
+    event.listen(get_engine(), "commit", listener)
+    yield committed
+    event.remove(get_engine(), "commit", listener)
+    with db_session() as session:
+        session.query(Student).filter_by(last_name="Work").delete()
+        session.query(Group).filter(Group.id.like("UW-%")).delete(synchronize_session=False)
+        session.commit()
+
+
+def group_ids() -> list[str]:
+    """Get committed groups created by unit of work tests."""
+    with db_session() as session:
+        return session.scalars(select(Group.id).where(Group.id.like("UW-%")).order_by(Group.id)).all()
+
+
+def test_request_changes_are_committed_once(commits: list):
+    """Test model calls during request are committed together after the request."""
+    app = create_app(TESTING)
+    version = query_cache.backend.get_version(GROUPS_NAMESPACE)
+    with app.test_request_context():
+        Group.create_group("UW-01")
+        Student.create_student("Unit", "Work", "UW-01")
+        assert Group.get_all_groups_not_bigger_then(1) == ["UW-01"]
+        assert not commits
+        assert query_cache.backend.get_version(GROUPS_NAMESPACE) == version
+        commit_unit_of_work()
+    assert len(commits) == 1
+    assert query_cache.backend.get_version(GROUPS_NAMESPACE) > version
+    assert group_ids() == ["UW-01"]
+
+
+def test_failed_request_is_rolled_back(commits: list):
+    """Test changes are rolled back when response is an error or model call failed."""
+    app = create_app(TESTING)
+    with app.test_request_context():
+        Group.create_group("UW-01")
+        commit_unit_of_work(success=False)
+    with app.test_request_context():
+        Group.create_group("UW-02")
+        with pytest.raises(IntegrityError):
+            Group.create_group("UW-02")
+        Group.create_group("UW-03")
+        with pytest.raises(RuntimeError):
+            commit_unit_of_work()
+    assert not commits
+    assert group_ids() == []
+
+
+def test_savepoint_keeps_request_changes(commits: list):
+    """Test failed model call in savepoint rolls back only its own changes."""
+    app = create_app(TESTING)
+    with app.test_request_context():
+        Group.create_group("UW-01")
+        with pytest.raises(IntegrityError), savepoint():
+            Group.create_group("UW-01")
+        Group.create_group("UW-02")
+        commit_unit_of_work()
+    assert group_ids() == ["UW-01", "UW-02"]
+
+
+
+def test_import_chunks_are_committed_during_request(commits: list):
+    """Test bulk import commits every chunk apart from unit of work of the request."""
+    app = create_app(TESTING)
+    students = ({"first_name": f"Unit{number}", "last_name": "Work"} for number in range(5))
+    with app.test_request_context():
+        result = Student.bulk_create_students(students, chunk_size=2)
+        assert len(commits) == 3
+        commit_unit_of_work(success=False)
+    with db_session() as session:
+        assert session.scalars(select(Student.id).where(Student.last_name == "Work")
+                               .order_by(Student.id)).all() == result.ids
+
+def test_request_is_committed_by_endpoint():
+    """Test write endpoint commits and failed one does not."""
+    client = create_app(TESTING).test_client()
+    response = client.post("/api/v1/students/", json={"first_name": "Unit", "last_name": "Work"})
+    assert response.status_code == 201
+    student_id = int(response.headers["Location"].strip("/").split("/")[-1])
+    with db_session() as session:
+        assert session.get(Student, student_id) is not None
+    response = client.post("/api/v1/students/", json={"first_name": "Unit", "last_name": "Work",
+                                                      "group_id": "UW-99"})
+    assert response.status_code == 400
+    Student.delete_student(student_id)
+
+
+def test_pool_status():
+    """Test pool status contains pool usage."""
+    status = pool_status()
+    assert set(status) == {"size", "checked_in", "checked_out", "overflow"}
+
+
+def test_migrations_are_ordered():
+    """Test migrations are ordered by version."""
+    migrations = get_migrations()
+    assert [migration.version for migration in migrations] == sorted({m.version for m in migrations})
+    assert migrations[0].transactional
+
+
+def test_no_transaction_migration_is_split():
+    """Test migration outside of transaction is split to statements."""
+    indexes = next(migration for migration in get_migrations() if not migration.transactional)
+    statements = indexes.statements()
+    assert statements
+    assert all("CONCURRENTLY" in statement for statement in statements)
+
+
+def test_upgrade_creates_expected_indexes():
+    """Test all expected indexes exist after upgrade."""
+    upgrade()
+    assert upgrade() == []
+    assert find_missing_indexes() == []
+
+
+def test_declared_columns_match_database():
+    """Test models declare every column of migrated tables."""
+    upgrade()
+    inspector = inspect(get_engine())
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        assert columns == set(table.columns.keys())
+
+
+def test_sqlite_schema_from_models(tmp_path):
+    """Test SQLite database in WAL mode gets schema of the models and version triggers."""
+    engine = _create_engine(make_url(f"sqlite:///{tmp_path / 'students.db'}"))
+    assert find_missing_indexes(engine)
+    assert upgrade(engine) == []
+    assert find_missing_indexes(engine) == []
+    with engine.begin() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        groups_version = connection.scalar(select(DataVersion.version))
+        connection.execute(insert(Group), [{"id": "AA-11"}])
+        connection.execute(insert(Course), [{"course_name": "Math", "description": "Numbers"}])
+        with connection.begin_nested() as savepoint:
+            connection.execute(insert(Group), [{"id": "BB-11"}])
+            savepoint.rollback()
+        assert connection.scalars(select(Group.id)).all() == ["AA-11"]
+        assert connection.scalar(select(Course.roster_version)) > groups_version
+        connection.execute(insert(Student), [{"first_name": "Ann", "last_name": "Lee", "group_id": "AA-11"}])
+        group_version = connection.scalar(select(Group.version))
+        assert group_version > 1
+        connection.execute(delete(Student))
+        connection.execute(delete(Group))
+        assert connection.scalar(select(DataVersion.version)) > groups_version + group_version
+    engine.dispose()
+
+
+def test_check_schema_reports_missing_group_counters(tmp_path, monkeypatch, caplog):
+    """Test error is logged when group sizes are read from counters without triggers."""
+    engine = _create_engine(make_url(f"sqlite:///{tmp_path / 'students.db'}"))
+    upgrade(engine)
+    check_schema(logging.getLogger(__name__), engine)
+    assert not caplog.records
+    monkeypatch.setitem(db_settings, "GROUP_STUDENT_COUNTER", True)
+    check_schema(logging.getLogger(__name__), engine)
+    assert [record.getMessage() for record in caplog.records] == [MISSING_COUNTERS_MESSAGE]
+    engine.dispose()
+
+
+def test_parameter_shape():
+    """Test parameter shape contains names and types but not values."""
+    assert parameter_shape({"id": 1, "name": "Karl"}) == "{'id': 'int', 'name': 'str'}"
+    assert parameter_shape([{"id": 1}, {"id": 2}]) == "2 x {'id': 'int'}"
+    assert parameter_shape((1, "Karl")) == "['int', 'str']"
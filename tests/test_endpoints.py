@@ -1,13 +1,18 @@
 """Tests for API endpoints"""
+import csv
 from typing import Union
 from unittest.mock import patch, MagicMock
 
 import pytest
 from flask import json
 from flask.testing import FlaskClient
+from sqlalchemy import insert, select
 from sqlalchemy.exc import NoResultFound, IntegrityError
 
-from app.db import db_session, Student, Course, Group
+from app.db import db_session, get_engine, Student, Course, Group
+from app.db.exceptions import CoursesNotFound, StudentsNotFound
+from app.db.instrumentation import QueryBudgetExceeded
+from app.db.models import StudentCourse
 from app import create_app
 from app.constants import TESTING
 
@@ -36,6 +41,78 @@ def client() -> FlaskClient:
     return app.test_client()
 
 
+class TestGetStudents:
+    """Tests for GET "/api/v1/students/"."""
+
+    students = [Student(id=number, first_name="David", last_name="Bo", group_id="AA-11")
+                for number in range(1, 4)]
+
+    @patch("app.api.students.Student.get_students_page")
+    def test_response_with_next_page(self, mock_get_page: MagicMock, client: FlaskClient):
+        """Test cursor of the next page is returned when more students exist.
+
+        Args:
+            mock_get_page: Mocked method.
+            client: Flask test client.
+        """
+        mock_get_page.return_value = self.students
+        response = client.get("/api/v1/students/?limit=2&group_id=AA-11&name=Da")
+        assert response.status_code == 200
+        assert [student["id"] for student in response.json["students"]] == [1, 2]
+        mock_get_page.assert_called_once_with(3, None, "AA-11", "Da")
+
+        mock_get_page.reset_mock()
+        mock_get_page.return_value = self.students[2:]
+        response = client.get(f"/api/v1/students/?limit=2&cursor={response.json['next']}")
+        assert response.json == {"students": [self.students[2].to_dict()], "next": None}
+        mock_get_page.assert_called_once_with(3, 2, None, None)
+
+    @patch("app.api.students.Student.get_students_page", return_value=[])
+    def test_response_when_no_students_found(self, mock_get_page: MagicMock, client: FlaskClient):
+        """Test response when no students were found.
+
+        Args:
+            mock_get_page: Mocked method.
+            client: Flask test client.
+        """
+        response = client.get("/api/v1/students/")
+        assert response.status_code == 404
+        assert response.json == {"message": "No students were found."}
+
+    @pytest.mark.parametrize(
+        "message, url",
+        [({"message": "parameter 'limit' should be integer from 1 to 1000."},
+          "/api/v1/students/?limit=0"),
+         ({"message": "parameter 'limit' should be integer from 1 to 1000."},
+          "/api/v1/students/?limit=1001"),
+         ({"message": "parameter 'cursor' is invalid."},
+          "/api/v1/students/?cursor=test")])
+    def test_response_with_bad_parameter(self, message: dict, url: str, client: FlaskClient):
+        """Test response when query parameters are invalid.
+
+        Args:
+            message: Error message in response body.
+            url: Request url.
+            client: Flask test client.
+        """
+        response = client.get(url)
+        assert response.status_code == 400
+        assert response.json == message
+
+    @patch("app.api.students.Student.iter_students")
+    def test_streamed_response(self, mock_iter_students: MagicMock, client: FlaskClient):
+        """Test all students are streamed as JSON array.
+
+        Args:
+            mock_iter_students: Mocked method.
+            client: Flask test client.
+        """
+        mock_iter_students.return_value = iter(self.students)
+        response = client.get("/api/v1/students/?stream=true")
+        assert response.is_streamed
+        assert response.json == [student.to_dict() for student in self.students]
+
+
 class TestPostStudent:
     """Tests for POST "/api/v1/students/"."""
 
@@ -121,6 +198,18 @@ class TestDeleteStudent:
         assert response.status_code == 404
         assert response.json == {"message": "A student with ID '1' was not found."}
 
+    @patch("app.api.students.Student.delete_student")
+    def test_response_when_id_is_not_integer(self, mock_delete_student: MagicMock, client: FlaskClient):
+        """Test student id which is not integer does not match the route.
+
+        Args:
+            mock_delete_student: Mocked method.
+            client: Flask test client.
+        """
+        response = client.delete("/api/v1/students/abc/")
+        assert response.status_code == 404
+        mock_delete_student.assert_not_called()
+
 
 class TestPutStudentCourses:
     """Tests for PUT /students/<student_id>/courses/"""
@@ -150,7 +239,7 @@ class TestPutStudentCourses:
             client: Flask test client.
         """
         response = client.put("api/v1/students/1/courses/",
-                              data=json.dumps({"courses": "test"}),
+                              data=json.dumps({"courses": ["test"]}),
                               content_type="application/json")
         assert response.status_code == 200
 
@@ -165,11 +254,124 @@ class TestPutStudentCourses:
             client: Flask test client.
         """
         response = client.put("api/v1/students/1/courses/",
-                              data=json.dumps({"courses": "test"}),
+                              data=json.dumps({"courses": ["test"]}),
                               content_type="application/json")
         assert response.status_code == 404
         assert response.json == {"message": "Either student or course was not found."}
 
+    @patch("app.api.students.Student.add_student_to_course",
+           side_effect=CoursesNotFound(["Chess", "Golf"]))
+    def test_response_when_courses_not_found(self,
+                                             mock_put_student_courses: MagicMock,
+                                             client: FlaskClient):
+        """Test unknown course names are listed in response.
+
+        Args:
+            mock_put_student_courses: Mocked method
+            client: Flask test client.
+        """
+        response = client.put("api/v1/students/1/courses/",
+                              data=json.dumps({"courses": ["Art", "Chess", "Golf"]}),
+                              content_type="application/json")
+        assert response.status_code == 404
+        assert response.json == {"message": "Courses were not found: Chess, Golf."}
+
+    @pytest.mark.parametrize(
+        "request_body, message",
+        [(["Art"], {"message": "Request body should be a JSON object."}),
+         ({"courses": "Art"}, {"message": "'courses' should be a list of course names."}),
+         ({"courses": [["Art"]]}, {"message": "'courses' should be a list of course names."})])
+    def test_response_when_body_invalid(self, request_body: Union[dict, list], message: dict,
+                                        client: FlaskClient):
+        """Test response when body or courses have wrong type.
+
+        Args:
+            request_body: Request body.
+            message: Error message in response body.
+            client: Flask test client.
+        """
+        response = client.put("api/v1/students/1/courses/",
+                              data=json.dumps(request_body),
+                              content_type="application/json")
+        assert response.status_code == 400
+        assert response.json == message
+
+
+class TestPutEnrollments:
+    """Tests for PUT /enrollments/"""
+
+    @patch("app.api.students.Student.add_students_to_courses", return_value=4)
+    def test_response_when_success(self, mock_enroll: MagicMock, client: FlaskClient):
+        """Test number of new enrollments is returned.
+
+        Args:
+            mock_enroll: Mocked method
+            client: Flask test client.
+        """
+        response = client.put("api/v1/enrollments/",
+                              data=json.dumps({"student_ids": [1, 2], "courses": ["Art", "History"]}),
+                              content_type="application/json")
+        assert response.status_code == 200
+        assert response.json == {"created": 4}
+        mock_enroll.assert_called_once_with([1, 2], ["Art", "History"])
+
+    @pytest.mark.parametrize(
+        "request_body, message",
+        [({"courses": ["Art"]}, {"message": "No student ids were provided."}),
+         ({"student_ids": [1]}, {"message": "No courses were provided."})])
+    def test_response_when_data_missing(self, request_body: dict, message: dict, client: FlaskClient):
+        """Test response when students or courses are not provided.
+
+        Args:
+            request_body: Request body.
+            message: Error message in response body.
+            client: Flask test client.
+        """
+        response = client.put("api/v1/enrollments/",
+                              data=json.dumps(request_body),
+                              content_type="application/json")
+        assert response.status_code == 400
+        assert response.json == message
+
+    @pytest.mark.parametrize(
+        "request_body, message",
+        [([{"student_ids": [1], "courses": ["Art"]}], {"message": "Request body should be a JSON object."}),
+         ({"student_ids": 5, "courses": ["Art"]}, {"message": "'student_ids' should be a list of integers."}),
+         ({"student_ids": [1, True], "courses": ["Art"]},
+          {"message": "'student_ids' should be a list of integers."}),
+         ({"student_ids": [1], "courses": "Art"}, {"message": "'courses' should be a list of course names."}),
+         ({"student_ids": [1], "courses": [["Art"]]},
+          {"message": "'courses' should be a list of course names."})])
+    def test_response_when_body_invalid(self, request_body: Union[dict, list], message: dict,
+                                        client: FlaskClient):
+        """Test response when body, students or courses have wrong type.
+
+        Args:
+            request_body: Request body.
+            message: Error message in response body.
+            client: Flask test client.
+        """
+        response = client.put("api/v1/enrollments/",
+                              data=json.dumps(request_body),
+                              content_type="application/json")
+        assert response.status_code == 400
+        assert response.json == message
+
+    @patch("app.api.students.Student.add_students_to_courses",
+           side_effect=StudentsNotFound([3, 4]))
+    def test_response_when_students_not_found(self, mock_enroll: MagicMock, client: FlaskClient):
+        """Test unknown student ids are listed in response.
+
+        Args:
+            mock_enroll: Mocked method
+            client: Flask test client.
+        """
+        response = client.put("api/v1/enrollments/",
+                              data=json.dumps({"student_ids": [1, 3, 4], "courses": ["Art"]}),
+                              content_type="application/json")
+        assert response.status_code == 404
+        assert response.json == {"message": "Students were not found: 3, 4."}
+
 
 class TestDeleteStudentCourses:
     """Tests for DELETE /students/<student_id>/courses/"""
@@ -227,6 +429,50 @@ class TestDeleteStudentCourses:
         assert response.json == message
         assert response.status_code == status_code
 
+    @patch("app.api.students.Student.remove_student_from_courses", return_value=2)
+    def test_response_when_several_courses(self,
+                                           mock_remove_student_from_courses: MagicMock,
+                                           client: FlaskClient):
+        """Test student is removed from several courses at once.
+
+        Args:
+            mock_remove_student_from_courses: Mocked method.
+            client: Flask test client.
+        """
+        response = client.delete("api/v1/students/1/courses/?course=Art&course=History",
+                                 content_type="application/json")
+        assert response.status_code == 200
+        assert response.json == {"deleted": 2}
+        mock_remove_student_from_courses.assert_called_once_with(1, ["Art", "History"])
+
+
+class TestDeleteCourseStudents:
+    """Tests for DELETE /courses/<course>/students/"""
+
+    @patch("app.api.courses.Course.remove_all_students", return_value=25)
+    def test_response_when_success(self, mock_remove_all: MagicMock, client: FlaskClient):
+        """Test number of removed students is returned.
+
+        Args:
+            mock_remove_all: Mocked method.
+            client: Flask test client.
+        """
+        response = client.delete("api/v1/courses/Art/students")
+        assert response.status_code == 200
+        assert response.json == {"deleted": 25}
+
+    @patch("app.api.courses.Course.remove_all_students", side_effect=CoursesNotFound(["Golf"]))
+    def test_response_when_course_not_found(self, mock_remove_all: MagicMock, client: FlaskClient):
+        """Test response when course does not exist.
+
+        Args:
+            mock_remove_all: Mocked method.
+            client: Flask test client.
+        """
+        response = client.delete("api/v1/courses/Golf/students")
+        assert response.status_code == 404
+        assert response.json == {"message": "Courses were not found: Golf."}
+
 
 class TestGetCourseStudents:
     """Tests for GET /courses/<course>/students/"""
@@ -273,6 +519,211 @@ class TestGetCourseStudents:
         assert response.json == {"message": "No students were found."}
 
 
+class TestGetCourseStudentsPages:
+    """Tests for paginated and streamed GET /courses/<course>/students/"""
+
+    students = [{"id": number, "first_name": "David", "last_name": "Bo", "group_id": "AA-11"}
+                for number in range(1, 4)]
+
+    @patch("app.api.courses.Course.get_students_page_in_course")
+    def test_response_with_next_page(self, mock_get_page: MagicMock, client: FlaskClient):
+        """Test page of students with cursor of the next page.
+
+        Args:
+            mock_get_page: Mocked method.
+            client: Flask test client.
+        """
+        mock_get_page.return_value = self.students
+        response = client.get("api/v1/courses/Art/students?limit=2")
+        assert response.status_code == 200
+        assert response.json["students"] == self.students[:2]
+        mock_get_page.assert_called_once_with("Art", 3, None)
+
+        mock_get_page.reset_mock()
+        mock_get_page.return_value = self.students[2:]
+        response = client.get(f"api/v1/courses/Art/students?cursor={response.json['next']}")
+        assert response.json == {"students": self.students[2:], "next": None}
+        mock_get_page.assert_called_once_with("Art", 101, 2)
+
+    @patch("app.api.courses.Course.iter_students_in_course")
+    def test_streamed_json_array(self, mock_iter_students: MagicMock, client: FlaskClient):
+        """Test students are streamed as JSON array.
+
+        Args:
+            mock_iter_students: Mocked method.
+            client: Flask test client.
+        """
+        mock_iter_students.return_value = iter(self.students)
+        response = client.get("api/v1/courses/Art/students?stream=true")
+        assert response.is_streamed
+        assert response.json == self.students
+
+    @patch("app.api.courses.Course.iter_students_in_course")
+    def test_streamed_ndjson(self, mock_iter_students: MagicMock, client: FlaskClient):
+        """Test students are streamed as NDJSON when client accepts it.
+
+        Args:
+            mock_iter_students: Mocked method.
+            client: Flask test client.
+        """
+        mock_iter_students.return_value = iter(self.students)
+        response = client.get("api/v1/courses/Art/students?stream=true",
+                              headers={"Accept": "application/x-ndjson"})
+        assert response.mimetype == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == self.students
+
+    @patch("app.api.courses.Course.iter_students_in_course", return_value=iter([]))
+    def test_streamed_response_when_no_students_found(self,
+                                                      mock_iter_students: MagicMock,
+                                                      client: FlaskClient):
+        """Test 404 is returned before streaming when course has no students.
+
+        Args:
+            mock_iter_students: Mocked method.
+            client: Flask test client.
+        """
+        response = client.get("api/v1/courses/Art/students?stream=true")
+        assert response.status_code == 404
+        assert response.json == {"message": "No students were found."}
+
+
+class TestConditionalRequests:
+    """Tests for ETag and If-None-Match of read endpoints."""
+
+    @patch("app.api.groups.Group.get_all_groups_not_bigger_then", return_value=["AA-11"])
+    @patch("app.api.groups.Group.get_version", return_value=7)
+    def test_groups_not_modified(self,
+                                 mock_get_version: MagicMock,
+                                 mock_get_groups: MagicMock,
+                                 client: FlaskClient):
+        """Test groups are not queried when ETag matches.
+
+        Args:
+            mock_get_version: Mocked method.
+            mock_get_groups: Mocked method.
+            client: Flask test client.
+        """
+        response = client.get("api/v1/groups/?student_count=11")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith('"7-')
+        assert "Accept" in response.headers["Vary"]
+
+        response = client.get("api/v1/groups/?student_count=11", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+        mock_get_groups.assert_called_once()
+
+        mock_get_version.return_value = 8
+        response = client.get("api/v1/groups/?student_count=11", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    @patch("app.api.groups.Group.get_all_groups_not_bigger_then", return_value=["AA-11"])
+    @patch("app.api.groups.Group.get_version", return_value=7)
+    def test_etag_depends_on_representation(self,
+                                            mock_get_version: MagicMock,
+                                            mock_get_groups: MagicMock,
+                                            client: FlaskClient):
+        """Test different query string and Accept header give different ETags.
+
+        Args:
+            mock_get_version: Mocked method.
+            mock_get_groups: Mocked method.
+            client: Flask test client.
+        """
+        etags = {client.get(url, headers={"Accept": accept}).headers["ETag"]
+                 for url, accept in [("api/v1/groups/?student_count=11", "application/json"),
+                                     ("api/v1/groups/?student_count=12", "application/json"),
+                                     ("api/v1/groups/?student_count=11", "application/x-ndjson")]}
+        assert len(etags) == 3
+
+    @patch("app.api.courses.Course.iter_students_in_course")
+    @patch("app.api.courses.Course.get_roster_version", return_value=3)
+    def test_course_students_not_modified(self,
+                                          mock_get_version: MagicMock,
+                                          mock_iter_students: MagicMock,
+                                          client: FlaskClient):
+        """Test streamed students have ETag and are not loaded when it matches.
+
+        Args:
+            mock_get_version: Mocked method.
+            mock_iter_students: Mocked method.
+            client: Flask test client.
+        """
+        mock_iter_students.return_value = iter([{"id": 1}])
+        response = client.get("api/v1/courses/Art/students?stream=true")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get("api/v1/courses/Art/students?stream=true", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        mock_iter_students.assert_called_once_with("Art")
+        mock_get_version.assert_called_with("Art")
+
+    def test_cached_course_students_changed_outside_process(self, client: FlaskClient):
+        """Test rows inserted past the process cache are returned under new ETag.
+
+        Args:
+            client: Flask test client.
+        """
+        Course.create_course("Outside", "Changed outside")
+        Student.add_student_to_course(Student.create_student("Cached", "Student"), ["Outside"])
+        response = client.get("api/v1/courses/Outside/students")
+        etag = response.headers["ETag"]
+        assert [student["first_name"] for student in response.json] == ["Cached"]
+
+        # Another process enrolls a student, cache of this process is not invalidated.
+        with get_engine().begin() as connection:
+            course_id = connection.execute(select(Course.id).where(Course.course_name == "Outside")).scalar_one()
+            new_id = connection.execute(insert(Student).values(first_name="Fresh", last_name="Student")
+                                        .returning(Student.id)).scalar_one()
+            connection.execute(insert(StudentCourse).values(student_id=new_id, course_id=course_id))
+
+        response = client.get("api/v1/courses/Outside/students", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert [student["first_name"] for student in response.json] == ["Cached", "Fresh"]
+        response = client.get("api/v1/courses/Outside/students",
+                              headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304
+
+    def test_cached_groups_changed_outside_process(self, client: FlaskClient):
+        """Test group inserted past the process cache is returned under new ETag.
+
+        Args:
+            client: Flask test client.
+        """
+        Group.create_group("YY-98")
+        response = client.get("api/v1/groups/?student_count=0")
+        etag = response.headers["ETag"]
+        assert "ZZ-99" not in response.json
+        with get_engine().begin() as connection:
+            connection.execute(insert(Group).values(id="ZZ-99"))
+
+        response = client.get("api/v1/groups/?student_count=0", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert "ZZ-99" in response.json
+
+    @patch("app.api.courses.Course.find_students_in_course", return_value=[])
+    @patch("app.api.courses.Course.get_roster_version", return_value=None)
+    def test_unknown_course_has_no_etag(self,
+                                        mock_get_version: MagicMock,
+                                        mock_find_method: MagicMock,
+                                        client: FlaskClient):
+        """Test response of unknown course has no ETag.
+
+        Args:
+            mock_get_version: Mocked method.
+            mock_find_method: Mocked method.
+            client: Flask test client.
+        """
+        response = client.get("api/v1/courses/Golf/students", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+
 class TestGetGroups:
     """Tests for GET /groups/"""
 
@@ -290,6 +741,21 @@ class TestGetGroups:
         assert response.status_code == 200
         assert response.json == ["AA-11", "BB-22", "CC-33"]
 
+    @patch("app.api.groups.Group.get_all_groups_not_bigger_then",
+           return_value=["AA-11"])
+    def test_ordering_and_pagination(self, mock_get_groups: MagicMock, client: FlaskClient):
+        """Test ordering and pagination parameters are passed to the query.
+
+        Args:
+            mock_get_groups: Mocked method.
+            client: Flask test client.
+        """
+        response = client.get("api/v1/groups/?student_count=11&order_by=size&limit=1&offset=2",
+                              content_type="application/json")
+        assert response.status_code == 200
+        mock_get_groups.assert_called_once_with(11, order_by="size", limit=1, offset=2,
+                                                version=Group.get_version())
+
     @patch("app.api.groups.Group.get_all_groups_not_bigger_then",
            return_value=None)
     def test_response_when_no_groups_found(self, mock_get_groups: MagicMock, client: FlaskClient):
@@ -309,7 +775,11 @@ class TestGetGroups:
         [({"message": "parameter 'student_count' should be integer."},
           "api/v1/groups/?student_count=test"),
          ({"message": "argument 'student_count' should be provided."},
-          "api/v1/groups/")])
+          "api/v1/groups/"),
+         ({"message": "parameter 'order_by' can only be 'size'."},
+          "api/v1/groups/?student_count=1&order_by=name"),
+         ({"message": "parameters 'limit' and 'offset' should be non-negative integers."},
+          "api/v1/groups/?student_count=1&limit=-1")])
     def test_response_with_bad_parameter(self,
                                          message: dict,
                                          url: str,
@@ -325,3 +795,179 @@ class TestGetGroups:
                               content_type="application/json")
         assert response.status_code == 400
         assert response.json == message
+
+
+class TestRepresentations:
+    """Tests for response representations negotiated from Accept header."""
+
+    @patch("app.api.groups.Group.get_all_groups_not_bigger_then",
+           return_value=["AA-11", "BB-22"])
+    def test_ndjson(self, mock_get_groups: MagicMock, client: FlaskClient):
+        """Test list is encoded as newline delimited JSON.
+
+        Args:
+            mock_get_groups: Mocked method.
+            client: Flask test client.
+        """
+        response = client.get("api/v1/groups/?student_count=1",
+                              headers={"Accept": "application/x-ndjson"})
+        assert response.content_type == "application/x-ndjson"
+        assert response.data == b'"AA-11"\n"BB-22"\n'
+
+    @patch("app.api.groups.Group.get_all_groups_not_bigger_then",
+           return_value=["AA-11", "BB-22"])
+    def test_msgpack(self, mock_get_groups: MagicMock, client: FlaskClient):
+        """Test response is encoded as MessagePack.
+
+        Args:
+            mock_get_groups: Mocked method.
+            client: Flask test client.
+        """
+        msgpack = pytest.importorskip("msgpack")
+        response = client.get("api/v1/groups/?student_count=1",
+                              headers={"Accept": "application/msgpack"})
+        assert response.content_type == "application/msgpack"
+        assert msgpack.unpackb(response.data) == ["AA-11", "BB-22"]
+
+    def test_json_is_default(self, client: FlaskClient):
+        """Test JSON is used when any media type is accepted.
+
+        Args:
+            client: Flask test client.
+        """
+        response = client.get("api/v1/groups/", headers={"Accept": "*/*"})
+        assert response.content_type == "application/json"
+        assert response.json == {"message": "argument 'student_count' should be provided."}
+
+
+class TestQueryInstrumentation:
+    """Tests for query count headers and query budgets with real database."""
+
+    @pytest.fixture
+    def student_id(self) -> int:
+        """Create student and courses.
+
+        Returns:
+            Student ID.
+        """
+        Course.create_multiple_courses({"Budget A": "A", "Budget B": "B"})
+        return Student.create_student("Budget", "Student")
+
+    def test_student_courses_query_count(self, student_id: int, client: FlaskClient):
+        """Test enrolling and removing student reports its queries within budget.
+
+        Args:
+            student_id: ID of created student.
+            client: Flask test client.
+        """
+        response = client.put(f"api/v1/students/{student_id}/courses/",
+                              data=json.dumps({"courses": ["Budget A", "Budget B"]}),
+                              content_type="application/json")
+        assert response.status_code == 200
+        assert 0 < int(response.headers["X-DB-Queries"]) <= 3
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+
+        response = client.delete(f"api/v1/students/{student_id}/courses/?course=Budget%20A&course=Budget%20B")
+        assert response.json == {"deleted": 2}
+        assert int(response.headers["X-DB-Queries"]) <= 3
+
+    def test_query_budget_exceeded(self, client: FlaskClient):
+        """Test request fails when it runs more queries than its budget.
+
+        Args:
+            client: Flask test client.
+        """
+        budgets = client.application.config["SQL_QUERY_BUDGETS"]
+        with patch.dict(budgets, {"api.groups": 0}):
+            with pytest.raises(QueryBudgetExceeded):
+                client.get("api/v1/groups/?student_count=1")
+
+
+@pytest.fixture(scope="class")
+def import_group():
+    """Create group of imported students."""
+    Group.create_group("IM-01")
+
+
+@pytest.mark.usefixtures("import_group")
+class TestStudentsImport:
+    """Tests for POST "/api/v1/students/import" with real database."""
+
+    def test_import_csv(self, client: FlaskClient):
+        """Test students are created from CSV and invalid rows are reported.
+
+        Args:
+            client: Flask test client.
+        """
+        body = ("first_name,last_name,group_id\r\n"
+                "Anna,Import,IM-01\r\n"
+                "Bob,Import,\r\n"
+                "Carl,,IM-01\r\n"
+                "Dora,Import,XX-00\r\n")
+        response = client.post("api/v1/students/import", data=body, content_type="text/csv")
+        assert response.status_code == 200
+        assert response.json["created"] == 2
+        assert [(conflict["row"], conflict["reason"]) for conflict in response.json["conflicts"]] == [
+            (2, "First name and last name should be provided."),
+            (3, "Group id 'XX-00' does not exist.")]
+        with db_session() as session:
+            created = session.query(Student).filter(Student.id.in_(response.json["ids"])).order_by(Student.id)
+            assert [(student.first_name, student.group_id) for student in created] == [
+                ("Anna", "IM-01"), ("Bob", None)]
+
+    def test_import_ndjson_with_csv_report(self, client: FlaskClient):
+        """Test students are created from NDJSON and conflicts are returned as CSV.
+
+        Args:
+            client: Flask test client.
+        """
+        body = ('{"first_name": "Eve", "last_name": "Import", "group_id": "IM-01"}\n'
+                '\n'
+                'not json\n'
+                '{"first_name": "Finn", "last_name": 1}\n')
+        response = client.post("api/v1/students/import", data=body, content_type="application/x-ndjson",
+                               headers={"Accept": "text/csv"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        reason = "Row should be an object with string first_name, last_name and optional group_id."
+        assert list(csv.reader(response.data.decode().splitlines())) == [
+            ["row", "reason", "value"],
+            ["1", reason, '"not json"'],
+            ["2", reason, '{"first_name":"Finn","last_name":1}']]
+
+    @pytest.mark.parametrize("content_type, body", [
+        ("text/csv", b"first_name,last_name\r\nGina,Import\r\n\xff\xfe,Import\r\nHugo,Import\r\n"),
+        ("application/x-ndjson", b'{"first_name": "Gina", "last_name": "Import"}\n'
+                                 b'\xff\xfe{"first_name": "Ivan", "last_name": "Import"}\n'
+                                 b'{"first_name": "Hugo", "last_name": "Import"}\n'),
+    ])
+    def test_import_undecodable_line(self, content_type: str, body: bytes, client: FlaskClient):
+        """Test line which is not valid UTF-8 is reported as conflict of its row.
+
+        Args:
+            content_type: Content type of the body.
+            body: Request body.
+            client: Flask test client.
+        """
+        response = client.post("api/v1/students/import", data=body, content_type=content_type)
+        assert response.status_code == 200
+        assert response.json["created"] == 2
+        assert [(conflict["row"], conflict["reason"]) for conflict in response.json["conflicts"]] == [
+            (1, "Row should be an object with string first_name, last_name and optional group_id.")]
+        assert response.json["conflicts"][0]["value"].startswith("\\xff\\xfe")
+
+    @pytest.mark.parametrize("content_type, body, status", [
+        ("application/json", '[{"first_name": "Anna", "last_name": "Import"}]', 415),
+        ("text/csv", "name,surname\nAnna,Import\n", 400),
+    ])
+    def test_import_errors(self, content_type: str, body: str, status: int, client: FlaskClient):
+        """Test body of other type and CSV without name columns are rejected.
+
+        Args:
+            content_type: Content type of the body.
+            body: Request body.
+            status: Expected status code.
+            client: Flask test client.
+        """
+        response = client.post("api/v1/students/import", data=body, content_type=content_type)
+        assert response.status_code == status
@@ -0,0 +1,110 @@
+"""Tests for export of the database"""
+import csv
+import gzip
+import io
+import json
+import zipfile
+
+import pytest
+from flask.testing import FlaskClient
+
+from app import create_app
+from app.constants import TESTING
+from app.db import db_session, get_engine, pool_status, Student, Course, Group
+from app.db.db import is_memory_database
+from app.db.export import export_archive, export_tables
+from app.db.seed import seed_database
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded_database():
+    """Seed a database and delete data once tests are finished."""
+    seed_database(students=300, groups=5, courses=5, courses_per_student=(1, 2), seed=3, reset=True)
+    yield
+    with db_session() as session:
+        session.query(Student).delete()
+        session.query(Group).delete()
+        session.query(Course).delete()
+        session.commit()
+
+
+def read_archive(chunks) -> dict[str, bytes]:
+    """Read files from streamed ZIP archive."""
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_csv_export():
+    """Test every table is exported as CSV with header and NULL as empty value."""
+    files = read_archive(export_archive())
+    assert list(files) == ["groups.csv", "courses.csv", "students.csv", "student_course.csv"]
+    students = list(csv.DictReader(io.StringIO(files["students.csv"].decode())))
+    with db_session() as session:
+        expected = session.query(Student).order_by(Student.id).all()
+    assert [(int(row["id"]), row["first_name"], row["group_id"] or None) for row in students] == [
+        (student.id, student.first_name, student.group_id) for student in expected]
+    assert files["student_course.csv"].startswith(b"student_id,course_id\n")
+
+
+def test_compressed_ndjson_export_matches_csv():
+    """Test NDJSON compressed with gzip has the same rows as CSV."""
+    files = read_archive(export_archive("ndjson", "gzip", ["courses"]))
+    courses = [json.loads(line) for line in gzip.decompress(files["courses.ndjson.gz"]).splitlines()]
+    csv_files = read_archive(export_archive("csv", tables=["courses"]))
+    assert courses == [{"id": int(row["id"]), "course_name": row["course_name"], "description": row["description"]}
+                       for row in csv.DictReader(io.StringIO(csv_files["courses.csv"].decode()))]
+
+
+def test_parquet_export():
+    """Test Parquet with zstd compression keeps column types and NULLs."""
+    parquet = pytest.importorskip("pyarrow.parquet")
+    pytest.importorskip("zstandard")
+    files = read_archive(export_archive("parquet", "zstd", ["students"]))
+    table = parquet.read_table(io.BytesIO(files["students.parquet"]))
+    with db_session() as session:
+        expected = session.query(Student).order_by(Student.id).all()
+    assert table.column("id").to_pylist() == [student.id for student in expected]
+    assert table.column("group_id").to_pylist() == [student.group_id for student in expected]
+
+
+def test_export_is_consistent_snapshot():
+    """Test students created during export are not exported."""
+    if is_memory_database(get_engine().url):
+        pytest.skip("In-memory SQLite has single connection shared by export and writes.")
+    files = export_tables(tables=["groups", "students"])
+    name, chunks = next(files)
+    assert b"".join(chunks).startswith(b"id\n")
+    student_id = Student.create_student("During", "Export")
+    name, chunks = next(files)
+    assert f"\n{student_id},".encode() not in b"".join(chunks)
+    files.close()
+    Student.delete_student(student_id)
+
+
+def test_stopped_export_releases_connection(monkeypatch: pytest.MonkeyPatch):
+    """Test COPY is stopped and connection is returned when consumer stops reading."""
+    monkeypatch.setattr("app.db.export.COPY_CHUNK_SIZE", 1)
+    checked_out = pool_status()["checked_out"]
+    for name, chunks in export_tables(tables=["students"]):
+        next(chunks)
+        break
+    assert pool_status()["checked_out"] == checked_out
+    assert read_archive(export_archive(tables=["groups"]))["groups.csv"].startswith(b"id\n")
+
+
+def test_export_endpoint(tmp_path):
+    """Test archive is streamed by the endpoint and written by the CLI command."""
+    app = create_app(TESTING)
+    client: FlaskClient = app.test_client()
+    response = client.get("/api/v1/export/?compression=gzip&table=groups&table=students")
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"] == "attachment; filename=export.zip"
+    assert list(read_archive([response.data])) == ["groups.csv.gz", "students.csv.gz"]
+
+    response = client.get("/api/v1/export/?format=xml")
+    assert response.status_code == 400
+    assert response.json == {"message": "Format 'xml' is not supported, use one of: csv, ndjson, parquet."}
+
+    result = app.test_cli_runner().invoke(args=["export", str(tmp_path), "--table", "courses"])
+    assert result.exit_code == 0
+    assert (tmp_path / "courses.csv").read_bytes().startswith(b"id,course_name,description\n")
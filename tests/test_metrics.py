@@ -0,0 +1,60 @@
+"""Tests for Prometheus metrics"""
+import prometheus_client
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy.exc import DisconnectionError
+
+from app import create_app
+from app.constants import TESTING
+from app.db.retry import retry_on_disconnect
+
+
+@pytest.fixture(scope="module")
+def client() -> FlaskClient:
+    """Create test client
+
+    Returns:
+        Flask Client for test purpose.
+    """
+    app = create_app(TESTING)
+    return app.test_client()
+
+
+def sample(name: str, labels: dict) -> float:
+    """Get current value of the metric sample."""
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_latency_is_observed(client: FlaskClient):
+    """Test latency of the request is observed with route label."""
+    labels = {"method": "GET", "route": "/api/v1/groups/", "status": "400"}
+    before = sample("http_request_duration_seconds_count", labels)
+    client.get("/api/v1/groups/")
+    assert sample("http_request_duration_seconds_count", labels) == before + 1
+    assert sample("http_requests_in_flight", {}) == 0
+
+
+def test_metrics_endpoint(client: FlaskClient):
+    """Test metrics are exported in Prometheus text format."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    for name in ("http_request_duration_seconds", "http_requests_in_flight",
+                 "db_pool_checked_out", "db_pool_overflow"):
+        assert name in body
+
+
+def test_retries_are_counted(client: FlaskClient):
+    """Test every retry of the model method is counted."""
+    calls = []
+
+    @retry_on_disconnect("Test.flaky")
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise DisconnectionError
+        return True
+
+    assert flaky()
+    assert sample("db_retries_total", {"method": "Test.flaky"}) == 2
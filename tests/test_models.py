@@ -1,8 +1,11 @@
 """Tests for models"""
 import pytest
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, NoResultFound
 
-from app.db import db_session, Student, Course, Group
+from app.db import db_session, db_settings, get_engine, query_cache, Student, Course, Group
+from app.db.exceptions import CoursesNotFound, StudentsNotFound
+from app.db.counters import install_group_counters, reconcile_group_counters, group_counters_installed
 
 
 @pytest.fixture(scope="module", autouse=True)
@@ -75,6 +78,14 @@ def test_get_all_groups_not_bigger_then():
     assert len(groups) == 3
 
 
+def test_get_all_groups_not_bigger_then_ordered_by_size():
+    """Test groups are ordered by student count and paginated."""
+    groups = Group.get_all_groups_not_bigger_then(1, order_by="size", limit=2)
+    assert groups == ["BB-11", "CC-11"]
+    groups = Group.get_all_groups_not_bigger_then(1, order_by="size", offset=2)
+    assert groups == ["AA-11"]
+
+
 def test_create_multiple_students():
     """Tests for creating multiple student."""
     Student.create_multiple_students(student_list=["Karl First", "Karl Second"],
@@ -101,6 +112,23 @@ def test_get_all_students():
     assert len(students) == 4
 
 
+def test_get_students_page():
+    """Test keyset pagination of students."""
+    first_page = Student.get_students_page(limit=3)
+    second_page = Student.get_students_page(limit=3, after_id=first_page[-1].id)
+    assert len(first_page) == 3
+    assert len(second_page) == 1
+    assert Student.get_students_page(limit=3, group_id="AA-11", name_prefix="Sec")[0].last_name == "Second"
+
+
+def test_iter_students():
+    """Test iteration over students in batches."""
+    students = list(Student.iter_students(batch_size=2))
+    assert [student.id for student in students] == sorted(student.id for student in students)
+    assert len(students) == 4
+    assert len(list(Student.iter_students(name_prefix="Karl"))) == 2
+
+
 def test_delete_student():
     """Test get student."""
     with db_session() as session:
@@ -155,6 +183,31 @@ def test_add_students_to_course():
         assert len(karl.courses) == 2
 
 
+def test_add_student_to_assigned_course():
+    """Test adding student to already assigned course is skipped."""
+    with db_session() as session:
+        karl = session.query(Student).filter_by(first_name="Karl").first()
+    Student.add_student_to_course(karl.id, ["Art"])
+    with db_session() as session:
+        karl = session.query(Student).filter_by(first_name="Karl").first()
+        assert len(karl.courses) == 2
+
+
+def test_add_student_to_unknown_courses():
+    """Test unknown course names are reported."""
+    with db_session() as session:
+        karl = session.query(Student).filter_by(first_name="Karl").first()
+    with pytest.raises(CoursesNotFound) as error:
+        Student.add_student_to_course(karl.id, ["Art", "Golf", "Chess"])
+    assert error.value.course_names == ["Chess", "Golf"]
+
+
+def test_add_unknown_student_to_course():
+    """Test adding non-existing student to the course."""
+    with pytest.raises(NoResultFound):
+        Student.add_student_to_course(0, ["Art"])
+
+
 def test_remove_student_from_course():
     """Test remove student from course."""
     with db_session() as session:
@@ -171,6 +224,22 @@ def test_find_students_in_course():
     assert len(students) == 1
 
 
+def test_student_row_matches_student_to_dict():
+    """Test student row has the same dictionary as Student object."""
+    row = Course.find_students_in_course("History")[0]
+    with db_session() as session:
+        student = session.get(Student, row.id)
+        assert row.to_dict() == student.to_dict()
+
+
+def test_students_in_course_pages_and_stream():
+    """Test paginated and streamed students of the course."""
+    page = Course.get_students_page_in_course("History", limit=10)
+    assert [student["first_name"] for student in page] == ["Karl"]
+    assert Course.get_students_page_in_course("History", limit=10, after_id=page[0]["id"]) == []
+    assert list(Course.iter_students_in_course("History", batch_size=1)) == page
+
+
 def test_student_to_dict():
     """Test student object to dictionary"""
     with db_session() as session:
@@ -184,3 +253,173 @@ def test_student_to_dict():
                          "first_name": karl_first_name,
                          "last_name": karl_last_name,
                          "group_id": karl_group_id}
+
+
+def test_add_students_to_courses():
+    """Test enrolling several students to several courses."""
+    with db_session() as session:
+        student_ids = [student.id for student in session.query(Student).all()]
+    assert Student.add_students_to_courses(student_ids, ["Biology"]) == len(student_ids)
+    assert Student.add_students_to_courses(student_ids, ["Biology"]) == 0
+    with pytest.raises(StudentsNotFound) as error:
+        Student.add_students_to_courses(student_ids + [0], ["Biology"])
+    assert error.value.student_ids == [0]
+
+
+def test_remove_student_from_courses():
+    """Test removing student from several courses with single statement."""
+    with db_session() as session:
+        karl = session.query(Student).filter_by(first_name="Karl").first()
+    assert Student.remove_student_from_courses(karl.id, ["Biology", "History"]) == 2
+    with pytest.raises(ValueError):
+        Student.remove_student_from_courses(karl.id, ["Biology", "History"])
+    with pytest.raises(CoursesNotFound):
+        Student.remove_student_from_courses(karl.id, ["Golf"])
+    with pytest.raises(NoResultFound):
+        Student.remove_student_from_courses(0, ["Biology"])
+
+
+def test_remove_all_students():
+    """Test removing all students from the course."""
+    with db_session() as session:
+        enrolled = len(session.query(Course).filter_by(course_name="Biology").one().students)
+    assert Course.remove_all_students("Biology") == enrolled
+    assert Course.remove_all_students("Biology") == 0
+    with pytest.raises(CoursesNotFound):
+        Course.remove_all_students("Golf")
+
+
+def test_course_roster_cache_is_invalidated_by_writes():
+    """Test cached students of the course are reloaded after every write."""
+    Student.create_student("Roster", "Cache")
+    with db_session() as session:
+        student_id = session.query(Student).filter_by(first_name="Roster").one().id
+    before = Course.find_students_in_course("History")
+    hits = query_cache.stats()["hits"]
+    assert Course.find_students_in_course("History") == before
+    assert query_cache.stats()["hits"] == hits + 1
+
+    Student.add_student_to_course(student_id, ["History"])
+    assert student_id in [student.id for student in Course.find_students_in_course("History")]
+    Student.remove_student_from_course(student_id, "History")
+    assert Course.find_students_in_course("History") == before
+
+    Student.add_students_to_courses([student_id], ["History"])
+    Student.delete_student(student_id)
+    assert Course.find_students_in_course("History") == before
+
+
+def test_group_cache_is_invalidated_by_writes():
+    """Test cached groups are reloaded after student of the group is changed."""
+    Group.create_group("CA-11")
+    assert "CA-11" in Group.get_all_groups_not_bigger_then(0)
+    Student.create_student("Group", "Cache", "CA-11")
+    assert "CA-11" not in Group.get_all_groups_not_bigger_then(0)
+    with db_session() as session:
+        student_id = session.query(Student).filter_by(first_name="Group").one().id
+    Student.delete_student(student_id)
+    assert "CA-11" in Group.get_all_groups_not_bigger_then(0)
+
+
+def test_versions_change_on_writes():
+    """Test roster and groups versions are changed by triggers."""
+    roster_version = Course.get_roster_version("History")
+    groups_version = Group.get_version()
+    assert Course.get_roster_version("Golf") is None
+
+    Student.create_student("Version", "Check", "AA-11")
+    assert Group.get_version() > groups_version
+    with db_session() as session:
+        student_id = session.query(Student).filter_by(first_name="Version").one().id
+    Student.add_student_to_course(student_id, ["History"])
+    assert Course.get_roster_version("History") > roster_version
+
+    roster_version = Course.get_roster_version("History")
+    Student.delete_student(student_id)
+    assert Course.get_roster_version("History") > roster_version
+
+    groups_version = Group.get_version()
+    Group.create_group("VV-11")
+    assert Group.get_version() > groups_version
+    groups_version = Group.get_version()
+    with db_session() as session:
+        session.query(Group).filter_by(id="VV-11").delete()
+        session.commit()
+    assert Group.get_version() > groups_version
+
+
+@pytest.mark.postgres
+def test_students_of_different_groups_are_written_concurrently():
+    """Test version triggers of two transactions inserting students do not wait for each other."""
+    with get_engine().connect() as first, get_engine().connect() as second:
+        first.execute(insert(Student), [{"first_name": "First", "last_name": "Writer", "group_id": "AA-11"}])
+        second.exec_driver_sql("SET LOCAL lock_timeout = '1s'")
+        second.execute(insert(Student), [{"first_name": "Second", "last_name": "Writer", "group_id": "BB-11"}])
+        first.rollback()
+        second.rollback()
+
+
+# Tests for bulk insert
+def test_bulk_create_groups():
+    """Test bulk create groups reports existing groups as conflicts."""
+    result = Group.bulk_create_groups(["EE-11", "AA-11", "FF-11", "EE-11"], chunk_size=2)
+    assert result.ids == ["EE-11", "FF-11"]
+    assert [conflict["row"] for conflict in result.conflicts] == [1, 3]
+
+
+def test_bulk_create_courses():
+    """Test bulk create courses reports existing courses as conflicts."""
+    result = Course.bulk_create_courses({"Art": "Course about Art",
+                                         "Music": "Course about Music"})
+    assert len(result.ids) == 1
+    assert result.conflicts == [{"row": 0, "value": "Art", "reason": "Record already exists."}]
+
+
+def test_bulk_create_students():
+    """Test bulk create students inserts valid rows and reports invalid ones."""
+    students = [{"first_name": "Anna", "last_name": "Bulk", "group_id": "EE-11"},
+                {"first_name": "Anna", "last_name": "Bulk", "group_id": "XX-00"},
+                {"first_name": "Anna"},
+                {"first_name": "Anna", "last_name": "Bulk"}]
+    result = Student.bulk_create_students(students, chunk_size=3)
+    assert [conflict["row"] for conflict in result.conflicts] == [1, 2]
+    with db_session() as session:
+        created = session.query(Student).filter(Student.id.in_(result.ids)).order_by(Student.id).all()
+    assert [student.group_id for student in created] == ["EE-11", None]
+
+
+# Tests for materialized group counters
+def test_group_student_counter(monkeypatch: pytest.MonkeyPatch):
+    """Test groups.student_count follows inserts, updates and deletes of students."""
+    install_group_counters()
+    assert group_counters_installed()
+
+    def student_count(group_id: str) -> int:
+        with db_session() as session:
+            return session.query(Group.student_count).filter_by(id=group_id).scalar()
+
+    Group.create_group("GG-11")
+    Student.create_multiple_students(["Ann Counter", "Bob Counter"], group_id="GG-11")
+    assert student_count("GG-11") == 2
+
+    with db_session() as session:
+        ann, bob = session.query(Student).filter_by(last_name="Counter").order_by(Student.id).all()
+        bob.group_id = "AA-11"
+        session.commit()
+        ann_id = ann.id
+    assert student_count("GG-11") == 1
+    Student.delete_student(ann_id)
+    assert student_count("GG-11") == 0
+
+    aggregated = Group.get_all_groups_not_bigger_then(1, order_by="size")
+    monkeypatch.setitem(db_settings, "GROUP_STUDENT_COUNTER", True)
+    assert Group.get_all_groups_not_bigger_then(1, order_by="size") == aggregated
+
+
+def test_reconcile_group_counters():
+    """Test reconciliation fixes wrong counters."""
+    with db_session() as session:
+        session.query(Group).filter_by(id="GG-11").update({"student_count": 10})
+        session.commit()
+    assert reconcile_group_counters() == 1
+    assert reconcile_group_counters() == 0
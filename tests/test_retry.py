@@ -0,0 +1,170 @@
+"""Tests for retry policy of model methods"""
+import asyncio
+import time
+
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy.exc import DisconnectionError, IntegrityError, OperationalError
+
+from app import create_app, create_async_app
+from app.constants import TESTING
+from app.db import db_session, db_settings, Group
+from app.db.async_db import run_model
+from app.db.exceptions import DatabaseUnavailable
+from app.db.retry import retry_on_disconnect, backoff_delay, breaker
+
+
+@pytest.fixture(autouse=True)
+def retry_settings(monkeypatch):
+    """Use short delays and close the breaker once test is finished."""
+    for key, value in {"RETRY_TRIES": 3, "RETRY_BASE_DELAY": 0.001, "RETRY_MAX_DELAY": 0.004,
+                       "RETRY_DEADLINE": 1, "RETRY_BREAKER_THRESHOLD": 5,
+                       "RETRY_BREAKER_RESET": 0.05}.items():
+        monkeypatch.setitem(db_settings, key, value)
+    yield
+    breaker.record_success()
+
+
+def failing(errors: list[Exception]):
+    """Create model method which raises given errors and then returns True."""
+    calls = []
+
+    @retry_on_disconnect("Test.failing")
+    def method():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return True
+
+    return method, calls
+
+
+def test_backoff_delay_grows_with_jitter():
+    """Test delay is random and its cap doubles up to max delay."""
+    for attempt, cap in [(1, 0.001), (2, 0.002), (3, 0.004), (6, 0.004)]:
+        delays = [backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("error", [
+    DisconnectionError(),
+    OperationalError("SELECT 1", {}, Exception("server closed"), connection_invalidated=True),
+])
+def test_disconnect_is_retried(error: Exception):
+    """Test method is called again after lost connection."""
+    method, calls = failing([error, error])
+    assert method()
+    assert len(calls) == 3
+
+
+def test_other_errors_are_not_retried():
+    """Test errors of the statement are raised at once."""
+    error = IntegrityError("INSERT", {}, Exception("duplicate"))
+    method, calls = failing([error])
+    with pytest.raises(IntegrityError):
+        method()
+    assert len(calls) == 1
+
+
+def test_unavailable_after_last_try():
+    """Test DatabaseUnavailable is raised when tries are exhausted."""
+    method, calls = failing([DisconnectionError()] * 3)
+    with pytest.raises(DatabaseUnavailable) as error:
+        method()
+    assert isinstance(error.value.__cause__, DisconnectionError)
+    assert len(calls) == 3
+
+
+def test_lost_request_changes_are_not_retried():
+    """Test call is not retried when connection was lost with changes of the request."""
+    calls = []
+
+    @retry_on_disconnect("Test.losing_changes")
+    def method():
+        calls.append(1)
+        with db_session():
+            raise DisconnectionError()
+
+    with create_app(TESTING).test_request_context():
+        Group.create_group("RT-01")
+        with pytest.raises(DatabaseUnavailable):
+            method()
+    assert len(calls) == 1
+    with db_session() as session:
+        assert session.get(Group, "RT-01") is None
+
+
+def test_deadline_stops_retries(monkeypatch):
+    """Test no retry is done when its delay does not fit into the deadline."""
+    monkeypatch.setitem(db_settings, "RETRY_BASE_DELAY", 10)
+    monkeypatch.setitem(db_settings, "RETRY_MAX_DELAY", 10)
+    # Jittered delay is always the longest one, which is after the deadline.
+    monkeypatch.setattr("app.db.retry.random.uniform", lambda low, high: high)
+    method, calls = failing([DisconnectionError()])
+    start = time.monotonic()
+    with pytest.raises(DatabaseUnavailable):
+        method()
+    assert len(calls) == 1
+    assert time.monotonic() - start < 1
+
+
+def test_breaker_fails_fast_and_recovers():
+    """Test open breaker does not call the database until reset timeout passes."""
+    method, calls = failing([DisconnectionError()] * 5)
+    for _ in range(2):
+        with pytest.raises(DatabaseUnavailable):
+            method()
+    assert len(calls) == 5
+    assert breaker.is_open
+
+    with pytest.raises(DatabaseUnavailable):
+        method()
+    assert len(calls) == 5
+
+    time.sleep(0.05)
+    assert method()
+    assert len(calls) == 6
+    assert not breaker.is_open
+
+
+def test_unavailable_responses(monkeypatch):
+    """Test both APIs answer 503 with Retry-After while breaker is open."""
+    client: FlaskClient = create_app(TESTING).test_client()
+    async_app = create_async_app(TESTING)
+    # Applications configure reset timeout, breaker must stay open while async application starts.
+    monkeypatch.setitem(db_settings, "RETRY_BREAKER_RESET", 1)
+    breaker.record_failure(threshold=1)
+    response = client.get("/api/v1/groups/?student_count=10")
+    assert response.status_code == 503
+    assert response.json == {"message": "Database is unavailable, try again later."}
+    assert response.headers["Retry-After"] == "1"
+
+    async def get():
+        async with async_app.test_app() as test_app:
+            response = await test_app.test_client().get("/api/v1/groups/?student_count=10")
+            return response, await response.get_json()
+    breaker.record_failure(threshold=1)
+    response, body = asyncio.run(get())
+    assert (response.status_code, body) == (503, {"message": "Database is unavailable, try again later."})
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_async_retry_does_not_block_event_loop(monkeypatch):
+    """Test retry delay of the async API is awaited in the event loop."""
+    monkeypatch.setitem(db_settings, "RETRY_BASE_DELAY", 0.2)
+    monkeypatch.setitem(db_settings, "RETRY_MAX_DELAY", 0.2)
+    monkeypatch.setattr("app.db.retry.random.uniform", lambda low, high: high)
+    method, calls = failing([DisconnectionError()])
+    ticks = []
+
+    async def tick():
+        while len(calls) < 2:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        return await asyncio.gather(run_model(method), tick())
+
+    assert asyncio.run(main())[0]
+    assert len(ticks) > 5